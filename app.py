@@ -1,4 +1,48 @@
+import functools
+import time
+import uuid
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import metrics
+import progress
+from attempt_log import new_event
+from broadcast import rerun_session, session_alive
+from dag import CardiacDag, History
+from model import (
+    DIRECTION_LABELS,
+    NODE_INDEX,
+    NODE_KEYS,
+    ModelParams,
+    direction_vs_baseline,
+)
+from nodes import AGENT_ROW, DOWNSTREAM_ROW, NODE_REGION, REGIONS, Group, affected_regions, node_label
+from outcomes import get_outcome_table
+from resources import (
+    attempt_logger,
+    broadcast_channel,
+    class_stats,
+    metrics_exporters,
+    patient_profiles,
+    progress_store,
+    scenario_bank,
+    session_store,
+)
+from scenarios import TIERS, draw
+from session import BASELINE_STATE, SessionState, unpack
+from session_store import SessionRecord
+from styles import (
+    ARROW_DOWN,
+    FLOW_ARROW,
+    INLINE_STYLESHEET,
+    STYLESHEET_LINK,
+    agent_box,
+    co_box,
+    correlation,
+    group_box,
+    node_box,
+)
 
 # ---------------------------
 # Page config + style
@@ -9,226 +53,10 @@ st.set_page_config(
     layout="wide",
 )
 
-st.markdown(
-    """
-    <style>
-      .big-title { 
-        font-size: 2.3rem; 
-        font-weight: 800; 
-        margin-bottom: 0.5rem;
-        color: #1f1f1f;
-      }
-      .subtitle { 
-        color: #555; 
-        font-size: 1.1rem; 
-        margin-top: 0;
-        margin-bottom: 1.5rem;
-      }
-
-      .node-card {
-        border: 2px solid #e0e0e0;
-        border-radius: 12px;
-        padding: 16px 18px;
-        background: #fafafa;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-        margin-bottom: 1rem;
-      }
-      
-      .header-box {
-        border: 2px solid #333;
-        border-radius: 8px;
-        padding: 12px;
-        background: #EFE7E5;
-        text-align: center;
-        margin-bottom: 0px;
-      }
-      
-      .header-box h4 {
-        margin: 0 0 4px 0;
-        font-size: 1rem;
-        font-weight: 700;
-      }
-      
-      .header-box .desc {
-        font-size: 0.8rem;
-        color: #666;
-        margin: 0;
-      }
-      
-      .header-box-yellow {
-        border: 2px solid #333;
-        border-radius: 8px;
-        padding: 12px;
-        background: #FFF8DC;
-        text-align: center;
-        margin-bottom: 8px;
-      }
-      
-      .header-box-yellow h4 {
-        margin: 0 0 4px 0;
-        font-size: 1rem;
-        font-weight: 700;
-      }
-      
-      .header-box-yellow .desc {
-        font-size: 0.8rem;
-        color: #666;
-        margin: 0;
-      }
-      
-      .arrow-display {
-        font-size: 2rem;
-        font-weight: 800;
-        margin: 8px 0;
-      }
-      
-      .good { 
-        color: #0a7a2f; 
-        font-weight: 800;
-        font-size: 1.1rem;
-      }
-      .bad { 
-        color: #b00020; 
-        font-weight: 800;
-        font-size: 1.1rem;
-      }
-
-      .stButton button {
-        border-radius: 8px !important;
-        padding: 0.4rem 0.8rem !important;
-        font-weight: 600 !important;
-      }
-      
-      .agent-box {
-        border: 2px solid #333;
-        border-radius: 8px;
-        padding: 10px;
-        background: white;
-        text-align: center;
-        margin-bottom: 8px;
-      }
-      
-      .agent-box h5 {
-        margin: 0 0 4px 0;
-        font-size: 0.9rem;
-        font-weight: 600;
-      }
-      
-      .downstream-box {
-        border: 2px solid #333;
-        border-radius: 8px;
-        padding: 15px;
-        background: #EFE7E5;
-        text-align: center;
-      }
-      
-      .downstream-box h4 {
-        margin: 0 0 4px 0;
-        font-size: 1.1rem;
-        font-weight: 700;
-      }
-      
-      .downstream-box-yellow {
-        border: 2px solid #333;
-        border-radius: 8px;
-        padding: 15px;
-        background: #FFF8DC;
-        text-align: center;
-      }
-      
-      .downstream-box-yellow h4 {
-        margin: 0 0 4px 0;
-        font-size: 1.1rem;
-        font-weight: 700;
-      }
-      
-      .co-box {
-        border: 2px solid #333;
-        border-radius: 8px;
-        padding: 20px;
-        background: #F3D6DA;
-        text-align: center;
-      }
-      
-      .co-box h4 {
-        margin: 0 0 4px 0;
-        font-size: 1.2rem;
-        font-weight: 700;
-      }
-      
-      .arrow-down {
-        text-align: center;
-        font-size: 1.5rem;
-        color: #333;
-        margin: 5px 0;
-      }
-      
-      .correlation-text {
-        font-style: italic;
-        font-size: 0.85rem;
-        color: #555;
-        text-align: center;
-        margin: 5px 0;
-      }
-      
-      .container-box {
-        border: 2px solid #333;
-        border-radius: 8px;
-        padding: 12px;
-        background: #EFE7E5;
-        text-align: center;
-      }
-      
-      .container-box h4 {
-        margin: 0 0 4px 0;
-        font-size: 1rem;
-        font-weight: 700;
-      }
-      
-      .container-box .desc {
-        font-size: 0.8rem;
-        color: #666;
-        margin: 0 0 10px 0;
-      }
-      
-      .container-box-pink {
-        border: 2px solid #333;
-        border-radius: 8px;
-        padding: 12px;
-        background: #FFF0EC;
-        text-align: center;
-      }
-      
-      .container-box-pink h4 {
-        margin: 0 0 4px 0;
-        font-size: 1rem;
-        font-weight: 700;
-      }
-      
-      .container-box-pink .desc {
-        font-size: 0.8rem;
-        color: #666;
-        margin: 0 0 10px 0;
-      }
-      
-      .inner-agent-box {
-        border: 2px solid #333;
-        border-radius: 6px;
-        padding: 8px;
-        background: white;
-        text-align: center;
-        margin-bottom: 6px;
-      }
-      
-      .inner-agent-box h5 {
-        margin: 0 0 4px 0;
-        font-size: 0.85rem;
-        font-weight: 600;
-      }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+with metrics.section("css"):
+    # Link the served stylesheet; inline it only when static serving is off.
+    stylesheet = STYLESHEET_LINK if st.get_option("server.enableStaticServing") else INLINE_STYLESHEET
+    st.markdown(stylesheet, unsafe_allow_html=True)
 
 # ---------------------------
 # Helpers
@@ -236,65 +64,115 @@ st.markdown(
 def effect_arrow(effect: int):
     return "↑" if effect > 0 else ("↓" if effect < 0 else "—")
 
-def expected_direction(before, after, eps=1e-6):
-    if abs(after - before) < eps:
-        return "No change"
-    return "Increase" if after > before else "Decrease"
+def session() -> SessionState:
+    return st.session_state.app_state
+
+def current_params() -> ModelParams:
+    return patient_profiles()[session().profile].params
 
+def session_history():
+    # Cumulative mode keeps an incrementally evaluated DAG plus its undo history.
+    s = session()
+    if s.history is None or s.history.dag.params != current_params():
+        s.history = History(CardiacDag(current_params(), s.effects))
+    return s.history
+
+@metrics.timed("compute_state")
 def compute_state():
-    hr0 = st.session_state.hr_baseline
-    sv0 = st.session_state.sv_baseline
-    HR_STEP = 0.12
-    SV_STEP = 0.12
-    net_chrono = st.session_state.chrono_pos_effect - st.session_state.chrono_neg_effect
-    net_ino = st.session_state.ino_pos_effect - st.session_state.ino_neg_effect
-    venous = st.session_state.venous_return_effect
-    afterload = st.session_state.afterload_effect
-    hr_direct = st.session_state.hr_direct_effect
-    sv_direct = st.session_state.sv_direct_effect
-    hr = hr0 * (1 + HR_STEP * (net_chrono + hr_direct))
-    sv = sv0 * (1 + SV_STEP * (net_ino + venous - afterload + sv_direct))
-    hr = max(30, min(180, hr))
-    sv = max(30, min(140, sv))
-    co = hr * sv / 1000.0
-    return hr, sv, co
-
-def direction_vs_baseline(value, baseline, eps=1e-6):
-    if abs(value - baseline) < eps:
-        return 0
-    return 1 if value > baseline else -1
+    return session().values(current_params())
 
 def have_dialog():
     return hasattr(st, "dialog")
 
+def sticky(widget, label, key, **kwargs):
+    """Sidebar widget whose value lives in the session's ``key`` attribute.
+
+    Keyed fragment reruns don't render the sidebar, which would otherwise
+    drop the widget's state. The new value is saved straight away, so a
+    reconnect to another worker resumes with it.
+    """
+    @persisted
+    def copy():
+        setattr(session(), key, st.session_state[f"{key}_choice"])
+    return widget(label, key=f"{key}_choice", on_change=copy, **kwargs)
+
 def buttons_disabled():
     # Disable buttons if we're past the select_box phase
-    return st.session_state.phase != "select_box"
+    return session().phase != "select_box"
 
 # ---------------------------
 # Ensure session defaults
 # ---------------------------
-defaults = {
-    "hr_baseline": 70.0,
-    "sv_baseline": 70.0,
-    "chrono_pos_effect": 0,
-    "chrono_neg_effect": 0,
-    "ino_pos_effect": 0,
-    "ino_neg_effect": 0,
-    "venous_return_effect": 0,
-    "afterload_effect": 0,
-    "hr_direct_effect": 0,
-    "sv_direct_effect": 0,
-    "phase": "select_box",
-    "selected_node": None,
-    "pending_direction": None,
-    "prediction": None,
-    "last_feedback": None,
-    "last_correct": None,
-    "graph_version": 0,
-}
-for k, v in defaults.items():
-    st.session_state.setdefault(k, v)
+def new_session():
+    # With a session store configured, the session id rides in the URL so
+    # a reconnect to any worker resumes the round saved under it.
+    store = session_store()
+    sid = st.query_params.get("sid") if store is not None else None
+    s = SessionState(sid or uuid.uuid4().hex, TIERS[0], next(iter(patient_profiles())))
+    if store is not None:
+        record = store.load(s.session_id) if sid else None
+        if record is not None:
+            record.apply(s)
+            # A profile since removed from profiles.json falls back to the default.
+            if s.profile not in patient_profiles():
+                s.profile = next(iter(patient_profiles()))
+            s.saved = record
+        st.query_params["sid"] = s.session_id
+    # A student id in the URL survives refreshes and server restarts.
+    student_id = st.query_params.get("student")
+    if student_id:
+        resume(s, student_id)
+    return s
+
+def resume(s, student_id):
+    """Make ``s`` the session of ``student_id``, restoring their saved progress."""
+    s.student_id = student_id
+    s.practice = None
+    with metrics.section("restore"):
+        snapshot = progress_store().load(student_id)
+        restored = snapshot is not None and progress.restore(s, snapshot, patient_profiles())
+    if snapshot is not None and not restored:
+        # Unreadable (corrupt, or from a newer version): the first save
+        # would overwrite it, so keep a copy.
+        progress_store().set_aside(student_id, snapshot)
+    s.snapshot = snapshot if restored else None
+    return restored
+
+def save_session():
+    s = session()
+    store = session_store()
+    if store is not None:
+        record = SessionRecord.of(s)
+        if record != s.saved:
+            store.save(s.session_id, record)
+            s.saved = record
+    if s.student_id is not None:
+        snapshot = progress.dump(s)
+        if snapshot != s.snapshot:
+            progress_store().save(s.student_id, snapshot)
+            s.snapshot = snapshot
+
+def persisted(callback):
+    """Save the round to the session store after ``callback``, even if it reruns."""
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            save_session()
+    return wrapper
+
+if "app_state" not in st.session_state:
+    st.session_state.app_state = new_session()
+    # A published broadcast reruns this session, which then picks it up below.
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        broadcast_channel().subscribe(ctx.session_id, rerun_session, session_alive)
+# Start the class counters with the first session so no batch is missed.
+class_stats()
+if metrics.ENABLED:
+    metrics_exporters()
+metrics.rerun(session().phase)
 
 # ---------------------------
 # Header
@@ -306,326 +184,611 @@ st.markdown(
 )
 
 # ---------------------------
-# Compute downstream arrows
+# Chart view
 # ---------------------------
-hr, sv, co = compute_state()
-hr_dir = direction_vs_baseline(hr, st.session_state.hr_baseline)
-sv_dir = direction_vs_baseline(sv, st.session_state.sv_baseline)
-co_dir = direction_vs_baseline(co, (st.session_state.hr_baseline * st.session_state.sv_baseline / 1000.0))
-
-HR_arrow = effect_arrow(hr_dir)
-SV_arrow = effect_arrow(sv_dir)
-CO_arrow = effect_arrow(co_dir)
-
-cp = effect_arrow(st.session_state.chrono_pos_effect)
-cn = effect_arrow(st.session_state.chrono_neg_effect)
-ip = effect_arrow(st.session_state.ino_pos_effect)
-inn = effect_arrow(st.session_state.ino_neg_effect)
-vr = effect_arrow(st.session_state.venous_return_effect)
-al = effect_arrow(st.session_state.afterload_effect)
-
-disabled = buttons_disabled()
+# "Graph" draws the whole chart as one streamlit-agraph component whose
+# node clicks select the node; "Boxes" is the column layout below.
+graph_mode = st.sidebar.radio("Chart view", ("Boxes", "Graph"), horizontal=True, key="chart_view") == "Graph"
 
 # ---------------------------
-# ROW 1: Four main boxes
+# Student progress
 # ---------------------------
-col1, col2, col3, col4 = st.columns(4)
+# With a student id, progress is saved after every step and restored on
+# refresh, reconnect or server restart.
+STICKY_WIDGETS = ("profile", "cumulative", "simulate", "explain", "challenge_tier", "practicing")
+
+@persisted
+def sign_in():
+    s = session()
+    student_id = st.session_state.student_choice.strip() or None
+    if student_id == s.student_id:
+        return
+    s.attempts = bytearray()
+    s.practice = None
+    if student_id is None:
+        s.student_id = s.snapshot = None
+        st.query_params.pop("student", None)
+        return
+    st.query_params["student"] = student_id
+    if resume(s, student_id):
+        # Show the restored settings instead of this session's widget values.
+        for key in STICKY_WIDGETS:
+            st.session_state.pop(f"{key}_choice", None)
+        st.session_state.pop("prediction_choice", None)
+        st.session_state.pop("direction_choice", None)
+        s.graph_version += 1
+
+with st.sidebar:
+    st.text_input("Student ID", value=session().student_id or "", key="student_choice", on_change=sign_in,
+                  placeholder="Optional: save your progress")
+    if session().student_id is not None:
+        correct, total = progress.score(session())
+        st.caption(f"Progress saved as {session().student_id}: {correct} of {total} predictions correct.")
 
-with col1:
-    # Chronotropic agents container with nested positive/negative boxes
-    st.markdown(
-        """
-        <div class='container-box'>
-            <h4>Chronotropic agents</h4>
-            <div class='desc'>(alter SA node and AV node activity)</div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-    sub1, sub2 = st.columns(2)
-    with sub1:
-        st.markdown(f"<div class='inner-agent-box'><h5>Positive agents</h5><div style='font-size:0.75rem;color:#666;'>Amount:</div><div class='arrow-display'>{cp}</div></div>", unsafe_allow_html=True)
-        if st.button("⬆️ Add more", key="chrono_pos_inc", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "chrono_pos"
-            st.session_state.pending_direction = 1
-            st.session_state.phase = "predict"
-            st.rerun()
-        if st.button("⬇️ Add less", key="chrono_pos_dec", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "chrono_pos"
-            st.session_state.pending_direction = -1
-            st.session_state.phase = "predict"
-            st.rerun()
-    with sub2:
-        st.markdown(f"<div class='inner-agent-box'><h5>Negative agents</h5><div style='font-size:0.75rem;color:#666;'>Amount:</div><div class='arrow-display'>{cn}</div></div>", unsafe_allow_html=True)
-        if st.button("⬆️ Add more", key="chrono_neg_inc", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "chrono_neg"
-            st.session_state.pending_direction = 1
-            st.session_state.phase = "predict"
-            st.rerun()
-        if st.button("⬇️ Add less", key="chrono_neg_dec", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "chrono_neg"
-            st.session_state.pending_direction = -1
-            st.session_state.phase = "predict"
-            st.rerun()
-
-with col2:
-    st.markdown(
-        f"""
-        <div class='header-box-yellow'>
-            <h4>Venous return</h4>
-            <div class='desc'>(volume of blood returning to heart alters stretch of heart wall or preload)</div>
-            <div class='arrow-display'>{vr}</div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-    c1, c2 = st.columns(2)
-    with c1:
-        if st.button("⬆️ Increase", key="venous_inc", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "venous"
-            st.session_state.pending_direction = 1
-            st.session_state.phase = "predict"
-            st.rerun()
-    with c2:
-        if st.button("⬇️ Decrease", key="venous_dec", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "venous"
-            st.session_state.pending_direction = -1
-            st.session_state.phase = "predict"
-            st.rerun()
-    # Arrow and correlation text
-    st.markdown("<div class='arrow-down'>↓</div>", unsafe_allow_html=True)
-    st.markdown("<div class='correlation-text'>is directly<br/>correlated with</div>", unsafe_allow_html=True)
-
-with col3:
-    # Inotropic agents container with nested positive/negative boxes
-    st.markdown(
-        """
-        <div class='container-box-pink'>
-            <h4>Inotropic agents</h4>
-            <div class='desc'>(substances that alter contractility of myocardium)</div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-    sub1, sub2 = st.columns(2)
-    with sub1:
-        st.markdown(f"<div class='inner-agent-box'><h5>Positive agents</h5><div style='font-size:0.75rem;color:#666;'>Amount:</div><div class='arrow-display'>{ip}</div></div>", unsafe_allow_html=True)
-        if st.button("⬆️ Add more", key="ino_pos_inc", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "ino_pos"
-            st.session_state.pending_direction = 1
-            st.session_state.phase = "predict"
-            st.rerun()
-        if st.button("⬇️ Add less", key="ino_pos_dec", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "ino_pos"
-            st.session_state.pending_direction = -1
-            st.session_state.phase = "predict"
-            st.rerun()
-    with sub2:
-        st.markdown(f"<div class='inner-agent-box'><h5>Negative agents</h5><div style='font-size:0.75rem;color:#666;'>Amount:</div><div class='arrow-display'>{inn}</div></div>", unsafe_allow_html=True)
-        if st.button("⬆️ Add more", key="ino_neg_inc", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "ino_neg"
-            st.session_state.pending_direction = 1
-            st.session_state.phase = "predict"
-            st.rerun()
-        if st.button("⬇️ Add less", key="ino_neg_dec", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "ino_neg"
-            st.session_state.pending_direction = -1
-            st.session_state.phase = "predict"
-            st.rerun()
-
-with col4:
-    st.markdown(
-        f"""
-        <div class='header-box-yellow'>
-            <h4>Afterload</h4>
-            <div class='desc'>(increased resistance in arteries)</div>
-            <div class='arrow-display'>{al}</div>
-        </div>
-        """,
-        unsafe_allow_html=True
+# ---------------------------
+# Patient profile
+# ---------------------------
+# Baselines, step sizes and clamps from profiles.json. Each profile's
+# outcome table is built on first use and shared by every session.
+profiles = patient_profiles()
+with st.sidebar:
+    sticky(
+        st.selectbox,
+        "Patient profile",
+        "profile",
+        options=list(profiles),
+        index=list(profiles).index(session().profile),
+        format_func=lambda key: profiles[key].label,
     )
-    c1, c2 = st.columns(2)
-    with c1:
-        if st.button("⬆️ Increase", key="afterload_inc", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "afterload"
-            st.session_state.pending_direction = 1
-            st.session_state.phase = "predict"
-            st.rerun()
-    with c2:
-        if st.button("⬇️ Decrease", key="afterload_dec", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "afterload"
-            st.session_state.pending_direction = -1
-            st.session_state.phase = "predict"
-            st.rerun()
-    # Arrow and correlation text
-    st.markdown("<div class='arrow-down'>↓</div>", unsafe_allow_html=True)
-    st.markdown("<div class='correlation-text'>is inversely<br/>correlated with</div>", unsafe_allow_html=True)
+    profile = profiles[session().profile]
+    st.caption(f"{profile.description} Baseline HR {profile.params.hr_baseline:.0f} bpm, SV {profile.params.sv_baseline:.0f} mL.")
 
 # ---------------------------
-# ROW 2: Arrows down (positioned under each section)
+# Cumulative interventions
 # ---------------------------
-col1, col2, col3, col4 = st.columns(4)
+# Effects stack across rounds instead of resetting, with undo/redo.
+with st.sidebar:
+    sticky(st.toggle, "Cumulative interventions", "cumulative", value=session().cumulative)
+cumulative = session().cumulative
 
-with col1:
-    st.markdown("<div class='arrow-down'>↓</div>", unsafe_allow_html=True)
-
-with col2:
-    st.write("")
+# ---------------------------
+# Simulation mode
+# ---------------------------
+# Results also show the beat-by-beat response from simulate.py.
+with st.sidebar:
+    sticky(st.toggle, "Simulate over time", "simulate", value=session().simulate)
 
-with col3:
-    st.markdown("<div class='arrow-down'>↓</div>", unsafe_allow_html=True)
+# ---------------------------
+# Explain mode
+# ---------------------------
+# A tornado chart of how far one more step on each node moves CO.
+with st.sidebar:
+    sticky(st.toggle, "Explain: which lever matters most?", "explain", value=session().explain)
+explaining = session().explain
 
-with col4:
-    st.write("")
+# ---------------------------
+# Measurement mode
+# ---------------------------
+# Append ?measure=1 to the URL to log elements and delta bytes per rerun,
+# and to compare partial rerendering against full-app reruns.
+measuring = st.query_params.get("measure") == "1"
+if measuring:
+    from measure import DeltaMeter
+
+    meter = st.session_state.setdefault("delta_meter", DeltaMeter())
+    meter.observe("app")
+    partial = st.sidebar.toggle("Partial rerendering", value=True, key="partial_rerender")
+else:
+    meter = None
+    partial = True
+# The graph view is a single component, so there are no regions to rerun.
+partial = partial and not graph_mode
+
+REGION_BITS = {key: 1 << i for i, key in enumerate(REGIONS)}
+
+def region(key):
+    """Run a chart region as a keyed fragment so callbacks can rerun it alone."""
+    def wrap(fn):
+        def body():
+            if meter:
+                meter.observe(key)
+            s = session()
+            metrics.rerun(s.phase)
+            bit = REGION_BITS.get(key, 0)
+            s.stale_regions = s.stale_regions & ~bit if s.phase == "select_box" else s.stale_regions | bit
+            with metrics.section(f"region:{key}"):
+                fn()
+        return st.fragment(body, key=key) if partial else body
+    return wrap
+
+def rerun_regions(regions):
+    if not partial:
+        st.rerun()
+    s = session()
+    if s.phase == "select_box":
+        # A full rerun mid-round (a sidebar toggle, a reconnect) drew every
+        # region's buttons disabled; those need redrawing as well.
+        regions = list(regions) + [key for key, bit in REGION_BITS.items() if s.stale_regions & bit]
+    extra = (["explain"] if explaining else []) + (["measure"] if measuring else [])
+    st.rerun(list(dict.fromkeys(list(regions) + extra)))
 
 # ---------------------------
-# ROW 3: Heart Rate (col 1) and Stroke Volume (cols 2-4)
+# Callbacks
 # ---------------------------
-col_hr, col_sv = st.columns([1, 3])
+@persisted
+def select_node(node, direction):
+    # Regions that did not rerun since the last round still show enabled
+    # buttons; ignore their clicks until the round is over.
+    s = session()
+    if s.phase != "select_box":
+        return
+    s.selected_node = node
+    s.pending_direction = direction
+    s.phase = "predict"
+    # A round the student picks is neither a scenario nor a live question;
+    # draw_scenario and follow_broadcast set those after selecting.
+    s.scenario = False
+    s.broadcast = None
+
+@persisted
+def submit_prediction():
+    s = session()
+    pred = st.session_state.prediction_choice
+    node = s.selected_node
+    if s.pending_direction is None:
+        # Graph clicks pick only the node; the dialog asked for the direction.
+        s.pending_direction = 1 if st.session_state.direction_choice == "Increase" else -1
+    direction = s.pending_direction
+    table = get_outcome_table(current_params())
+    dir_CO = DIRECTION_LABELS[table.co_direction(s.state, node, direction)]
+    if s.cumulative:
+        session_history().apply(node, direction)
+    s.previous_state = s.state
+    s.set_effect(node, direction)
+    s.graph_version += 1
+    s.prediction = pred
+    s.last_feedback = dir_CO
+    s.last_correct = (dir_CO == pred)
+    s.phase = "show_result"
+    attempt_logger().log(new_event(s.session_id, node, direction, pred, dir_CO, s.student_id))
+    if s.student_id is not None:
+        progress.record_attempt(s, node, direction, pred, dir_CO)
+    if s.practice is not None:
+        s.practice.record((node, direction), s.last_correct)
+    if s.broadcast is not None:
+        # Only an answer to the live question itself counts towards its tally.
+        live = broadcast_channel().current
+        if live is not None and live.id == s.broadcast and (live.node, live.direction) == (node, direction):
+            broadcast_channel().record(s.broadcast, pred, s.last_correct)
+
+@persisted
+def close_dialog():
+    s = session()
+    node = s.selected_node
+    # The dismissed question is over; the next one the student picks is their own.
+    s.scenario = False
+    s.broadcast = None
+    if s.phase == "predict":
+        # Dismissed without a prediction: give the student their buttons back.
+        s.phase = "select_box"
+        s.selected_node = None
+        s.pending_direction = None
+        rerun_regions([NODE_REGION[node]])
+    rerun_regions(affected_regions(node))
+
+def sync_effects(snapshot):
+    session().set_effects(snapshot.effects)
+
+def end_round():
+    s = session()
+    s.graph_version += 1
+    s.phase = "select_box"
+    s.selected_node = None
+    s.pending_direction = None
+    s.prediction = None
+    s.scenario = False
+    s.broadcast = None
+    st.session_state.pop("prediction_choice", None)
+    st.session_state.pop("direction_choice", None)
+
+def reset_regions(before):
+    """Regions showing a node whose effect differs from state ``before``."""
+    now = session().effects
+    changed = [node for node, old, new in zip(NODE_KEYS, unpack(before), now) if old != new]
+    return [region for node in changed for region in affected_regions(node)]
+
+@persisted
+def start_new_round():
+    s = session()
+    node, before = s.selected_node, s.state
+    if s.practicing:
+        # Straight on to the next question; its node's region opens the dialog.
+        practice_next()
+        regions = (affected_regions(node) if node else []) + [NODE_REGION[s.selected_node]]
+        rerun_regions(dict.fromkeys(regions + reset_regions(before)))
+    if not s.cumulative:
+        # Effects left by earlier cumulative rounds clear too, on any node.
+        s.state = BASELINE_STATE
+        s.history = None
+    end_round()
+    regions = (affected_regions(node) if node else []) + reset_regions(before)
+    if regions:
+        rerun_regions(dict.fromkeys(regions))
+
+@persisted
+def draw_scenario():
+    # Start from the scenario's interventions and go straight to predicting.
+    s = session()
+    row = draw(scenario_bank(), s.challenge_tier)
+    s.state = int(row["state"])
+    s.history = None
+    end_round()
+    select_node(NODE_KEYS[row["node"]], int(row["direction"]))
+    s.scenario = True
+
+@persisted
+def follow_broadcast(live):
+    # The instructor's question replaces whatever round was under way.
+    s = session()
+    s.broadcast_seen = live.id
+    if not s.cumulative:
+        s.state = BASELINE_STATE
+        s.history = None
+    end_round()
+    select_node(live.node, live.direction)
+    s.broadcast = live.id
+
+def practice_scheduler():
+    # Built from the attempt history on first use, then updated per answer.
+    from practice import from_attempts
+
+    s = session()
+    if s.practice is None:
+        s.practice = from_attempts(progress.attempts(s))
+    return s.practice
+
+@persisted
+def practice_next():
+    # The scheduler's most overdue (node, direction) becomes the next round.
+    s = session()
+    last = (s.selected_node, s.pending_direction) if s.selected_node else None
+    node, direction = practice_scheduler().next(avoid=last)
+    if not s.cumulative:
+        s.state = BASELINE_STATE
+        s.history = None
+    end_round()
+    select_node(node, direction)
+
+# Undo, redo and clearing can touch any node, so they rerun the whole app.
+@persisted
+def undo_step():
+    sync_effects(session_history().undo())
+    end_round()
+
+@persisted
+def redo_step():
+    sync_effects(session_history().redo())
+    end_round()
+
+@persisted
+def jump_to_step():
+    sync_effects(session_history().goto(st.session_state.history_step))
+    end_round()
+
+@persisted
+def clear_interventions():
+    session_history().reset()
+    sync_effects(session_history().dag.state)
+    end_round()
 
-with col_hr:
-    st.markdown(
-        f"""
-        <div class='downstream-box'>
-            <h4>Heart rate</h4>
-            <div class='desc'>(beats per minute)</div>
-            <div class='arrow-display'>{HR_arrow}</div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-    c1, c2 = st.columns(2)
-    with c1:
-        if st.button("⬆️ Increase", key="hr_inc", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "hr"
-            st.session_state.pending_direction = 1
-            st.session_state.phase = "predict"
-            st.rerun()
-    with c2:
-        if st.button("⬇️ Decrease", key="hr_dec", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "hr"
-            st.session_state.pending_direction = -1
-            st.session_state.phase = "predict"
-            st.rerun()
-
-with col_sv:
+# ---------------------------
+# Dialog
+# ---------------------------
+def predict_dialog():
+    # Wrapped only when a round opens it, so idle reruns build no dialog.
+    st.dialog("🔮 Predict the impact on cardiac output", on_dismiss=close_dialog)(prediction_panel)()
+
+@metrics.timed("dialog")
+def prediction_panel():
+    # Submitting reruns only this fragment, which then shows the result;
+    # closing the dialog reruns the chart regions the change reached.
+    s = session()
+    if s.phase == "predict":
+        change = "set"
+        if s.broadcast is not None:
+            live = broadcast_channel().current
+            if live is not None and live.id == s.broadcast:
+                st.info(live.prompt, icon="📣")
+            st.write(f"**{node_label(s.selected_node)}: {DIRECTION_LABELS[s.pending_direction]}**")
+        elif s.scenario:
+            st.write("With the interventions shown on the chart already in place, apply:")
+            st.write(f"**{node_label(s.selected_node)}: {DIRECTION_LABELS[s.pending_direction]}**")
+        elif s.pending_direction is None:
+            st.write(f"**{node_label(s.selected_node)}**")
+            change = st.radio("Change to apply:", ["Increase", "Decrease"], index=None, horizontal=True, key="direction_choice")
+        elif s.practicing:
+            st.write(f"🧠 Practice: **{node_label(s.selected_node)}: {DIRECTION_LABELS[s.pending_direction]}**")
+        st.write("**What will happen to cardiac output?**")
+        st.write("")
+        pred = st.radio("Your prediction:", ["Increase", "Decrease", "No change"], index=None, key="prediction_choice")
+        st.write("")
+        st.button("✅ Submit prediction", type="primary", disabled=(pred is None or change is None), on_click=submit_prediction)
+        return
     st.markdown(
         f"""
-        <div class='downstream-box-yellow'>
-            <h4>Stroke volume</h4>
-            <div class='desc'>(blood pumped per beat)</div>
-            <div class='arrow-display'>{SV_arrow}</div>
+        <div class="node-card">
+          <div class="result-line"><b>Your prediction:</b> {s.prediction}</div>
+          <div><b>Correct CO change:</b> {s.last_feedback}</div>
         </div>
         """,
         unsafe_allow_html=True
     )
-    c1, c2 = st.columns(2)
-    with c1:
-        if st.button("⬆️ Increase", key="sv_inc", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "sv"
-            st.session_state.pending_direction = 1
-            st.session_state.phase = "predict"
-            st.rerun()
-    with c2:
-        if st.button("⬇️ Decrease", key="sv_dec", use_container_width=True, disabled=disabled):
-            st.session_state.selected_node = "sv"
-            st.session_state.pending_direction = -1
-            st.session_state.phase = "predict"
-            st.rerun()
-
-# ---------------------------
-# ROW 4: Arrows to Cardiac Output
-# ---------------------------
-col_arrow1, col_arrow2 = st.columns([1, 3])
-
-with col_arrow1:
-    st.markdown("<div style='text-align: center; font-size: 2rem; margin: 10px 0;'>↘</div>", unsafe_allow_html=True)
-
-with col_arrow2:
-    st.markdown("<div style='text-align: center; font-size: 2rem; margin: 10px 0;'>↙</div>", unsafe_allow_html=True)
-
-# ---------------------------
-# ROW 5: Cardiac Output (full width)
-# ---------------------------
-st.markdown(
-    f"""
-    <div class='co-box'>
-        <h4>Cardiac output</h4>
-        <div class='desc'>(blood pumped per minute)</div>
-        <div class='arrow-display'>{CO_arrow}</div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+    if s.last_correct:
+        st.markdown("<div class='good'>✅ Your prediction was correct!</div>", unsafe_allow_html=True)
+    else:
+        st.markdown("<div class='bad'>❌ Your prediction was not correct.</div>", unsafe_allow_html=True)
+    st.write("")
+    st.info("📊 Close this dialog to see the updated flow chart, then click 'Start a new round' below.")
+    if s.simulate:
+        simulation_chart()
+
+def simulation_chart(frames=6, frame_seconds=0.05):
+    # Drawn a few beats at a time the first time each result is shown, so
+    # the response appears immediately and plays out; later reruns draw
+    # the whole trajectory at once.
+    from simulate import percent_of_baseline, trajectory
+
+    s = session()
+    params = current_params()
+    traj = trajectory(unpack(s.previous_state), s.effects, params)
+    st.write("**Beat-by-beat response**")
+    c1, c2, c3 = st.columns(3)
+    c1.metric("HR (bpm)", f"{traj.hr[-1]:.0f}", f"{traj.hr[-1] - traj.hr[0]:+.0f}")
+    c2.metric("SV (mL)", f"{traj.sv[-1]:.0f}", f"{traj.sv[-1] - traj.sv[0]:+.0f}")
+    c3.metric("CO (L/min)", f"{traj.co[-1]:.2f}", f"{traj.co[-1] - traj.co[0]:+.2f}")
+    data = {"Time (s)": traj.t, **percent_of_baseline(traj, params)}
+    chart = st.empty()
+    animate = s.simulated_version != s.graph_version
+    s.simulated_version = s.graph_version
+    step = -(-len(traj.t) // frames) if animate else len(traj.t)
+    for end in range(step, len(traj.t) + step, step):
+        chart.line_chart({k: v[:end] for k, v in data.items()}, x="Time (s)", y_label="% of baseline")
+        if animate and end < len(traj.t):
+            time.sleep(frame_seconds)
+
+def open_dialog_from(region_key):
+    # The region holding the clicked button opens the dialog, so selecting
+    # a node reruns only that region.
+    s = session()
+    node = s.selected_node
+    if s.phase == "predict" and node and NODE_REGION[node] == region_key:
+        if have_dialog():
+            predict_dialog()
 
 # ---------------------------
-# Handle phase transitions
+# Rendering
 # ---------------------------
-if st.session_state.phase == "predict" and st.session_state.selected_node:
-    node = st.session_state.selected_node
-    _, _, CO_before = compute_state()
-
-    if have_dialog():
-        @st.dialog("🔮 Predict the impact on cardiac output")
-        def predict_dialog():
-            st.write("**What will happen to cardiac output?**")
-            st.write("")
-            pred = st.radio("Your prediction:", ["Increase", "Decrease", "No change"], index=None)
-            st.write("")
-            if st.button("✅ Submit prediction", type="primary", disabled=(pred is None)):
-                st.session_state.prediction = pred
-                key_map = {
-                    "chrono_pos": "chrono_pos_effect",
-                    "chrono_neg": "chrono_neg_effect",
-                    "ino_pos": "ino_pos_effect",
-                    "ino_neg": "ino_neg_effect",
-                    "venous": "venous_return_effect",
-                    "afterload": "afterload_effect",
-                    "hr": "hr_direct_effect",
-                    "sv": "sv_direct_effect",
-                }
-                st.session_state[key_map[node]] = st.session_state.pending_direction
-                st.session_state.graph_version += 1
-                _, _, CO_after = compute_state()
-                dir_CO = expected_direction(CO_before, CO_after)
-                st.session_state.last_feedback = dir_CO
-                st.session_state.last_correct = (dir_CO == pred)
-                st.session_state.phase = "show_result"
-                st.rerun()
-        predict_dialog()
-
-if st.session_state.phase == "show_result":
-    if have_dialog():
-        @st.dialog("Results")
-        def show_result_dialog():
-            st.markdown(
-                f"""
-                <div class="node-card">
-                  <div style="margin-bottom: 10px;"><b>Your prediction:</b> {st.session_state.prediction}</div>
-                  <div><b>Correct CO change:</b> {st.session_state.last_feedback}</div>
-                </div>
-                """,
-                unsafe_allow_html=True
+def downstream_directions():
+    params = current_params()
+    hr, sv, co = compute_state()
+    hr_dir = direction_vs_baseline(hr, params.hr_baseline)
+    sv_dir = direction_vs_baseline(sv, params.sv_baseline)
+    co_dir = direction_vs_baseline(co, params.co_baseline)
+    return hr_dir, sv_dir, co_dir
+
+def downstream_arrows():
+    return tuple(effect_arrow(d) for d in downstream_directions())
+
+def node_arrow(node):
+    # Agent boxes show their own effect; HR and SV show the model output.
+    if node.key == "hr":
+        return downstream_arrows()[0]
+    if node.key == "sv":
+        return downstream_arrows()[1]
+    return effect_arrow(session().effect(node.key))
+
+def node_buttons(node):
+    disabled = buttons_disabled()
+    # Stacked buttons go straight into the enclosing column; a container
+    # each would only add elements to every new session's first render.
+    slots = (st,) * 2 if node.stacked else st.columns(2)
+    for slot, label, direction in zip(slots, node.labels, (1, -1)):
+        slot.button(
+            label,
+            key=node.button_key(direction),
+            width="stretch",
+            disabled=disabled,
+            on_click=select_node,
+            args=(node.key, direction),
+        )
+
+def render_agent(node):
+    st.markdown(agent_box(node, node_arrow(node)), unsafe_allow_html=True)
+    node_buttons(node)
+
+def render_group(group):
+    st.markdown(group_box(group), unsafe_allow_html=True)
+    for sub, node in zip(st.columns(len(group.nodes)), group.nodes):
+        with sub:
+            render_agent(node)
+
+def render_node(node):
+    st.markdown(node_box(node, node_arrow(node)), unsafe_allow_html=True)
+    node_buttons(node)
+    if node.correlation:
+        # Arrow and correlation text
+        st.markdown(ARROW_DOWN, unsafe_allow_html=True)
+        st.markdown(correlation(node), unsafe_allow_html=True)
+
+def render_item(item):
+    @region(item.key)
+    def item_region():
+        if isinstance(item, Group):
+            render_group(item)
+        else:
+            render_node(item)
+        open_dialog_from(item.key)
+    item_region()
+
+@region("co")
+def co_region():
+    st.markdown(co_box(downstream_arrows()[2]), unsafe_allow_html=True)
+    if session().phase == "show_result":
+        st.write("")
+        st.button(new_round_label(), type="primary", width="stretch", on_click=start_new_round)
+
+def new_round_label():
+    if session().practicing:
+        return "🎯 Next practice question"
+    return "➕ Add another intervention" if cumulative else "🔄 Start a new round"
+
+def history_controls():
+    history = session_history()
+    idle = session().phase != "predict"
+    with st.sidebar:
+        c1, c2 = st.columns(2)
+        c1.button("↩️ Undo", on_click=undo_step, disabled=not (idle and history.can_undo()), width="stretch")
+        c2.button("↪️ Redo", on_click=redo_step, disabled=not (idle and history.can_redo()), width="stretch")
+        if len(history.steps) > 1:
+            labels = ["Baseline"] + [f"{node_label(node)} {effect_arrow(value)}" for node, value in (s.change for s in history.steps[1:])]
+            st.session_state.history_step = history.cursor
+            st.select_slider(
+                "Jump to step",
+                options=range(len(history.steps)),
+                format_func=lambda i: f"{i}: {labels[i]}",
+                key="history_step",
+                on_change=jump_to_step,
+                disabled=not idle,
             )
-            if st.session_state.last_correct:
-                st.markdown("<div class='good'>✅ Your prediction was correct!</div>", unsafe_allow_html=True)
-            else:
-                st.markdown("<div class='bad'>❌ Your prediction was not correct.</div>", unsafe_allow_html=True)
-            st.write("")
-            st.info("📊 Close this dialog to see the updated flow chart, then click 'Start a new round' below.")
-        show_result_dialog()
-
-    st.write("")
-    if st.button("🔄 Start a new round", type="primary", use_container_width=True):
-        for key in ["chrono_pos_effect", "chrono_neg_effect", "ino_pos_effect", "ino_neg_effect",
-                    "venous_return_effect", "afterload_effect", "hr_direct_effect", "sv_direct_effect"]:
-            st.session_state[key] = 0
-        st.session_state.graph_version += 1
-        st.session_state.phase = "select_box"
-        st.session_state.selected_node = None
-        st.session_state.pending_direction = None
-        st.session_state.prediction = None
-        st.rerun()
+        st.button("🧹 Clear all interventions", on_click=clear_interventions, disabled=not idle, width="stretch")
+
+def scenario_controls():
+    with st.sidebar:
+        st.subheader("🎯 Scenario challenge")
+        sticky(st.radio, "Difficulty", "challenge_tier", options=TIERS, index=TIERS.index(session().challenge_tier), horizontal=True)
+        st.button(
+            "🎲 Draw a scenario",
+            on_click=draw_scenario,
+            disabled=session().phase == "predict",
+            width="stretch",
+        )
+
+def practice_controls():
+    s = session()
+    with st.sidebar:
+        st.subheader("🧠 Practice mode")
+        sticky(st.toggle, "Practice my weak spots", "practicing", value=s.practicing)
+        if not s.practicing:
+            return
+        st.button("🎯 Next practice question", on_click=practice_next, disabled=s.phase == "predict", width="stretch")
+        weak = practice_scheduler().weakest()
+        if weak:
+            missed = ", ".join(
+                f"{node_label(node)} {effect_arrow(direction)} ({item.seen - item.lapses}/{item.seen})"
+                for (node, direction), item in weak
+            )
+            st.caption(f"Most missed: {missed}.")
+
+@metrics.timed("graph")
+def render_graph_view():
+    from graph_view import render_graph
+
+    s = session()
+    hr_dir, sv_dir, co_dir = downstream_directions()
+    directions = {node: s.effect(node) for node in NODE_KEYS}
+    directions.update(hr=hr_dir, sv=sv_dir, co=co_dir)
+    clicked = render_graph(directions, s.graph_version, s.selected_node)
+    if clicked in NODE_INDEX and s.phase == "select_box":
+        select_node(clicked, None)
+        # A new version remounts the component, clearing the consumed click.
+        s.graph_version += 1
+    if s.phase == "predict" and have_dialog():
+        predict_dialog()
+    if s.phase == "show_result":
+        st.button(new_round_label(), type="primary", width="stretch", on_click=start_new_round)
+
+# A broadcast this session has not seen yet becomes its next question.
+live = broadcast_channel().current
+if live is not None and live.id != session().broadcast_seen:
+    follow_broadcast(live)
+
+if cumulative:
+    history_controls()
+
+# Hidden until the bank has been generated with scenarios.py.
+if scenario_bank() is not None:
+    scenario_controls()
+
+practice_controls()
+
+if graph_mode:
+    render_graph_view()
+else:
+    with metrics.section("layout"):
+        # ---------------------------
+        # ROW 1: Four main boxes
+        # ---------------------------
+        for col, item in zip(st.columns(len(AGENT_ROW)), AGENT_ROW):
+            with col:
+                render_item(item)
+
+        # ---------------------------
+        # ROW 2: Arrows down (positioned under each section)
+        # ---------------------------
+        for col, item in zip(st.columns(len(AGENT_ROW)), AGENT_ROW):
+            if isinstance(item, Group):
+                col.markdown(ARROW_DOWN, unsafe_allow_html=True)
+
+        # ---------------------------
+        # ROW 3: Heart Rate (col 1) and Stroke Volume (cols 2-4)
+        # ---------------------------
+        for col, (node, _) in zip(st.columns([w for _, w in DOWNSTREAM_ROW]), DOWNSTREAM_ROW):
+            with col:
+                render_item(node)
+
+        # ---------------------------
+        # ROW 4: Arrows to Cardiac Output
+        # ---------------------------
+        col_arrow1, col_arrow2 = st.columns([1, 3])
+
+        with col_arrow1:
+            st.markdown(FLOW_ARROW.format(arrow="↘"), unsafe_allow_html=True)
+
+        with col_arrow2:
+            st.markdown(FLOW_ARROW.format(arrow="↙"), unsafe_allow_html=True)
+
+        # ---------------------------
+        # ROW 5: Cardiac Output (full width)
+        # ---------------------------
+        co_region()
 
 st.write("")
 st.caption("📝 Arrows show direction of change only. CO = HR × SV (simplified learning model).")
+
+@region("explain")
+def explain_panel():
+    from sensitivity import levers, tornado_chart
+
+    state = session().state
+    params = current_params()
+    st.markdown("#### 🔍 Which lever matters most?")
+    st.caption("Change in cardiac output from one more step down or up on each node, starting from the chart as it is now.")
+    st.altair_chart(tornado_chart(state, params), width="stretch")
+    for lever in levers(state, params):
+        if lever.clamp:
+            zeroed = " and ".join(f"a step {step}" for step in lever.zeroed())
+            effect = f"{zeroed} has no effect on CO" if zeroed else "part of its effect is lost"
+            st.warning(f"{node_label(lever.node)}: {lever.clamp}, so {effect}.", icon="⚠️")
+
+if explaining:
+    explain_panel()
+
+if measuring:
+    @st.fragment(key="measure")
+    def measure_panel():
+        with st.sidebar:
+            meter.paused = True
+            st.caption("Elements and delta bytes sent per rerun, newest first.")
+            st.dataframe(meter.rows(), hide_index=True)
+            meter.paused = False
+    measure_panel()
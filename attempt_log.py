@@ -0,0 +1,142 @@
+"""Non-blocking attempt logging.
+
+The UI thread only calls ``AttemptLogger.log``, which puts the event on a
+bounded in-process queue and returns immediately. A background writer
+drains the queue and inserts events in batches into a SQLite database in
+WAL mode, so grading a prediction never waits on disk.
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from paths import DATA_DIR
+
+ATTEMPTS_DB = os.path.join(DATA_DIR, "attempts.db")
+
+_LOGGER = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    node TEXT NOT NULL,
+    direction INTEGER NOT NULL,
+    prediction TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    student_id TEXT
+);
+CREATE INDEX IF NOT EXISTS attempts_ts ON attempts (ts);
+"""
+
+
+class AttemptEvent(NamedTuple):
+    session_id: str
+    node: str
+    direction: int
+    prediction: str
+    correct_answer: str
+    ts: float
+    # Set when the student entered a Student ID (see progress.py).
+    student_id: Optional[str] = None
+
+    @property
+    def correct(self):
+        return self.prediction == self.correct_answer
+
+    def row(self):
+        return (*self[:5], int(self.correct), self.ts, self.student_id)
+
+
+def connect(path):
+    """Open ``path`` in WAL mode with the attempts schema in place."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL with synchronous=NORMAL fsyncs at checkpoints, not every commit.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Logs written before student ids existed lack the column.
+    if "student_id" not in {row[1] for row in conn.execute("PRAGMA table_info(attempts)")}:
+        conn.execute("ALTER TABLE attempts ADD COLUMN student_id TEXT")
+    return conn
+
+
+class AttemptLogger:
+    def __init__(self, path=ATTEMPTS_DB, maxsize=10_000, batch_size=500, flush_interval=0.25):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._subscribers = []
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="attempt-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, event: AttemptEvent) -> bool:
+        """Queue ``event`` without blocking; returns False if the queue was full."""
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def subscribe(self, callback):
+        """Call ``callback(events, last_id)`` on the writer thread after each committed batch."""
+        self._subscribers.append(callback)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Flush what is queued and stop the writer."""
+        if not self._closed.is_set():
+            self._closed.set()
+            self._thread.join(timeout)
+
+    # ---------------------------
+    # Writer thread
+    # ---------------------------
+    def _drain(self):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            while not (self._closed.is_set() and self._queue.empty()):
+                batch = self._drain()
+                if not batch:
+                    continue
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO attempts (session_id, node, direction, prediction, correct_answer, correct, ts, student_id)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [event.row() for event in batch],
+                    )
+                    (last_id,) = conn.execute("SELECT max(id) FROM attempts").fetchone()
+                self.written += len(batch)
+                for callback in self._subscribers:
+                    try:
+                        callback(batch, last_id)
+                    except Exception:
+                        _LOGGER.exception("attempt subscriber failed")
+        finally:
+            conn.close()
+
+
+def new_event(session_id, node, direction, prediction, correct_answer, student_id=None):
+    return AttemptEvent(session_id, node, direction, prediction, correct_answer, time.time(), student_id)
@@ -0,0 +1,118 @@
+"""Broadcast fan-out and simultaneous answer counting.
+
+Two measurements for a lecture hall of ``--students`` sessions:
+
+- fan-out: time from ``Channel.publish`` until every subscriber has been
+  notified (each subscriber wakes a waiting thread, standing in for a
+  session rerun);
+- answers: every student thread records ``--answers`` answers at once,
+  released by one barrier, into a ``StripedCounter`` and into a Counter
+  behind a single lock. Reports answers/s and the slowest single record
+  call for each.
+
+    python -m benchmarks.broadcast --students 300 --answers 200
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from broadcast import Channel, StripedCounter
+from model import DIRECTION_LABELS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREDICTIONS = tuple(DIRECTION_LABELS.values())
+
+
+class LockedCounter:
+    """The single-lock baseline."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = Counter()
+
+    def add(self, key, count=1):
+        with self._lock:
+            self._counter[key] += count
+
+    def totals(self):
+        with self._lock:
+            return Counter(self._counter)
+
+
+# ---------------------------
+# Measurements
+# ---------------------------
+def fan_out(students):
+    channel = Channel()
+    woken = [threading.Event() for _ in range(students)]
+    for i, event in enumerate(woken):
+        channel.subscribe(i, lambda key: woken[key].set())
+    start = time.perf_counter()
+    channel.publish("afterload", 1)
+    for event in woken:
+        event.wait()
+    return time.perf_counter() - start
+
+
+def answers(counter, students, per_student):
+    barrier = threading.Barrier(students + 1)
+    slowest = [0.0] * students
+
+    def student(i):
+        barrier.wait()
+        worst = 0.0
+        for j in range(per_student):
+            start = time.perf_counter()
+            counter.add((PREDICTIONS[(i + j) % 3], (i + j) % 2 == 0))
+            worst = max(worst, time.perf_counter() - start)
+        slowest[i] = worst
+
+    threads = [threading.Thread(target=student, args=(i,)) for i in range(students)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = sum(counter.totals().values())
+    assert total == students * per_student, total
+    return {"answers_per_s": total / elapsed, "slowest_record_ms": max(slowest) * 1000}
+
+
+def run(students, per_student, stripes):
+    return {
+        "config": {"students": students, "answers": per_student, "stripes": stripes},
+        "fan_out_ms": fan_out(students) * 1000,
+        "single_lock": answers(LockedCounter(), students, per_student),
+        "striped": answers(StripedCounter(stripes), students, per_student),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--answers", type=int, default=200, help="answers recorded per student thread")
+    parser.add_argument("--stripes", type=int, default=16)
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "broadcast.json"))
+    args = parser.parse_args(argv)
+
+    results = run(args.students, args.answers, args.stripes)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"publish reached {args.students} subscribers in {results['fan_out_ms']:.1f} ms")
+    for name in ("single_lock", "striped"):
+        r = results[name]
+        print(f"{name:<12} {r['answers_per_s']:>12,.0f} answers/s, slowest record {r['slowest_record_ms']:.2f} ms")
+    print(f"wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
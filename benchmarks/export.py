@@ -0,0 +1,128 @@
+"""Attempt export: throughput and memory against cohort size.
+
+Fills a temporary attempt log with each of ``--sizes`` attempts (spread
+over ``--students`` students), then streams every export table in CSV and
+Parquet to a byte counter. For each run it reports rows/s and peak
+memory: Python allocations traced by ``tracemalloc`` plus the peak of
+Arrow's memory pool. Streaming should keep that peak flat as the log
+grows.
+
+Exits non-zero if the peak at the largest size exceeds the peak at the
+smallest by more than ``TARGETS["peak_growth"]``, or if full-log exports
+are slower than ``TARGETS["rows_per_s"]``:
+
+    python -m benchmarks.export --sizes 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+from attempt_log import connect
+from export import TABLES, stream
+from model import DIRECTION_LABELS, NODE_KEYS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "peak_growth": 1.5,
+    "rows_per_s": 150_000,
+}
+
+
+def fill(path, size, students, seed):
+    rng = random.Random(seed)
+    labels = list(DIRECTION_LABELS.values())
+    conn = connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO attempts (session_id, node, direction, prediction, correct_answer, correct, ts, student_id)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"session-{i % (students * 2)}", rng.choice(NODE_KEYS), rng.choice((-1, 1)), p, a, int(p == a),
+                 1.7e9 + i, f"student-{i % students}" if i % 4 else None)
+                for i in range(size)
+                for p, a in ((rng.choice(labels), rng.choice(labels)),)
+            ),
+        )
+    conn.close()
+
+
+def run_export(path, fmt, by):
+    """(bytes, seconds, peak bytes) for one export."""
+    start = time.perf_counter()
+    size = sum(len(part) for part in stream(fmt, by, path))
+    elapsed = time.perf_counter() - start
+
+    pool = pa.default_memory_pool()
+    arrow_before = pool.max_memory() or 0
+    tracemalloc.start()
+    for _ in stream(fmt, by, path):
+        pass
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_peak = max(0, (pool.max_memory() or 0) - arrow_before)
+    return size, elapsed, python_peak + arrow_peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "export.json"))
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="export-bench-")
+    runs = []
+    try:
+        for size in sorted(args.sizes):
+            path = os.path.join(workdir, f"attempts-{size}.db")
+            fill(path, size, args.students, args.seed)
+            for fmt in ("csv", "parquet"):
+                for by in TABLES:
+                    nbytes, elapsed, peak = run_export(path, fmt, by)
+                    runs.append({
+                        "attempts": size, "format": fmt, "by": by, "bytes": nbytes,
+                        "seconds": elapsed, "rows_per_s": size / elapsed, "peak_mb": peak / 2**20,
+                    })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    smallest, largest = min(args.sizes), max(args.sizes)
+    missed = []
+    for fmt in ("csv", "parquet"):
+        for by in TABLES:
+            small, large = (next(r for r in runs if (r["attempts"], r["format"], r["by"]) == (n, fmt, by))
+                            for n in (smallest, largest))
+            growth = large["peak_mb"] / small["peak_mb"]
+            large["peak_growth"] = growth
+            if growth > TARGETS["peak_growth"]:
+                missed.append(f"{fmt}/{by} peak_growth")
+            if by == "attempts" and large["rows_per_s"] < TARGETS["rows_per_s"]:
+                missed.append(f"{fmt}/{by} rows_per_s")
+
+    results = {"config": vars(args), "runs": runs, "targets": TARGETS, "missed": missed}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for r in runs:
+        growth = f"  x{r['peak_growth']:.2f} vs {smallest:,}" if "peak_growth" in r else ""
+        print(f"{r['attempts']:>10,} {r['format']:<8} {r['by']:<9} {r['bytes'] / 2**20:8.1f} MB"
+              f"  {r['rows_per_s']:>11,.0f} attempts/s  peak {r['peak_mb']:6.2f} MB{growth}")
+    print(f"wrote {args.output}")
+    if missed:
+        print(f"missed targets: {', '.join(missed)}", file=sys.stderr)
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
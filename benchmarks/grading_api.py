@@ -0,0 +1,183 @@
+"""Throughput benchmark for the local grading API.
+
+Starts ``grading_api.py`` in a subprocess and measures:
+
+- bulk grading: records per second and time to first byte for one large
+  JSON request and one large NDJSON request;
+- single grading: requests per second and latency percentiles for
+  ``/grade`` calls over ``--clients`` keep-alive connections.
+
+    python -m benchmarks.grading_api --records 200000 --requests 5000
+
+Results are compared with the targets in ``TARGETS`` and written as JSON
+(default ``bench_results/grading_api.json``).
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.load_test import git_revision, percentiles
+from model import NODE_KEYS
+from outcomes import N_STATES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREDICTIONS = ("Increase", "Decrease", "No change")
+
+# Minimums for a laptop-class machine; see README "Grading API".
+TARGETS = {
+    "bulk_json_records_per_s": 100_000,
+    "bulk_ndjson_records_per_s": 100_000,
+    "single_requests_per_s": 1_000,
+    "single_p99_ms": 20.0,
+}
+
+
+def random_records(n, seed):
+    rng = random.Random(seed)
+    return [
+        {
+            "state": rng.randrange(N_STATES),
+            "node": rng.choice(NODE_KEYS),
+            "direction": rng.choice((1, -1)),
+            "prediction": rng.choice(PREDICTIONS),
+        }
+        for _ in range(n)
+    ]
+
+
+# ---------------------------
+# Server
+# ---------------------------
+def start_server(port):
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "grading_api.py"), "--port", str(port)], cwd=ROOT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("grading API did not start")
+
+
+# ---------------------------
+# Measurements
+# ---------------------------
+def bulk(port, body, content_type):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    start = time.perf_counter()
+    conn.request("POST", "/grade/bulk", body, {"content-type": content_type})
+    response = conn.getresponse()
+    first = response.read(1)
+    first_byte = time.perf_counter() - start
+    rest = response.read()
+    elapsed = time.perf_counter() - start
+    summary = json.loads((first + rest).rsplit(b"\n", 2)[-2])["summary"]
+    return elapsed, first_byte, summary
+
+
+def single(port, records, clients):
+    latencies, lock = [], threading.Lock()
+
+    def client(chunk):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        samples = []
+        for record in chunk:
+            body = json.dumps(record)
+            start = time.perf_counter()
+            conn.request("POST", "/grade", body, {"content-type": "application/json"})
+            conn.getresponse().read()
+            samples.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=client, args=(records[i::clients],)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def run(records, requests, clients, port, seed):
+    server = start_server(port)
+    try:
+        data = random_records(records, seed)
+        json_body = json.dumps({"records": data}).encode()
+        ndjson_body = "\n".join(json.dumps(record) for record in data).encode()
+        json_s, json_ttfb, json_summary = bulk(port, json_body, "application/json")
+        ndjson_s, ndjson_ttfb, _ = bulk(port, ndjson_body, "application/x-ndjson")
+        single_s, latencies = single(port, random_records(requests, seed + 1), clients)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latency = percentiles(latencies)
+    measured = {
+        "bulk_json_records_per_s": records / json_s,
+        "bulk_ndjson_records_per_s": records / ndjson_s,
+        "single_requests_per_s": requests / single_s,
+        "single_p99_ms": latency["p99_ms"],
+    }
+    return {
+        "version": {"git": git_revision()},
+        "config": {"records": records, "requests": requests, "clients": clients, "seed": seed},
+        "bulk": {
+            "json_s": json_s,
+            "json_first_byte_ms": json_ttfb * 1000,
+            "ndjson_s": ndjson_s,
+            "ndjson_first_byte_ms": ndjson_ttfb * 1000,
+            "summary": json_summary,
+        },
+        "single_latency": latency,
+        "measured": measured,
+        "targets": TARGETS,
+        "missed": sorted(
+            name for name, target in TARGETS.items()
+            if (measured[name] > target if name.endswith("_ms") else measured[name] < target)
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200_000, help="records per bulk request")
+    parser.add_argument("--requests", type=int, default=5_000, help="single /grade requests")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent single-request clients")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "grading_api.json"))
+    args = parser.parse_args(argv)
+
+    results = run(args.records, args.requests, args.clients, args.port, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    measured, bulk_stats = results["measured"], results["bulk"]
+    print(
+        f"bulk JSON {measured['bulk_json_records_per_s']:,.0f} records/s "
+        f"(first byte {bulk_stats['json_first_byte_ms']:.0f} ms), "
+        f"NDJSON {measured['bulk_ndjson_records_per_s']:,.0f} records/s "
+        f"(first byte {bulk_stats['ndjson_first_byte_ms']:.0f} ms); "
+        f"single {measured['single_requests_per_s']:,.0f} req/s, p99 {measured['single_p99_ms']:.1f} ms"
+    )
+    print(f"wrote {args.output}")
+    if results["missed"]:
+        print(f"missed targets: {', '.join(results['missed'])}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Headless load test: N simulated students cycling through full rounds.
+
+Each student is its own ``AppTest`` session driven through
+select_box -> predict -> show_result -> reset. Steps are interleaved, so
+all N sessions are resident and mid-round together; ``--concurrency``
+additionally runs each step on a thread pool, as Streamlit runs every
+browser session on its own script thread. (CPython 3.11's compile() is
+not thread-safe under AppTest, so use --concurrency 1 there.)
+
+    python -m benchmarks.load_test --students 200 --rounds 3
+
+Results are written as JSON (default ``bench_results/load_test.json``) so
+runs can be compared across versions.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Synthetic students log attempts like real ones: keep them out of the
+# real data/ directory. Set before any app module reads paths.DATA_DIR.
+DATA_DIR = tempfile.TemporaryDirectory(prefix="load-test-data-")
+os.environ["CARDIAC_DATA_DIR"] = DATA_DIR.name
+
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+from model import NODE_KEYS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+PREDICTIONS = ("Increase", "Decrease", "No change")
+
+
+# ---------------------------
+# Memory
+# ---------------------------
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.50) * 1000,
+        "p90_ms": pick(0.90) * 1000,
+        "p95_ms": pick(0.95) * 1000,
+        "p99_ms": pick(0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+# ---------------------------
+# Simulated student
+# ---------------------------
+class Student:
+    def __init__(self, seed, timeout):
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.latencies = defaultdict(list)
+        self.failed = False
+
+    def timed(self, step, action):
+        start = time.perf_counter()
+        action()
+        self.latencies[step].append(time.perf_counter() - start)
+        if self.at.exception:
+            raise RuntimeError(f"{step}: {self.at.exception[0].message}")
+
+    def first_paint(self):
+        self.timed("first_paint", self.at.run)
+
+    # One round is split into steps so the driver can interleave sessions:
+    # every student is mid-round at the same time, as in a lecture hall.
+    def select_box(self):
+        at = self.at
+        node = self.rng.choice(NODE_KEYS)
+        key = f"{node}_{self.rng.choice(('inc', 'dec'))}"
+        # A keyed fragment rerun leaves only the rerun regions in the
+        # element tree; a real browser keeps the rest on screen.
+        if not any(button.key == key for button in at.button):
+            self.timed("refresh", at.run)
+        self.timed("select_box", lambda: at.button(key=key).click().run())
+
+    def predict(self):
+        choice = self.rng.choice(PREDICTIONS)
+        self.timed("predict", lambda: self.at.radio(key="prediction_choice").set_value(choice).run())
+
+    def show_result(self):
+        submit = next(b for b in self.at.button if "Submit" in b.label)
+        self.timed("show_result", lambda: submit.click().run())
+
+    def reset(self):
+        at = self.at
+        if not any("new round" in button.label for button in at.button):
+            self.timed("refresh", at.run)
+        reset = next(b for b in at.button if "new round" in b.label)
+        self.timed("reset", lambda: reset.click().run())
+
+
+ROUND_STEPS = ("select_box", "predict", "show_result", "reset")
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(students, rounds, concurrency, seed, timeout):
+    rss_before = current_rss_bytes()
+    sessions = [Student(seed + i, timeout) for i in range(students)]
+    failures = []
+    lock = threading.Lock()
+
+    def step(name):
+        def call(student):
+            if student.failed:
+                return
+            try:
+                getattr(student, name)()
+            except Exception as exc:  # keep the run going; failures are reported
+                student.failed = True
+                with lock:
+                    failures.append(f"{name}: {exc!r}")
+        return call
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(step("first_paint"), sessions))
+        # Every session is now resident; the RSS growth is their footprint.
+        rss_sessions = current_rss_bytes()
+        for _ in range(rounds):
+            for name in ROUND_STEPS:
+                list(pool.map(step(name), sessions))
+    elapsed = time.perf_counter() - started
+
+    by_step = defaultdict(list)
+    for student in sessions:
+        for step, samples in student.latencies.items():
+            by_step[step].extend(samples)
+    everything = [s for samples in by_step.values() for s in samples]
+
+    return {
+        "version": {
+            "git": git_revision(),
+            "streamlit": streamlit.__version__,
+            "python": platform.python_version(),
+        },
+        "config": {
+            "students": students,
+            "rounds": rounds,
+            "concurrency": concurrency,
+            "seed": seed,
+        },
+        "elapsed_s": elapsed,
+        "reruns": len(everything),
+        "reruns_per_s": len(everything) / elapsed if elapsed else None,
+        "latency": percentiles(everything),
+        "latency_by_step": {step: percentiles(samples) for step, samples in sorted(by_step.items())},
+        "peak_rss_mb": peak_rss_bytes() / 2**20,
+        "per_session_kb": max(0, rss_sessions - rss_before) / students / 1024,
+        "failures": failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-rerun AppTest timeout (s)")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "load_test.json"))
+    args = parser.parse_args(argv)
+
+    # AppTest warns once per thread about the missing browser context.
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    results = run(args.students, args.rounds, args.concurrency, args.seed, args.timeout)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    latency = results["latency"]
+    print(
+        f"{results['reruns']} reruns in {results['elapsed_s']:.1f}s "
+        f"({results['reruns_per_s']:.0f}/s); p50 {latency['p50_ms']:.1f} ms, "
+        f"p95 {latency['p95_ms']:.1f} ms, p99 {latency['p99_ms']:.1f} ms; "
+        f"peak RSS {results['peak_rss_mb']:.0f} MB, {results['per_session_kb']:.0f} kB/session"
+    )
+    if results["failures"]:
+        print(f"{len(results['failures'])} sessions failed; first: {results['failures'][0]}", file=sys.stderr)
+        return 1
+    print(f"wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Model evaluation and grading micro-benchmark.
+
+Times vectorized evaluation of all 3^8 = 6561 effect states, scalar
+evaluation, building an outcome table, batched grading lookups and
+``grading_api.grade_chunk``, and exits non-zero if a measurement misses
+``TARGETS``:
+
+    python -m benchmarks.model_speed
+
+The model's invariants are checked by the pytest suite in
+``tests/test_model.py``.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from model import DEFAULT_PARAMS, DIRECTION_LABELS, N_EFFECTS, NODE_KEYS, evaluate
+from outcomes import N_STATES, all_states, build_directions, get_outcome_table
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "evaluate_states_per_s": 2_000_000,
+    "scalar_evaluate_per_s": 20_000,
+    "table_build_ms": 250.0,
+    "grade_lookups_per_s": 20_000_000,
+    "grade_chunk_records_per_s": 100_000,
+}
+
+
+# ---------------------------
+# Micro-benchmark
+# ---------------------------
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark(records, seed):
+    from grading_api import grade_chunk
+
+    rng = np.random.default_rng(seed)
+    states = all_states()
+    table = get_outcome_table(DEFAULT_PARAMS)
+    batch = rng.integers(N_STATES, size=records)
+    nodes = rng.integers(N_EFFECTS, size=records)
+    moves = rng.choice((-1, 1), size=records)
+    predictions = [DIRECTION_LABELS[int(d)] for d in rng.choice((-1, 0, 1), size=5_000)]
+    scalar_states = states[:2_000]
+    chunk = [
+        {"state": int(s), "node": NODE_KEYS[int(n)], "direction": int(d), "prediction": p}
+        for s, n, d, p in zip(batch[:5_000], nodes[:5_000], moves[:5_000], predictions)
+    ]
+
+    evaluate_s = best_of(lambda: evaluate(states))
+    scalar_s = best_of(lambda: [evaluate(effects) for effects in scalar_states], repeat=3)
+    build_s = best_of(build_directions, repeat=3)
+    lookup_s = best_of(lambda: table.lookup_many(batch, nodes, moves))
+    chunk_s = best_of(lambda: grade_chunk(chunk))
+    return {
+        "evaluate_states_per_s": N_STATES / evaluate_s,
+        "scalar_evaluate_per_s": len(scalar_states) / scalar_s,
+        "table_build_ms": build_s * 1000,
+        "grade_lookups_per_s": records / lookup_s,
+        "grade_chunk_records_per_s": len(chunk) / chunk_s,
+    }
+
+
+def missed_targets(measured):
+    return sorted(
+        name for name, target in TARGETS.items()
+        if (measured[name] > target if name.endswith("_ms") else measured[name] < target)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000, help="transitions per batched grading lookup")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "model_speed.json"))
+    args = parser.parse_args(argv)
+
+    measured = benchmark(args.records, args.seed)
+    missed = missed_targets(measured)
+    results = {"config": vars(args), "measured": measured, "targets": TARGETS, "missed": missed}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name, value in measured.items():
+        unit = "" if name.endswith("_ms") else "/s"
+        print(f"{name:<40} {value:>14,.1f}{unit}  (target {TARGETS[name]:,})")
+    print(f"wrote {args.output}")
+    if missed:
+        print(f"missed targets: {', '.join(missed)}", file=sys.stderr)
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
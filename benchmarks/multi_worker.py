@@ -0,0 +1,282 @@
+"""Multi-process harness: sessions resumed across workers via the session store.
+
+Starts ``--workers`` worker processes that share a SQLite session store,
+and a round-robin reverse proxy in front of them, so consecutive steps of
+one student mostly land on different workers. Each step reaches its worker as a
+fresh ``AppTest`` session that carries only the student's ``?sid=`` and
+must pick the round up from the store, as a browser does when it
+reconnects to another worker. The driver checks that every step sees the
+state the previous step left, whichever worker ran it.
+
+    python -m benchmarks.multi_worker --workers 3 --students 4 --rounds 2
+
+The proxy is a stand-in for nginx or a cloud load balancer. It forwards
+plain HTTP requests rather than Streamlit's websocket, which AppTest
+drives in process on each worker.
+"""
+import argparse
+import http.client
+import http.server
+import itertools
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from model import NODE_KEYS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+PREDICTIONS = ("Increase", "Decrease", "No change")
+
+
+# ---------------------------
+# Worker
+# ---------------------------
+def run_step(step):
+    """Resume ``step["sid"]`` in a fresh AppTest session and apply one action."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    if step.get("sid"):
+        at.query_params["sid"] = step["sid"]
+    at.run()
+    s = at.session_state.app_state
+    resumed = {"phase": s.phase, "selected_node": s.selected_node, "state": s.state}
+    action = step["action"]
+    if action == "select":
+        at.button(key=step["key"]).click().run()
+    elif action == "predict":
+        at.radio(key="prediction_choice").set_value(step["prediction"]).run()
+        next(b for b in at.button if "Submit" in b.label).click().run()
+    elif action == "reset":
+        next(b for b in at.button if "new round" in b.label).click().run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    s = at.session_state.app_state
+    return {
+        "sid": s.session_id,
+        "resumed": resumed,
+        "phase": s.phase,
+        "selected_node": s.selected_node,
+        "state": s.state,
+        "last_correct": s.last_correct,
+    }
+
+
+class WorkerHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        step = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        try:
+            result, status = run_step(step), 200
+        except Exception as exc:
+            result, status = {"error": repr(exc)}, 500
+        result["worker"] = self.server.server_address[1]
+        body = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_worker(port):
+    import streamlit.testing.v1  # noqa: F401  (configures logging on import)
+
+    for name in ("streamlit", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    # One request at a time: AppTest is not safe to run concurrently here.
+    http.server.HTTPServer(("127.0.0.1", port), WorkerHandler).serve_forever()
+
+
+# ---------------------------
+# Reverse proxy
+# ---------------------------
+class ProxyHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        port = next(self.server.backends)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        conn.request("POST", self.path, body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        data = response.read()
+        self.send_response(response.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class RoundRobin:
+    """Backend ports in rotation, shared by the proxy's handler threads."""
+
+    def __init__(self, ports):
+        self._ports = itertools.cycle(ports)
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            return next(self._ports)
+
+
+def start_proxy(port, worker_ports):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), ProxyHandler)
+    server.backends = RoundRobin(worker_ports)
+    threading.Thread(target=server.serve_forever, name="proxy", daemon=True).start()
+    return server
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+def post(port, step):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    conn.request("POST", "/step", json.dumps(step), {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    result = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(result.get("error"))
+    return result
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            http.client.HTTPConnection("127.0.0.1", port, timeout=1).connect()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"worker on port {port} did not start")
+
+
+def student(proxy_port, seed, rounds, log):
+    """Play ``rounds`` rounds through the proxy, checking each resume.
+
+    The proxy's rotation is shared by every student, so most but not all
+    consecutive steps of one student move to another worker.
+    """
+    rng = random.Random(seed)
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(f"student {seed}: {message}")
+
+    result = post(proxy_port, {"sid": None, "action": "load"})
+    sid, last = result["sid"], result
+    for _ in range(rounds):
+        node = rng.choice(NODE_KEYS)
+        for step in (
+            {"action": "select", "key": f"{node}_{rng.choice(('inc', 'dec'))}"},
+            {"action": "predict", "prediction": rng.choice(PREDICTIONS)},
+            {"action": "reset"},
+        ):
+            result = post(proxy_port, {"sid": sid, **step})
+            log.append(result)
+            result["moved"] = result["worker"] != last["worker"]
+            check(
+                (result["resumed"]["phase"], result["resumed"]["state"], result["resumed"]["selected_node"])
+                == (last["phase"], last["state"], last["selected_node"]),
+                f"{step['action']} on worker {result['worker']} resumed {result['resumed']}, expected "
+                f"{last['phase']}/{last['state']}/{last['selected_node']} from worker {last['worker']}",
+            )
+            expected = {"select": "predict", "predict": "show_result", "reset": "select_box"}[step["action"]]
+            check(result["phase"] == expected, f"{step['action']} ended in {result['phase']}")
+            last = result
+    return failures
+
+
+def run(workers, students, rounds, base_port, seed):
+    data_dir = tempfile.mkdtemp(prefix="cardiac-workers-")
+    env = dict(os.environ, CARDIAC_SESSION_STORE="sqlite", CARDIAC_DATA_DIR=data_dir)
+    worker_ports = [base_port + 1 + i for i in range(workers)]
+    procs = []
+    try:
+        for port in worker_ports:
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.multi_worker", "--serve-worker", str(port)], cwd=ROOT, env=env
+            ))
+        for port in worker_ports:
+            wait_for(port)
+        proxy = start_proxy(base_port, worker_ports)
+        log, failures, lock = [], [], threading.Lock()
+
+        def play(i):
+            student_failures = student(base_port, seed + i, rounds, log)
+            with lock:
+                failures.extend(student_failures)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=play, args=(i,)) for i in range(students)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        proxy.shutdown()
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return {
+        "workers": workers,
+        "students": students,
+        "rounds": rounds,
+        "steps": len(log),
+        "elapsed_s": elapsed,
+        "steps_by_worker": {str(port): sum(1 for r in log if r["worker"] == port) for port in worker_ports},
+        "moved_steps": sum(1 for r in log if r["moved"]),
+        "failures": failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--students", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8610, help="proxy port; workers take the next ports")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "multi_worker.json"))
+    parser.add_argument("--serve-worker", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve_worker:
+        serve_worker(args.serve_worker)
+        return 0
+
+    results = run(args.workers, args.students, args.rounds, args.port, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(
+        f"{results['steps']} steps over {results['workers']} workers in {results['elapsed_s']:.1f}s; "
+        f"by worker {results['steps_by_worker']}; {results['moved_steps']} resumed on another worker"
+    )
+    if results["failures"]:
+        print(f"{len(results['failures'])} failed checks; first: {results['failures'][0]}", file=sys.stderr)
+        return 1
+    print("every step resumed the round where the previous step left it")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Bytes sent to the browser per interaction: inline vs linked stylesheet.
+
+Drives one ``AppTest`` session through full predict/reveal rounds and
+counts the serialized delta bytes each interaction sends (the same count
+as the app's measurement mode), in two configurations:
+
+- "inline": ``server.enableStaticServing`` off, so every run sends the
+  whole stylesheet in a ``<style>`` block;
+- "linked": static serving on, so every run sends a ``<link>`` to the
+  content-hashed ``app/static/app.css`` and the browser fetches it once.
+
+``--rev`` also measures ``app.py`` as of an earlier git revision (with
+the current supporting modules), e.g. the last commit before the
+stylesheet moved out of the script:
+
+    python -m benchmarks.page_bytes --rounds 3 --rev HEAD~1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+# Synthetic students log attempts like real ones: keep them out of the
+# real data/ directory. Set before any app module reads paths.DATA_DIR.
+DATA_DIR = tempfile.TemporaryDirectory(prefix="page-bytes-data-")
+os.environ["CARDIAC_DATA_DIR"] = DATA_DIR.name
+
+from streamlit import config
+from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+from streamlit.testing.v1 import AppTest
+
+from model import NODE_KEYS
+from paths import CACHE_DIR
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+PREDICTIONS = ("Increase", "Decrease", "No change")
+STEPS = ("first_paint", "select_box", "predict", "show_result", "reset")
+
+
+# ---------------------------
+# Counting
+# ---------------------------
+class ByteCounter:
+    """Counts delta bytes enqueued by any script run in this process."""
+
+    def __init__(self):
+        self.bytes = 0
+        self._enqueue = ScriptRunContext.enqueue
+        counter = self
+
+        def counting_enqueue(ctx, msg):
+            if msg.WhichOneof("type") == "delta":
+                counter.bytes += msg.ByteSize()
+            counter._enqueue(ctx, msg)
+
+        ScriptRunContext.enqueue = counting_enqueue
+
+    def measure(self, action):
+        before = self.bytes
+        action()
+        return self.bytes - before
+
+
+def play(app_path, rounds, seed, counter):
+    rng = random.Random(seed)
+    at = AppTest.from_file(app_path, default_timeout=30)
+    sent = defaultdict(list)
+
+    def step(name, action):
+        sent[name].append(counter.measure(action))
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+    step("first_paint", at.run)
+    for _ in range(rounds):
+        key = f"{rng.choice(NODE_KEYS)}_{rng.choice(('inc', 'dec'))}"
+        # Keyed fragment reruns leave a partial tree; a browser keeps the rest.
+        if not any(button.key == key for button in at.button):
+            at.run()
+        step("select_box", lambda: at.button(key=key).click().run())
+        step("predict", lambda: at.radio(key="prediction_choice").set_value(rng.choice(PREDICTIONS)).run())
+        step("show_result", lambda: next(b for b in at.button if "Submit" in b.label).click().run())
+        if not any("new round" in button.label for button in at.button):
+            at.run()
+        step("reset", lambda: next(b for b in at.button if "new round" in b.label).click().run())
+    return {name: sum(values) / len(values) for name, values in sent.items()}
+
+
+def revision_app(rev):
+    """Write ``app.py`` as of ``rev`` next to the current modules."""
+    source = subprocess.run(
+        ["git", "show", f"{rev}:app.py"], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, "page_bytes_app.py")
+    with open(path, "w") as f:
+        f.write(source)
+    return path
+
+
+def run(rounds, seed, rev=None):
+    counter = ByteCounter()
+    configs = [("inline", APP_PATH, False), ("linked", APP_PATH, True)]
+    if rev:
+        configs.insert(0, (rev, revision_app(rev), False))
+    results = {}
+    for name, app_path, static in configs:
+        config.set_option("server.enableStaticServing", static)
+        per_step = play(app_path, rounds, seed, counter)
+        results[name] = {"bytes_per_step": per_step, "mean_bytes": sum(per_step.values()) / len(per_step)}
+    return {"config": {"rounds": rounds, "seed": seed, "rev": rev}, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rev", help="also measure app.py as of this git revision")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "page_bytes.json"))
+    args = parser.parse_args(argv)
+
+    for name in ("streamlit", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    results = run(args.rounds, args.seed, args.rev)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'':<12}" + "".join(f"{step:>13}" for step in STEPS) + f"{'mean':>13}")
+    for name, r in results["results"].items():
+        row = "".join(f"{r['bytes_per_step'][step]:>13,.0f}" for step in STEPS)
+        print(f"{name:<12}{row}{r['mean_bytes']:>13,.0f}")
+    print(f"wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Practice scheduler: decision latency and how hard it drills weak spots.
+
+- latency: one scheduling decision (``next`` then ``record``) for the 16
+  node items and for every multi-step scenario item, i.e. each of the
+  6561 effect states x 8 nodes x 2 directions. Reports the p50/p99
+  decision time and the heap size, which compaction keeps bounded.
+- focus: a simulated student who always misses ``--weak`` items and gets
+  the rest right ``--accuracy`` of the time answers ``--questions``
+  practice questions. Reports the share of questions spent on the weak
+  items, against their share under picking at random.
+
+Exits non-zero if a measurement misses ``TARGETS``:
+
+    python -m benchmarks.practice
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from outcomes import N_STATES
+from practice import NODE_ITEMS, Scheduler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "node_decision_p99_ms": 1.0,
+    "scenario_decision_p99_ms": 1.0,
+    # Weak items' share of practice over their share at random.
+    "focus_ratio": 2.0,
+}
+
+
+def percentile(values, q):
+    return sorted(values)[min(len(values) - 1, int(q * len(values)))]
+
+
+# ---------------------------
+# Measurements
+# ---------------------------
+def latency(items, decisions, accuracy, seed):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    scheduler = Scheduler(items, seed=seed)
+    build_s = time.perf_counter() - start
+    times, last, peak_heap = [], None, 0
+    for _ in range(decisions):
+        start = time.perf_counter()
+        last = scheduler.next(avoid=last)
+        scheduler.record(last, rng.random() < accuracy)
+        times.append(time.perf_counter() - start)
+        peak_heap = max(peak_heap, len(scheduler._heap))
+    return {
+        "items": len(scheduler),
+        "build_ms": build_s * 1000,
+        "decision_p50_ms": percentile(times, 0.5) * 1000,
+        "decision_p99_ms": percentile(times, 0.99) * 1000,
+        "peak_heap": peak_heap,
+    }
+
+
+def focus(questions, weak, accuracy, seed):
+    rng = random.Random(seed)
+    weak_items = set(rng.sample(NODE_ITEMS, weak))
+    scheduler = Scheduler(seed=seed)
+    asked, last = 0, None
+    for _ in range(questions):
+        last = scheduler.next(avoid=last)
+        asked += last in weak_items
+        scheduler.record(last, last not in weak_items and rng.random() < accuracy)
+    share = asked / questions
+    return {"weak_share": share, "random_share": weak / len(NODE_ITEMS), "focus_ratio": share / (weak / len(NODE_ITEMS))}
+
+
+def scenario_items():
+    return [(state, node, direction) for state in range(N_STATES) for node, direction in NODE_ITEMS]
+
+
+def missed_targets(measured):
+    return sorted(
+        name for name, target in TARGETS.items()
+        if (measured[name] > target if name.endswith("_ms") else measured[name] < target)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--decisions", type=int, default=20_000)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--weak", type=int, default=3, help="items the simulated student always misses")
+    parser.add_argument("--accuracy", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "practice.json"))
+    args = parser.parse_args(argv)
+
+    results = {
+        "config": vars(args),
+        "nodes": latency(NODE_ITEMS, args.decisions, args.accuracy, args.seed),
+        "scenarios": latency(scenario_items(), args.decisions, args.accuracy, args.seed),
+        "focus": focus(args.questions, args.weak, args.accuracy, args.seed),
+    }
+    measured = {
+        "node_decision_p99_ms": results["nodes"]["decision_p99_ms"],
+        "scenario_decision_p99_ms": results["scenarios"]["decision_p99_ms"],
+        "focus_ratio": results["focus"]["focus_ratio"],
+    }
+    missed = missed_targets(measured)
+    results.update(measured=measured, targets=TARGETS, missed=missed)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name in ("nodes", "scenarios"):
+        r = results[name]
+        print(f"{name:<10} {r['items']:>7,} items  build {r['build_ms']:7.1f} ms  decision p50 {r['decision_p50_ms'] * 1000:.1f} us"
+              f"  p99 {r['decision_p99_ms'] * 1000:.1f} us  peak heap {r['peak_heap']:,}")
+    f = results["focus"]
+    print(f"focus      {f['weak_share']:.0%} of questions on {args.weak} weak items (random: {f['random_share']:.0%}),"
+          f" {f['focus_ratio']:.1f}x")
+    print(f"wrote {args.output}")
+    if missed:
+        print(f"missed targets: {', '.join(missed)}", file=sys.stderr)
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
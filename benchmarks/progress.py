@@ -0,0 +1,191 @@
+"""Student progress snapshots: size, restore time and write coalescing.
+
+Fills a fresh ``progress.db`` with ``--students`` snapshots, each with a
+cumulative history of ``--steps`` steps and ``--attempts`` attempts, then
+measures:
+
+- snapshot size and ``dump`` time;
+- restore: ``ProgressStore.load`` plus ``progress.restore`` for random
+  students from a freshly opened store, i.e. what a refresh or a server
+  restart adds to the first rerun;
+- coalescing: ``--clickers`` students click ``--clicks`` times each,
+  ``--interval`` seconds apart. Reports how many commits (and so fsyncs)
+  the saves cost, and the slowest ``save`` call.
+
+Exits non-zero if a measurement misses ``TARGETS``:
+
+    python -m benchmarks.progress --students 2000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import progress
+from dag import CardiacDag, History
+from model import DIRECTION_LABELS, NODE_KEYS
+from profiles import load_profiles
+from progress import ProgressStore
+from session import SessionState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "restore_p99_ms": 3.0,
+    "save_max_ms": 1.0,
+    "commits_per_save": 0.1,
+}
+
+
+def student_session(rng, profiles, steps, attempts):
+    """A session part-way through a cumulative run, with an attempt history."""
+    profile = rng.choice(list(profiles))
+    s = SessionState("bench", profile=profile)
+    s.cumulative = True
+    s.history = History(CardiacDag(profiles[profile].params))
+    for _ in range(steps):
+        node, direction = rng.choice(NODE_KEYS), rng.choice((-1, 1))
+        s.history.apply(node, direction)
+        s.set_effect(node, direction)
+    s.phase, s.selected_node, s.pending_direction = "predict", rng.choice(NODE_KEYS), 1
+    labels = list(DIRECTION_LABELS.values())
+    for _ in range(attempts):
+        progress.record_attempt(s, rng.choice(NODE_KEYS), rng.choice((-1, 1)), rng.choice(labels), rng.choice(labels))
+    return s
+
+
+def percentile(values, q):
+    return sorted(values)[min(len(values) - 1, int(q * len(values)))]
+
+
+# ---------------------------
+# Measurements
+# ---------------------------
+def fill(path, students, steps, attempts, seed):
+    rng = random.Random(seed)
+    profiles = load_profiles()
+    store = ProgressStore(path, delay=0.0)
+    sizes, dump_s = [], []
+    for i in range(students):
+        s = student_session(rng, profiles, steps, attempts)
+        start = time.perf_counter()
+        snapshot = progress.dump(s)
+        dump_s.append(time.perf_counter() - start)
+        sizes.append(len(snapshot))
+        store.save(f"student-{i}", snapshot)
+    store.flush()
+    store.close()
+    return {
+        "snapshot_bytes": statistics.mean(sizes),
+        "dump_us": statistics.mean(dump_s) * 1e6,
+    }
+
+
+def restores(path, students, samples, seed):
+    rng = random.Random(seed)
+    profiles = load_profiles()
+    store = ProgressStore(path)
+    times = []
+    for _ in range(samples):
+        s = SessionState("bench")
+        student_id = f"student-{rng.randrange(students)}"
+        start = time.perf_counter()
+        restored = progress.restore(s, store.load(student_id), profiles)
+        times.append(time.perf_counter() - start)
+        assert restored, student_id
+    store.close()
+    return {
+        "restore_p50_ms": percentile(times, 0.5) * 1000,
+        "restore_p99_ms": percentile(times, 0.99) * 1000,
+    }
+
+
+def coalescing(path, clickers, clicks, interval, delay, seed):
+    rng = random.Random(seed)
+    profiles = load_profiles()
+    sessions = [student_session(rng, profiles, 5, 20) for _ in range(clickers)]
+    store = ProgressStore(path, delay=delay)
+    slowest = [0.0] * clickers
+
+    def clicker(i):
+        s, worst = sessions[i], 0.0
+        for j in range(clicks):
+            progress.record_attempt(s, NODE_KEYS[j % len(NODE_KEYS)], 1, "Increase", "Decrease")
+            snapshot = progress.dump(s)
+            start = time.perf_counter()
+            store.save(f"clicker-{i}", snapshot)
+            worst = max(worst, time.perf_counter() - start)
+            time.sleep(interval)
+        slowest[i] = worst
+
+    threads = [threading.Thread(target=clicker, args=(i,)) for i in range(clickers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+    store.close()
+    return {
+        "saves": store.saves,
+        "commits": store.commits,
+        "commits_per_save": store.commits / store.saves,
+        "save_max_ms": max(slowest) * 1000,
+    }
+
+
+def missed_targets(measured):
+    return sorted(
+        name for name, target in TARGETS.items()
+        if (measured[name] > target if name.endswith(("_ms", "_per_save")) else measured[name] < target)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=20, help="cumulative history steps per student")
+    parser.add_argument("--attempts", type=int, default=200, help="attempts per student")
+    parser.add_argument("--samples", type=int, default=1000, help="restores to time")
+    parser.add_argument("--clickers", type=int, default=20)
+    parser.add_argument("--clicks", type=int, default=30)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between one student's clicks")
+    parser.add_argument("--delay", type=float, default=0.5, help="writer debounce delay in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "progress.json"))
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="progress-bench-")
+    try:
+        path = os.path.join(workdir, "progress.db")
+        measured = {
+            **fill(path, args.students, args.steps, args.attempts, args.seed),
+            **restores(path, args.students, args.samples, args.seed),
+            **coalescing(path, args.clickers, args.clicks, args.interval, args.delay, args.seed),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    missed = missed_targets(measured)
+    results = {"config": vars(args), "measured": measured, "targets": TARGETS, "missed": missed}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    m = measured
+    print(f"snapshot {m['snapshot_bytes']:,.0f} bytes, dump {m['dump_us']:.1f} us")
+    print(f"restore  p50 {m['restore_p50_ms']:.3f} ms, p99 {m['restore_p99_ms']:.3f} ms (target {TARGETS['restore_p99_ms']})")
+    print(f"writes   {m['saves']:,} saves -> {m['commits']:,} commits ({m['commits_per_save']:.3f} per save), "
+          f"slowest save {m['save_max_ms']:.3f} ms")
+    print(f"wrote {args.output}")
+    if missed:
+        print(f"missed targets: {', '.join(missed)}", file=sys.stderr)
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Memory per session: loose session-state keys vs the slotted SessionState.
+
+Builds ``--sessions`` Streamlit ``SessionState`` objects each way, as
+they look after one submitted round, and measures their traced
+allocations:
+
+- "loose": one key per field, as ``app.py`` kept it before
+  ``session.SessionState``. That is the defaults dict (the eight effects
+  as separate ints), the session id, and an undo history that every
+  session built.
+- "slotted": a single ``SessionState`` under one key, with the effects
+  packed into the outcome-table index and no history outside cumulative
+  mode.
+
+    python -m benchmarks.session_memory --sessions 5000 --budget-mb 1024
+
+This isolates the state itself. Streamlit's own per-session overhead
+(websocket, message cache) is in ``benchmarks.load_test``'s
+``per_session_kb``.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tracemalloc
+import uuid
+
+from streamlit.runtime.state.session_state import SessionState as StreamlitSessionState
+
+from dag import CardiacDag, History
+from model import EFFECT_KEYS, ModelParams
+from session import SessionState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ---------------------------
+# Representations
+# ---------------------------
+def loose_session():
+    state = StreamlitSessionState()
+    defaults = {
+        "hr_baseline": 70.0,
+        "sv_baseline": 70.0,
+        **{key: 0 for key in EFFECT_KEYS},
+        "phase": "select_box",
+        "selected_node": None,
+        "pending_direction": None,
+        "prediction": None,
+        "last_feedback": None,
+        "last_correct": None,
+        "graph_version": 0,
+        "cumulative": False,
+        "scenario": False,
+        "simulate": False,
+        "explain": False,
+        "challenge_tier": "Easy",
+    }
+    for key, value in defaults.items():
+        state[key] = value
+    state["session_id"] = uuid.uuid4().hex
+    # One submitted round: afterload increased, result showing.
+    history = History(CardiacDag(ModelParams(), [state[key] for key in EFFECT_KEYS]))
+    history.apply("afterload", 1)
+    state["history"] = history
+    state["afterload_effect"] = 1
+    state["selected_node"] = "afterload"
+    state["pending_direction"] = 1
+    state["prediction"] = "Decrease"
+    state["last_feedback"] = "Decrease"
+    state["last_correct"] = True
+    state["graph_version"] = 1
+    state["phase"] = "show_result"
+    return state
+
+
+def slotted_session():
+    state = StreamlitSessionState()
+    s = SessionState(uuid.uuid4().hex, "Easy")
+    s.previous_state = s.state
+    s.set_effect("afterload", 1)
+    s.selected_node = "afterload"
+    s.pending_direction = 1
+    s.prediction = "Decrease"
+    s.last_feedback = "Decrease"
+    s.last_correct = True
+    s.graph_version = 1
+    s.phase = "show_result"
+    s.values()
+    state["app_state"] = s
+    return state
+
+
+def bytes_per_session(factory, sessions):
+    # Warm shared caches (interned strings, the state-values cache) first.
+    factory()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [factory() for _ in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used / sessions
+
+
+def run(sessions, budget_mb):
+    budget = budget_mb * 2**20
+    results = {}
+    for name, factory in (("loose", loose_session), ("slotted", slotted_session)):
+        size = bytes_per_session(factory, sessions)
+        results[name] = {"bytes_per_session": size, "sessions_in_budget": int(budget // size)}
+    results["reduction"] = 1 - results["slotted"]["bytes_per_session"] / results["loose"]["bytes_per_session"]
+    return {"config": {"sessions": sessions, "budget_mb": budget_mb}, **results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5_000)
+    parser.add_argument("--budget-mb", type=int, default=1024, help="RAM set aside for session state")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "session_memory.json"))
+    args = parser.parse_args(argv)
+
+    # SessionState warns about the missing script context outside a run.
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    results = run(args.sessions, args.budget_mb)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name in ("loose", "slotted"):
+        r = results[name]
+        print(f"{name:<8} {r['bytes_per_session'] / 1024:6.2f} kB/session, {r['sessions_in_budget']:>9,} sessions in {args.budget_mb} MB")
+    print(f"{results['reduction']:.0%} less memory per session; wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
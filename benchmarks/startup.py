@@ -0,0 +1,151 @@
+"""Startup time: cold process start and each new student's first render.
+
+Each of ``--repeat`` fresh processes imports Streamlit and runs
+``--sessions + 1`` new ``AppTest`` sessions against an empty data
+directory, timing the script run (``exec`` of ``app.py``) of each one.
+The processes share one script bytecode cache per process, as a served
+app's ``Runtime`` does. Reported:
+
+- cold start: process spawn until the first session's script run ends;
+- cold first render: that first script run alone (compiling ``app.py``,
+  creating the process-wide resources, loading outcome tables);
+- first render: the median script run of each later new session in the
+  warm process, i.e. the time to first paint per new student.
+
+``--rev`` also measures the tree as of an earlier git revision, for a
+before/after comparison:
+
+    python -m benchmarks.startup --rev HEAD~1
+
+Exits non-zero if the current tree misses ``TARGETS``.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from paths import CACHE_DIR
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Gates for regressions, not for the measured numbers: each sits well
+# above the slowest run seen so far (0.8 s cold start, 23 ms first
+# render), so machine-to-machine noise does not trip them.
+TARGETS = {
+    "cold_start_s": 2.0,
+    "first_render_ms": 40.0,
+}
+
+# Runs in each measured process, from the root of the tree under test.
+CHILD = r"""
+import json, logging, sys, time
+spawned, sessions = float(sys.argv[1]), int(sys.argv[2])
+logging.disable(logging.WARNING)
+from streamlit.runtime.scriptrunner import script_runner
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test
+
+shared = ScriptCache()
+app_test.ScriptCache = lambda: shared
+runs, run_script = [], script_runner.exec_func_with_error_handling
+
+def timed(func, ctx):
+    start = time.perf_counter()
+    try:
+        return run_script(func, ctx)
+    finally:
+        runs.append(time.perf_counter() - start)
+
+script_runner.exec_func_with_error_handling = timed
+cold_start = None
+for _ in range(sessions + 1):
+    at = AppTest.from_file("app.py", default_timeout=60).run()
+    if at.exception:
+        sys.exit(at.exception[0].message)
+    if cold_start is None:
+        cold_start = time.time() - spawned
+print(json.dumps({"cold_start_s": cold_start, "runs": runs}))
+"""
+
+
+def tree_at(rev, workdir):
+    """Extract ``rev`` into ``workdir``, with the current outcome table cache."""
+    path = os.path.join(workdir, "tree")
+    os.makedirs(path)
+    archive = subprocess.run(["git", "archive", rev], cwd=ROOT, capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", path], input=archive, check=True)
+    if os.path.isdir(CACHE_DIR):
+        shutil.copytree(CACHE_DIR, os.path.join(path, ".cache"))
+    return path
+
+
+def measure(tree, repeat, sessions):
+    cold, first, renders = [], [], []
+    for _ in range(repeat):
+        data_dir = tempfile.mkdtemp(prefix="startup-data-")
+        try:
+            env = {**os.environ, "CARDIAC_DATA_DIR": data_dir, "PYTHONPATH": tree}
+            out = subprocess.run(
+                [sys.executable, "-c", CHILD, repr(time.time()), str(sessions)],
+                cwd=tree, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        result = json.loads(out.strip().splitlines()[-1])
+        cold.append(result["cold_start_s"])
+        first.append(result["runs"][0])
+        renders.extend(result["runs"][1:])
+    return {
+        "cold_start_s": statistics.median(cold),
+        "cold_first_render_ms": statistics.median(first) * 1000,
+        "first_render_ms": statistics.median(renders) * 1000,
+        "first_render_p90_ms": sorted(renders)[int(0.9 * (len(renders) - 1))] * 1000,
+    }
+
+
+def missed_targets(measured):
+    return sorted(name for name, target in TARGETS.items() if measured[name] > target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--sessions", type=int, default=20, help="new sessions per process after the first")
+    parser.add_argument("--rev", help="also measure the tree as of this git revision")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_results", "startup.json"))
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.rev:
+        workdir = tempfile.mkdtemp(prefix="startup-rev-")
+        try:
+            results[args.rev] = measure(tree_at(args.rev, workdir), args.repeat, args.sessions)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    results["current"] = current = measure(ROOT, args.repeat, args.sessions)
+    missed = missed_targets(current)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"config": vars(args), "results": results, "targets": TARGETS, "missed": missed}, f, indent=2)
+
+    print(f"{'':<12}{'cold start':>12}{'cold render':>14}{'first render':>15}{'p90':>10}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['cold_start_s']:>11.2f}s{r['cold_first_render_ms']:>12.1f}ms"
+              f"{r['first_render_ms']:>13.1f}ms{r['first_render_p90_ms']:>8.1f}ms")
+    if args.rev:
+        before = results[args.rev]
+        for name in ("cold_start_s", "cold_first_render_ms", "first_render_ms"):
+            print(f"{name}: {1 - current[name] / before[name]:.0%} less than {args.rev}")
+    print(f"wrote {args.output}")
+    if missed:
+        print(f"missed targets: {', '.join(missed)}", file=sys.stderr)
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
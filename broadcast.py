@@ -0,0 +1,170 @@
+"""Instructor broadcasts: one question pushed live to every connected student.
+
+``Channel`` is a process-wide publish/subscribe channel (one instance via
+``resources.broadcast_channel``). The instructor publishes a node, a
+direction and a prompt; each subscribed student session is asked to
+rerun once, and on that rerun it picks the broadcast up and opens the
+prediction dialog. Sessions do not poll: a session that is not rerun by
+a push sees the broadcast on its next interaction.
+
+Answers to the live broadcast are counted in a ``StripedCounter``, so
+a lecture hall submitting at once does not queue on a single lock.
+"""
+import itertools
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple
+
+DEFAULT_PROMPT = "Predict now: what happens to cardiac output?"
+
+
+class Broadcast(NamedTuple):
+    id: int
+    node: str
+    direction: int
+    prompt: str
+    started: float
+
+
+# ---------------------------
+# Counters
+# ---------------------------
+class StripedCounter:
+    """A Counter split over independently locked stripes.
+
+    Each thread is assigned one stripe the first time it counts, so
+    Streamlit's per-session script threads mostly take different locks;
+    reads sum the stripes.
+    """
+
+    def __init__(self, stripes=16):
+        self._stripes = [(threading.Lock(), Counter()) for _ in range(stripes)]
+        self._assign = itertools.count()
+        self._local = threading.local()
+
+    def _stripe(self):
+        index = getattr(self._local, "stripe", None)
+        if index is None:
+            index = self._local.stripe = next(self._assign) % len(self._stripes)
+        return self._stripes[index]
+
+    def add(self, key, count=1):
+        lock, counter = self._stripe()
+        with lock:
+            counter[key] += count
+
+    def totals(self):
+        total = Counter()
+        for lock, counter in self._stripes:
+            with lock:
+                total.update(counter)
+        return total
+
+
+# ---------------------------
+# Channel
+# ---------------------------
+class Channel:
+    def __init__(self, stripes=16):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._stripes = stripes
+        self._subscribers = {}
+        # The live broadcast and its answers, swapped together in one assignment.
+        self._live = (None, StripedCounter(stripes))
+
+    @property
+    def current(self):
+        return self._live[0]
+
+    def subscribe(self, key, callback, alive=None):
+        """Call ``callback(key)`` on each publish; it returns False to unsubscribe.
+
+        ``alive(key)``, if given, is asked whenever subscribers are counted,
+        so sessions that have gone drop out between publishes too.
+        """
+        with self._lock:
+            self._subscribers[key] = (callback, alive)
+
+    def unsubscribe(self, key):
+        with self._lock:
+            self._subscribers.pop(key, None)
+
+    @property
+    def subscribers(self):
+        """Number of subscribers still alive, dropping the ones that are not."""
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        self._drop([key for key, (_, alive) in subscribers if alive is not None and not alive(key)])
+        return len(self._subscribers)
+
+    def publish(self, node, direction, prompt=DEFAULT_PROMPT):
+        """Make ``node``/``direction`` the live question and notify every subscriber."""
+        with self._lock:
+            broadcast = Broadcast(next(self._ids), node, direction, prompt or DEFAULT_PROMPT, time.time())
+            self._live = (broadcast, StripedCounter(self._stripes))
+            subscribers = list(self._subscribers.items())
+        self._notify(subscribers)
+        return broadcast
+
+    def end(self):
+        self._live = (None, StripedCounter(self._stripes))
+
+    def _notify(self, subscribers):
+        # Outside the lock: callbacks may subscribe or take their own locks.
+        self._drop([key for key, (callback, _) in subscribers if callback(key) is False])
+
+    def _drop(self, keys):
+        if keys:
+            with self._lock:
+                for key in keys:
+                    self._subscribers.pop(key, None)
+
+    def record(self, broadcast_id, prediction, correct):
+        """Count one answer, if it answers the broadcast that is still live."""
+        current, answers = self._live
+        if current is None or current.id != broadcast_id:
+            return False
+        answers.add((prediction, bool(correct)))
+        return True
+
+    def results(self):
+        """(broadcast, {(prediction, correct): count}) for the live broadcast."""
+        current, answers = self._live
+        return current, (answers.totals() if current else Counter())
+
+
+# ---------------------------
+# Streamlit sessions
+# ---------------------------
+def active_session(session_id):
+    """Streamlit's running ``AppSession`` for ``session_id``, or None once it has gone.
+
+    Streamlit has no public lookup, so this is the one place that reads
+    the runtime's private session manager. Without one (outside a served
+    app, e.g. under AppTest, or if a Streamlit release moves it) every
+    session counts as gone.
+    """
+    from streamlit.runtime import Runtime
+
+    session_mgr = getattr(Runtime.instance(), "_session_mgr", None) if Runtime.exists() else None
+    get_info = getattr(session_mgr, "get_active_session_info", None)
+    info = get_info(session_id) if get_info is not None else None
+    return info.session if info is not None else None
+
+
+def session_alive(session_id):
+    return active_session(session_id) is not None
+
+
+def rerun_session(session_id):
+    """Ask Streamlit to rerun one browser session; False once it has gone.
+
+    Streamlit's own file watcher requests reruns from its thread the same way.
+    """
+    session = active_session(session_id)
+    if session is None:
+        return False
+    session.request_rerun(None)
+    return True
@@ -0,0 +1,177 @@
+"""Materialized class-wide error counters for the instructor dashboard.
+
+``ClassStats`` subscribes to the attempt logger and folds each committed
+batch into counters keyed by (node, direction), so refreshing the
+dashboard never rescans the attempt history. The all-time counters are
+seeded from the database once per process with a single aggregate query.
+Rollups are kept for three windows: the last ten minutes (per-minute
+buckets), this server session, and all time.
+"""
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+
+WINDOWS = ("Last 10 minutes", "This session", "All time")
+GROUPINGS = ("node", "direction", "node_direction")
+RECENT_SECONDS = 600
+BUCKET_SECONDS = 60
+
+
+class Tally:
+    __slots__ = ("attempts", "errors", "wrong")
+
+    def __init__(self):
+        self.attempts = 0
+        self.errors = 0
+        # Wrong prediction -> count, to find the most common misconception.
+        self.wrong = Counter()
+
+    def add(self, correct, prediction, count=1):
+        self.attempts += count
+        if not correct:
+            self.errors += count
+            self.wrong[prediction] += count
+
+    def merge(self, other):
+        self.attempts += other.attempts
+        self.errors += other.errors
+        self.wrong.update(other.wrong)
+
+
+def add_to(tallies, key, correct, prediction, count=1):
+    tally = tallies.get(key)
+    if tally is None:
+        tally = tallies[key] = Tally()
+    tally.add(correct, prediction, count)
+
+
+class ClassStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._all_time = {}
+        self._session = {}
+        # (bucket start, {(node, direction): Tally}), oldest first.
+        self._buckets = deque()
+        self._seen_id = 0
+        # Batches that arrive before seed() finishes, replayed by seed().
+        self._pending = []
+        self._version = 0
+        self._cache = {}
+
+    @property
+    def seeded(self):
+        return self._pending is None
+
+    def seed(self, db_path):
+        """Load all-time counters with one GROUP BY over the attempts table.
+
+        Counting starts once this has run; batches added before then are
+        held and replayed unless the aggregate already covered them.
+        """
+        try:
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        except sqlite3.OperationalError:
+            self._finish_seed()
+            return
+        try:
+            # The aggregate runs without the lock, so it blocks neither the
+            # logger's batches (held in _pending until seeding finishes) nor
+            # dashboard snapshots. One read transaction keeps max(id) and
+            # the aggregate consistent.
+            conn.execute("BEGIN")
+            (last_id,) = conn.execute("SELECT coalesce(max(id), 0) FROM attempts").fetchone()
+            rows = conn.execute(
+                "SELECT node, direction, correct, prediction, count(*) FROM attempts"
+                " WHERE id <= ? GROUP BY node, direction, correct, prediction",
+                (last_id,),
+            ).fetchall()
+            with self._lock:
+                for node, direction, correct, prediction, count in rows:
+                    add_to(self._all_time, (node, direction), correct, prediction, count)
+                self._seen_id = last_id
+        except sqlite3.OperationalError:
+            # No attempts table yet: nothing has been logged.
+            pass
+        finally:
+            conn.close()
+            self._finish_seed()
+
+    def _finish_seed(self):
+        with self._lock:
+            pending, self._pending = self._pending or [], None
+        for events, last_id in pending:
+            self.add(events, last_id)
+        with self._lock:
+            self._version += 1
+
+    def add(self, events, last_id=None):
+        """Attempt-logger subscriber: fold one committed batch into the counters."""
+        now = time.time()
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((events, last_id))
+                return
+            if last_id is not None and last_id <= self._seen_id:
+                # Already counted by seed().
+                return
+            bucket_start = now - now % BUCKET_SECONDS
+            if not self._buckets or self._buckets[-1][0] != bucket_start:
+                self._buckets.append((bucket_start, {}))
+            bucket = self._buckets[-1][1]
+            for event in events:
+                key = (event.node, event.direction)
+                for tallies in (self._all_time, self._session, bucket):
+                    add_to(tallies, key, event.correct, event.prediction)
+            self._expire(now)
+            self._version += 1
+
+    def _expire(self, now):
+        while self._buckets and self._buckets[0][0] <= now - RECENT_SECONDS - BUCKET_SECONDS:
+            self._buckets.popleft()
+
+    # ---------------------------
+    # Aggregates
+    # ---------------------------
+    def _window(self, window, now):
+        all_time, session = WINDOWS[2], WINDOWS[1]
+        if window == all_time:
+            return self._all_time
+        if window == session:
+            return self._session
+        merged = {}
+        for start, bucket in self._buckets:
+            if start > now - RECENT_SECONDS - BUCKET_SECONDS:
+                for key, tally in bucket.items():
+                    merged.setdefault(key, Tally()).merge(tally)
+        return merged
+
+    def snapshot(self, window, group="node_direction"):
+        """Rows for ``window`` grouped by node, direction or both; cached until the counters change."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            # The recent window also moves with the clock, once per bucket.
+            cache_key = (self._version, now // BUCKET_SECONDS if window == WINDOWS[0] else None)
+            cached = self._cache.get((window, group))
+            if cached is not None and cached[0] == cache_key:
+                return cached[1]
+            grouped = {}
+            for (node, direction), tally in self._window(window, now).items():
+                key = {"node": (node, None), "direction": (None, direction)}.get(group, (node, direction))
+                grouped.setdefault(key, Tally()).merge(tally)
+            result = [row(node, direction, tally) for (node, direction), tally in grouped.items()]
+            self._cache[(window, group)] = (cache_key, result)
+            return result
+
+
+def row(node, direction, tally):
+    common = tally.wrong.most_common(1)
+    return {
+        "node": node,
+        "direction": direction,
+        "attempts": tally.attempts,
+        "errors": tally.errors,
+        "error_rate": tally.errors / tally.attempts if tally.attempts else 0.0,
+        "most_common_wrong": common[0][0] if common else None,
+    }
@@ -0,0 +1,117 @@
+"""Incremental agents -> HR/SV -> CO evaluation with undo/redo history.
+
+``CardiacDag`` caches the value of every node. Changing one effect updates
+the HR or SV drive by the effect's weight, recomputes that node and CO,
+and reuses the cached value of the other branch. ``History`` stores each
+step's complete node values, so undo, redo and jumping to any step restore
+a fixed-size snapshot in constant time instead of replaying from baseline.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+from model import DEFAULT_PARAMS, HR_WEIGHTS, N_EFFECTS, NODE_INDEX, SV_WEIGHTS
+
+HR_W = tuple(int(w) for w in HR_WEIGHTS)
+SV_W = tuple(int(w) for w in SV_WEIGHTS)
+
+
+class Snapshot(NamedTuple):
+    effects: Tuple[int, ...]
+    hr_drive: int
+    sv_drive: int
+    hr: float
+    sv: float
+    co: float
+    # The intervention that produced this step, e.g. ("afterload", 1).
+    change: Optional[Tuple[str, int]] = None
+
+
+class CardiacDag:
+    def __init__(self, params=DEFAULT_PARAMS, effects=None):
+        self.params = params
+        effects = tuple(effects) if effects is not None else (0,) * N_EFFECTS
+        hr_drive = sum(w * e for w, e in zip(HR_W, effects))
+        sv_drive = sum(w * e for w, e in zip(SV_W, effects))
+        hr, sv = self._hr(hr_drive), self._sv(sv_drive)
+        self.state = Snapshot(effects, hr_drive, sv_drive, hr, sv, hr * sv / 1000.0)
+
+    # Same arithmetic as model.evaluate, one scalar at a time.
+    def _hr(self, drive):
+        p = self.params
+        return max(p.hr_min, min(p.hr_max, p.hr_baseline * (1 + p.hr_step * drive)))
+
+    def _sv(self, drive):
+        p = self.params
+        return max(p.sv_min, min(p.sv_max, p.sv_baseline * (1 + p.sv_step * drive)))
+
+    @property
+    def effects(self):
+        return self.state.effects
+
+    def values(self):
+        return self.state.hr, self.state.sv, self.state.co
+
+    def set_effect(self, node, value):
+        """Set ``node``'s effect and recompute only what depends on it.
+
+        Returns the downstream nodes that were recomputed.
+        """
+        s = self.state
+        col = NODE_INDEX[node]
+        delta = value - s.effects[col]
+        effects = s.effects[:col] + (value,) + s.effects[col + 1:]
+        hr_drive, sv_drive, hr, sv = s.hr_drive, s.sv_drive, s.hr, s.sv
+        touched = []
+        if delta and HR_W[col]:
+            hr_drive += HR_W[col] * delta
+            hr = self._hr(hr_drive)
+            touched.append("hr")
+        if delta and SV_W[col]:
+            sv_drive += SV_W[col] * delta
+            sv = self._sv(sv_drive)
+            touched.append("sv")
+        co = hr * sv / 1000.0 if touched else s.co
+        if touched:
+            touched.append("co")
+        self.state = Snapshot(effects, hr_drive, sv_drive, hr, sv, co, (node, value))
+        return touched
+
+    def restore(self, snapshot):
+        self.state = snapshot
+
+
+class History:
+    def __init__(self, dag):
+        self.dag = dag
+        self.steps = [dag.state]
+        self.cursor = 0
+
+    def apply(self, node, value):
+        """Apply one intervention as a new step, discarding any redo steps."""
+        touched = self.dag.set_effect(node, value)
+        del self.steps[self.cursor + 1:]
+        self.steps.append(self.dag.state)
+        self.cursor += 1
+        return touched
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < len(self.steps) - 1
+
+    def goto(self, step):
+        self.cursor = step
+        self.dag.restore(self.steps[step])
+        return self.dag.state
+
+    def undo(self):
+        return self.goto(self.cursor - 1)
+
+    def redo(self):
+        return self.goto(self.cursor + 1)
+
+    def reset(self):
+        """Start a fresh history at baseline."""
+        self.dag = CardiacDag(self.dag.params)
+        self.steps = [self.dag.state]
+        self.cursor = 0
@@ -0,0 +1,187 @@
+"""Streaming export of the attempt log as CSV or Parquet.
+
+Rows are read from ``attempts.db`` ``CHUNK`` at a time and each chunk is
+encoded and handed on before the next one is read, so memory stays flat
+however large the cohort. Three tables can be exported:
+
+- ``attempts``: one row per graded prediction;
+- ``student``: totals per student (the Student ID, or the session id for
+  students who did not enter one);
+- ``node``: totals per node and direction.
+
+CSV chunks are plain text. Parquet is written one row group per chunk
+through a sink that hands the bytes on as soon as each row group is
+written; only the footer waits for the end.
+
+``ROUTES`` serves the export over HTTP, mounted by ``serve.py`` and
+``grading_api.py``:
+
+    GET /export/attempts?format=csv|parquet&by=attempts|student|node
+"""
+import csv
+import io
+import os
+import sqlite3
+
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from attempt_log import ATTEMPTS_DB
+
+CHUNK = 10_000
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+# Column names and Arrow types of each export table.
+TABLES = {
+    "attempts": (
+        ("id", "int64"), ("ts", "float64"), ("session_id", "string"), ("student_id", "string"),
+        ("node", "string"), ("direction", "int8"), ("prediction", "string"),
+        ("correct_answer", "string"), ("correct", "bool"),
+    ),
+    "student": (
+        ("student", "string"), ("attempts", "int64"), ("correct", "int64"), ("accuracy", "float64"),
+        ("first_ts", "float64"), ("last_ts", "float64"),
+    ),
+    "node": (
+        ("node", "string"), ("direction", "int8"), ("attempts", "int64"), ("correct", "int64"),
+        ("accuracy", "float64"),
+    ),
+}
+
+# Pages by id rather than through one long query, so a slow download
+# never holds a read transaction open and blocks WAL checkpoints.
+ATTEMPTS_SQL = (
+    "SELECT id, ts, session_id, student_id, node, direction, prediction, correct_answer, correct"
+    " FROM attempts WHERE id > ? ORDER BY id LIMIT ?"
+)
+# SQLite groups in its own page cache and spills to a temp file; only the
+# groups are fetched, CHUNK at a time.
+GROUP_SQL = {
+    "student": (
+        "SELECT coalesce(student_id, session_id) AS student, count(*), sum(correct), avg(correct), min(ts), max(ts)"
+        " FROM attempts GROUP BY student ORDER BY student"
+    ),
+    "node": (
+        "SELECT node, direction, count(*), sum(correct), avg(correct)"
+        " FROM attempts GROUP BY node, direction ORDER BY node, direction DESC"
+    ),
+}
+
+
+# ---------------------------
+# Reading
+# ---------------------------
+def read_chunks(by="attempts", path=ATTEMPTS_DB, chunk=CHUNK):
+    """Yield lists of up to ``chunk`` rows of the ``by`` table."""
+    if by not in TABLES:
+        raise ValueError(f"unknown export table {by!r}")
+    if not os.path.exists(path):
+        return
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if by == "attempts":
+            last = 0
+            while rows := conn.execute(ATTEMPTS_SQL, (last, chunk)).fetchall():
+                yield rows
+                last = rows[-1][0]
+        else:
+            cursor = conn.execute(GROUP_SQL[by])
+            while rows := cursor.fetchmany(chunk):
+                yield rows
+    finally:
+        conn.close()
+
+
+# ---------------------------
+# Encoding
+# ---------------------------
+def csv_stream(chunks, by):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(name for name, _ in TABLES[by])
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _Drain(io.RawIOBase):
+    """A write-only file whose contents are taken away as they are written."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def parquet_stream(chunks, by):
+    # pyarrow comes with Streamlit, but only exports need it.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.type_for_alias(kind)) for name, kind in TABLES[by]])
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in chunks:
+            # Cast rather than convert: SQLite gives 0/1 for booleans.
+            columns = [pa.array(column).cast(field.type) for column, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def stream(fmt="csv", by="attempts", path=ATTEMPTS_DB, chunk=CHUNK):
+    """Bytes of the ``by`` table in ``fmt``, one chunk at a time."""
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"unknown export format {fmt!r}")
+    encode = csv_stream if fmt == "csv" else parquet_stream
+    return encode(read_chunks(by, path, chunk), by)
+
+
+def file_name(fmt, by):
+    return f"attempts.{fmt}" if by == "attempts" else f"attempts_by_{by}.{fmt}"
+
+
+# ---------------------------
+# HTTP
+# ---------------------------
+async def export_attempts(request):
+    fmt = request.query_params.get("format", "csv")
+    by = request.query_params.get("by", "attempts")
+    if fmt not in MEDIA_TYPES or by not in TABLES:
+        return PlainTextResponse(
+            f"format must be one of {sorted(MEDIA_TYPES)} and by one of {sorted(TABLES)}", status_code=400
+        )
+    # A sync iterator: Starlette pulls each chunk in its threadpool.
+    return StreamingResponse(
+        stream(fmt, by),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"content-disposition": f'attachment; filename="{file_name(fmt, by)}"'},
+    )
+
+
+ROUTES = [Route("/export/attempts", export_attempts)]
+# Set by serve.py, which mounts ROUTES next to the Streamlit app; the
+# dashboard links to the endpoint only when it is there to answer.
+MOUNTED_WITH_APP = False
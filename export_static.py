@@ -0,0 +1,250 @@
+"""Export the flow chart as one self-contained HTML file.
+
+The bundle embeds the chart layout from ``nodes.py``, the stylesheet, and
+every enumerated state's outcome, and runs the predict-then-reveal round
+entirely in the browser. Serve it from any static file server:
+
+    python export_static.py -o cardiac_output.html
+"""
+import argparse
+import html
+import json
+import sys
+
+import numpy as np
+
+from model import DEFAULT_PARAMS, EFFECT_KEYS, NODE_KEYS
+from nodes import AGENT_ROW, DOWNSTREAM_ROW, Group
+from outcomes import OUT_CO, baseline_directions, get_outcome_table
+from styles import APP_CSS, ARROW_DOWN, FLOW_ARROW, agent_box, co_box, correlation, group_box, node_box
+
+
+# ---------------------------
+# Data
+# ---------------------------
+def digits(directions):
+    """Encode -1/0/+1 values as the characters '0'/'1'/'2'."""
+    return (np.asarray(directions, dtype=np.int8).ravel() + ord("1")).astype(np.uint8).tobytes().decode("ascii")
+
+
+def outcome_data(params=DEFAULT_PARAMS):
+    table = get_outcome_table(params).table
+    return {
+        "nodes": NODE_KEYS,
+        "effectKeys": EFFECT_KEYS,
+        # Per state, CO/HR/SV direction vs baseline (3 chars per state).
+        "baseline": digits(baseline_directions(params)),
+        # Per (state, node, direction slot), CO direction of the transition.
+        "transitions": digits(table[..., OUT_CO]),
+    }
+
+
+# ---------------------------
+# Markup
+# ---------------------------
+def node_buttons(node):
+    inc_label, dec_label = node.labels
+    buttons = "".join(
+        f"<button class='node-btn' data-node='{node.key}' data-direction='{direction}'>{html.escape(label)}</button>"
+        for label, direction in ((inc_label, 1), (dec_label, -1))
+    )
+    layout = "stacked" if node.stacked else "pair"
+    return f"<div class='buttons {layout}'>{buttons}</div>"
+
+
+def agent_markup(node):
+    return agent_box(node, "—", ids=True) + node_buttons(node)
+
+
+def node_markup(node):
+    markup = node_box(node, "—", ids=True) + node_buttons(node)
+    if node.correlation:
+        markup += ARROW_DOWN + correlation(node)
+    return markup
+
+
+def item_markup(item):
+    if isinstance(item, Group):
+        subs = "".join(f"<div class='col'>{agent_markup(node)}</div>" for node in item.nodes)
+        return group_box(item) + f"<div class='row'>{subs}</div>"
+    return node_markup(item)
+
+
+def chart_markup():
+    row1 = "".join(f"<div class='col'>{item_markup(item)}</div>" for item in AGENT_ROW)
+    row2 = "".join(
+        f"<div class='col'>{ARROW_DOWN}</div>" if isinstance(item, Group) else "<div class='col'></div>"
+        for item in AGENT_ROW
+    )
+    row3 = "".join(f"<div class='col' style='flex:{weight}'>{node_markup(node)}</div>" for node, weight in DOWNSTREAM_ROW)
+    return f"""
+<div class='row'>{row1}</div>
+<div class='row'>{row2}</div>
+<div class='row'>{row3}</div>
+<div class='row'>
+  <div class='col' style='flex:1'>{FLOW_ARROW.format(arrow="↘")}</div>
+  <div class='col' style='flex:3'>{FLOW_ARROW.format(arrow="↙")}</div>
+</div>
+{co_box("—", ids=True)}
+"""
+
+
+# Layout rules standing in for Streamlit's columns, buttons and dialogs.
+PAGE_CSS = """
+body { font-family: "Source Sans Pro", sans-serif; margin: 2rem auto; max-width: 1200px; padding: 0 1rem; }
+.row { display: flex; gap: 1rem; }
+.col { flex: 1; min-width: 0; }
+.buttons { display: flex; gap: 0.5rem; margin: 8px 0; }
+.buttons.stacked { flex-direction: column; }
+.buttons.pair > button { flex: 1; }
+button { border: 1px solid #ccc; background: white; cursor: pointer;
+         border-radius: 8px; padding: 0.4rem 0.8rem; font-weight: 600; }
+button:disabled { cursor: not-allowed; opacity: 0.5; }
+button.primary { background: #ff4b4b; border-color: #ff4b4b; color: white; width: 100%; }
+.caption { color: #777; font-size: 0.85rem; margin-top: 1rem; }
+.modal { position: fixed; inset: 0; background: rgba(0,0,0,0.4); display: none;
+         align-items: center; justify-content: center; }
+.modal.open { display: flex; }
+.modal > div { background: white; border-radius: 12px; padding: 1.5rem; min-width: 320px; position: relative; }
+.modal .close { position: absolute; top: 0.5rem; right: 0.5rem; border: none; font-size: 1.2rem; }
+.modal label { display: block; margin: 0.3rem 0; }
+.info { background: #e8f0fe; border-radius: 8px; padding: 0.75rem; margin-top: 1rem; }
+#new-round { display: none; margin-top: 1rem; }
+"""
+
+SCRIPT = """
+const DATA = JSON.parse(document.getElementById("outcomes").textContent);
+const N = DATA.nodes.length;
+const LABELS = {"-1": "Decrease", "0": "No change", "1": "Increase"};
+const round = {phase: "select_box", effects: new Array(N).fill(0), node: null, direction: null};
+
+function dir(str, i) { return str.charCodeAt(i) - 49; }
+function arrow(d) { return d > 0 ? "↑" : (d < 0 ? "↓" : "—"); }
+function stateIndex(effects) {
+  let index = 0, place = 1;
+  for (const e of effects) { index += (e + 1) * place; place *= 3; }
+  return index;
+}
+
+function render() {
+  const state = stateIndex(round.effects);
+  DATA.nodes.forEach((node, i) => {
+    if (node !== "hr" && node !== "sv") document.getElementById("arrow-" + node).textContent = arrow(round.effects[i]);
+  });
+  document.getElementById("arrow-co").textContent = arrow(dir(DATA.baseline, state * 3));
+  document.getElementById("arrow-hr").textContent = arrow(dir(DATA.baseline, state * 3 + 1));
+  document.getElementById("arrow-sv").textContent = arrow(dir(DATA.baseline, state * 3 + 2));
+  document.querySelectorAll(".node-btn").forEach(b => { b.disabled = round.phase !== "select_box"; });
+  document.getElementById("new-round").style.display = round.phase === "show_result" ? "block" : "none";
+}
+
+function openDialog(id) { document.getElementById(id).classList.add("open"); }
+function closeDialog(id) { document.getElementById(id).classList.remove("open"); }
+
+document.querySelectorAll(".node-btn").forEach(button => button.addEventListener("click", () => {
+  round.node = button.dataset.node;
+  round.direction = Number(button.dataset.direction);
+  round.phase = "predict";
+  document.querySelectorAll("input[name=prediction]").forEach(r => { r.checked = false; });
+  document.getElementById("submit").disabled = true;
+  render();
+  openDialog("predict-dialog");
+}));
+
+document.querySelectorAll("input[name=prediction]").forEach(r => r.addEventListener("change", () => {
+  document.getElementById("submit").disabled = false;
+}));
+
+document.getElementById("submit").addEventListener("click", () => {
+  const prediction = document.querySelector("input[name=prediction]:checked").value;
+  const node = DATA.nodes.indexOf(round.node);
+  const slot = round.direction > 0 ? 1 : 0;
+  const correct = LABELS[dir(DATA.transitions, (stateIndex(round.effects) * N + node) * 2 + slot)];
+  round.effects[node] = round.direction;
+  round.phase = "show_result";
+  document.getElementById("result-prediction").textContent = prediction;
+  document.getElementById("result-correct").textContent = correct;
+  document.getElementById("result-good").style.display = prediction === correct ? "block" : "none";
+  document.getElementById("result-bad").style.display = prediction === correct ? "none" : "block";
+  closeDialog("predict-dialog");
+  openDialog("result-dialog");
+});
+
+document.querySelectorAll(".modal .close").forEach(b => b.addEventListener("click", () => {
+  closeDialog(b.closest(".modal").id);
+  if (round.phase === "predict") round.phase = "select_box";
+  render();
+}));
+
+document.getElementById("new-round").addEventListener("click", () => {
+  round.effects.fill(0);
+  round.phase = "select_box";
+  round.node = round.direction = null;
+  render();
+});
+
+render();
+"""
+
+
+def bundle(params=DEFAULT_PARAMS):
+    data = json.dumps(outcome_data(params), separators=(",", ":"))
+    predictions = "".join(
+        f"<label><input type='radio' name='prediction' value='{p}'> {p}</label>"
+        for p in ("Increase", "Decrease", "No change")
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Interactive Cardiac Output Flow Chart</title>
+<style>{APP_CSS}{PAGE_CSS}</style>
+</head>
+<body>
+<div class='big-title'>🫀 Cardiac Output Flow Chart</div>
+<p class='subtitle'>Click ⬆️ Increase or ⬇️ Decrease in any box, predict the CO change, then see the flow chart update.</p>
+{chart_markup()}
+<button id="new-round" class="primary">🔄 Start a new round</button>
+<p class="caption">📝 Arrows show direction of change only. CO = HR × SV (simplified learning model).</p>
+
+<div class="modal" id="predict-dialog"><div>
+  <button class="close" aria-label="Close">✕</button>
+  <h3>🔮 Predict the impact on cardiac output</h3>
+  <p><b>What will happen to cardiac output?</b></p>
+  <p>Your prediction:</p>
+  {predictions}
+  <p><button id="submit" class="primary" disabled>✅ Submit prediction</button></p>
+</div></div>
+
+<div class="modal" id="result-dialog"><div>
+  <button class="close" aria-label="Close">✕</button>
+  <h3>Results</h3>
+  <div class="node-card">
+    <div style="margin-bottom: 10px;"><b>Your prediction:</b> <span id="result-prediction"></span></div>
+    <div><b>Correct CO change:</b> <span id="result-correct"></span></div>
+  </div>
+  <div class="good" id="result-good">✅ Your prediction was correct!</div>
+  <div class="bad" id="result-bad">❌ Your prediction was not correct.</div>
+  <div class="info">📊 Close this dialog to see the updated flow chart, then click 'Start a new round' below.</div>
+</div></div>
+
+<script type="application/json" id="outcomes">{data}</script>
+<script>{SCRIPT}</script>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="cardiac_output.html")
+    args = parser.parse_args(argv)
+    content = bundle()
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(content)
+    print(f"wrote {args.output} ({len(content.encode()) / 1024:.0f} kB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Local JSON grading API for LMS integration.
+
+Serves the same model and grading rule as the app (the outcome table
+lookup behind ``submit_prediction``) without driving the Streamlit UI:
+
+    python grading_api.py --port 8502
+
+Endpoints:
+
+    GET  /health
+    POST /evaluate     {"state": ...}
+    POST /grade        {"state": ..., "node": "afterload", "direction": 1, "prediction": "Decrease"}
+    POST /grade/bulk   {"records": [...]} or one record per line (application/x-ndjson)
+    GET  /export/attempts?format=csv|parquet&by=attempts|student|node   (see export.py)
+
+A state is an outcome-table index, a list of the eight effects in
+``EFFECT_KEYS`` order, or an object mapping node or effect keys to -1/0/+1
+(missing keys are 0). A direction is 1/-1 or "Increase"/"Decrease".
+
+Bulk records are graded in chunks with one vectorized table lookup per
+chunk. NDJSON requests get an NDJSON response that streams out chunk by
+chunk, with each chunk of input parsed just before it is graded. JSON
+requests get one too when they hold more than ``STREAM_THRESHOLD``
+records or send ``Accept: application/x-ndjson``. Each result is one line
+and the last line is {"summary": ...}. Records that fail validation get
+an "error" line and do not stop the batch.
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import sys
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from export import ROUTES as EXPORT_ROUTES
+from model import DEFAULT_PARAMS, DIRECTION_LABELS, EFFECT_KEYS, N_EFFECTS, NODE_INDEX, evaluate
+from outcomes import N_STATES, OUT_CO, OUT_HR, OUT_SV, get_outcome_table, state_effects, state_index
+
+CHUNK = 5_000
+STREAM_THRESHOLD = CHUNK
+NDJSON = "application/x-ndjson"
+
+PREDICTION_CODES = {label: code for code, label in DIRECTION_LABELS.items()}
+DIRECTION_NAMES = {"Increase": 1, "Decrease": -1}
+EFFECT_INDEX = {key: i for i, key in enumerate(EFFECT_KEYS)}
+# JSON fragments for a result line, indexed by direction code + 1.
+LABEL_JSON = [json.dumps(DIRECTION_LABELS[code]) for code in (-1, 0, 1)]
+
+
+class RecordError(ValueError):
+    pass
+
+
+# ---------------------------
+# Validation
+# ---------------------------
+def parse_state(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        if 0 <= value < N_STATES:
+            return value
+        raise RecordError(f"state index must be in 0..{N_STATES - 1}")
+    if isinstance(value, list):
+        effects = value
+        if len(effects) != N_EFFECTS:
+            raise RecordError(f"state must list {N_EFFECTS} effects")
+    elif isinstance(value, dict):
+        effects = [0] * N_EFFECTS
+        for key, effect in value.items():
+            column = NODE_INDEX.get(key, EFFECT_INDEX.get(key))
+            if column is None:
+                raise RecordError(f"unknown node {key!r}")
+            effects[column] = effect
+    else:
+        raise RecordError("state must be an index, a list of effects or an object")
+    if any(effect not in (-1, 0, 1) or isinstance(effect, bool) for effect in effects):
+        raise RecordError("effects must be -1, 0 or 1")
+    return int(state_index(effects))
+
+
+def parse_direction(value):
+    # Lists and objects are unhashable: reject them before the name lookup.
+    direction = DIRECTION_NAMES.get(value, value) if isinstance(value, (str, int)) else None
+    if direction not in (-1, 1) or isinstance(direction, bool):
+        raise RecordError("direction must be 1, -1, 'Increase' or 'Decrease'")
+    return direction
+
+
+def parse_record(record):
+    """(state, node column, direction, prediction code) for one grading record."""
+    if not isinstance(record, dict):
+        raise RecordError("record must be an object")
+    try:
+        node = NODE_INDEX[record["node"]]
+    except KeyError:
+        raise RecordError(f"unknown or missing node {record.get('node')!r}") from None
+    except TypeError:
+        raise RecordError("node must be a string") from None
+    prediction = record.get("prediction")
+    prediction = PREDICTION_CODES.get(prediction) if isinstance(prediction, str) else None
+    if prediction is None:
+        raise RecordError("prediction must be 'Increase', 'Decrease' or 'No change'")
+    return parse_state(record.get("state")), node, parse_direction(record.get("direction")), prediction
+
+
+# ---------------------------
+# Grading
+# ---------------------------
+def grade_chunk(records, start=0):
+    """Grade ``records`` with one table lookup; returns (NDJSON text, correct, errors)."""
+    parsed, lines, index = [], [None] * len(records), []
+    for i, record in enumerate(records):
+        try:
+            parsed.append(parse_record(record))
+            index.append(i)
+        except RecordError as exc:
+            lines[i] = json.dumps({"index": start + i, "error": str(exc)})
+    correct = 0
+    if parsed:
+        states, nodes, directions, predictions = np.array(parsed, dtype=np.int32).T
+        outcome = get_outcome_table(DEFAULT_PARAMS).lookup_many(states, nodes, directions)
+        hits = outcome[:, OUT_CO] == predictions
+        correct = int(hits.sum())
+        for i, hit, (co, hr, sv) in zip(index, hits.tolist(), (outcome[:, [OUT_CO, OUT_HR, OUT_SV]] + 1).tolist()):
+            record_id = records[i].get("id")
+            lines[i] = (
+                f'{{"index":{start + i},'
+                + (f'"id":{json.dumps(record_id)},' if record_id is not None else "")
+                + f'"correct":{"true" if hit else "false"},"correct_answer":{LABEL_JSON[co]},'
+                f'"hr":{LABEL_JSON[hr]},"sv":{LABEL_JSON[sv]}}}'
+            )
+    return "\n".join(lines) + "\n", correct, len(records) - len(parsed)
+
+
+def summary_line(records, correct, errors):
+    return json.dumps({"summary": {"records": records, "correct": correct, "errors": errors}}) + "\n"
+
+
+async def graded_stream(chunks):
+    """NDJSON lines for an async iterable of record chunks, then a summary."""
+    total = correct = errors = 0
+    async for chunk in chunks:
+        text, hits, bad = grade_chunk(chunk, total)
+        total, correct, errors = total + len(chunk), correct + hits, errors + bad
+        yield text
+        # Let other requests in between chunks of a large batch.
+        await asyncio.sleep(0)
+    yield summary_line(total, correct, errors)
+
+
+async def ndjson_records(body):
+    """Chunks of records from an NDJSON body, parsed one chunk at a time."""
+    lines = (line for line in body.split(b"\n") if line.strip())
+    while batch := list(itertools.islice(lines, CHUNK)):
+        # One parse per chunk; a bad line falls back to line by line.
+        try:
+            records = json.loads(b"[" + b",".join(batch) + b"]")
+        except ValueError:
+            records = None
+        if records is None or len(records) != len(batch):
+            records = [parse_line(line) for line in batch]
+        yield records
+
+
+def parse_line(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        # Graded as an invalid record, so the line numbering still matches.
+        return None
+
+
+async def in_chunks(records):
+    for i in range(0, len(records), CHUNK):
+        yield records[i:i + CHUNK]
+
+
+# ---------------------------
+# Endpoints
+# ---------------------------
+def error(message, status=400):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise RecordError("request body is not valid JSON") from None
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "states": N_STATES})
+
+
+async def evaluate_state(request):
+    try:
+        body = await read_json(request)
+        state = parse_state(body.get("state") if isinstance(body, dict) else None)
+    except RecordError as exc:
+        return error(str(exc))
+    hr, sv, co = (float(v) for v in evaluate(state_effects(state), DEFAULT_PARAMS))
+    co_dir, hr_dir, sv_dir = get_outcome_table(DEFAULT_PARAMS).baselines[state].tolist()
+    return JSONResponse({
+        "state": state,
+        "hr": hr,
+        "sv": sv,
+        "co": co,
+        "directions": {"co": DIRECTION_LABELS[co_dir], "hr": DIRECTION_LABELS[hr_dir], "sv": DIRECTION_LABELS[sv_dir]},
+    })
+
+
+async def grade(request):
+    try:
+        record = await read_json(request)
+    except RecordError as exc:
+        return error(str(exc))
+    text, _, errors = grade_chunk([record])
+    result = json.loads(text)
+    if errors:
+        return error(result["error"])
+    del result["index"]
+    return JSONResponse(result)
+
+
+async def grade_bulk(request):
+    if request.headers.get("content-type", "").startswith(NDJSON):
+        # The body is read up front: while a StreamingResponse is sending,
+        # Starlette consumes the receive channel to watch for disconnects.
+        body = await request.body()
+        return StreamingResponse(graded_stream(ndjson_records(body)), media_type=NDJSON)
+    try:
+        body = await read_json(request)
+    except RecordError as exc:
+        return error(str(exc))
+    records = body.get("records") if isinstance(body, dict) else body
+    if not isinstance(records, list):
+        return error('expected {"records": [...]} or a JSON array')
+    if len(records) > STREAM_THRESHOLD or NDJSON in request.headers.get("accept", ""):
+        return StreamingResponse(graded_stream(in_chunks(records)), media_type=NDJSON)
+    text, correct, errors = await run_in_threadpool(grade_chunk, records)
+    results = [json.loads(line) for line in text.splitlines()]
+    return JSONResponse({"results": results, "summary": {"records": len(records), "correct": correct, "errors": errors}})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Build the outcome table before the first request arrives.
+    get_outcome_table(DEFAULT_PARAMS)
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/evaluate", evaluate_state, methods=["POST"]),
+        Route("/grade", grade, methods=["POST"]),
+        Route("/grade/bulk", grade_bulk, methods=["POST"]),
+        *EXPORT_ROUTES,
+    ],
+    lifespan=lifespan,
+)
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Flow chart as a single streamlit-agraph component.
+
+Nodes and edges come from the node registry and dependency graph, and
+are styled from the model outputs: a node's colour and arrow show its
+direction of change, and an edge is labelled with the sign of its effect.
+"""
+from streamlit_agraph import Config, Edge, Node, agraph
+
+from model import HR_WEIGHTS, NODE_INDEX, SV_WEIGHTS
+from nodes import DOWNSTREAM, node_label
+
+COLORS = {1: "#8fd19e", -1: "#f19ca6", 0: "#EFE7E5"}
+SELECTED_BORDER = "#1f77b4"
+ARROWS = {1: "↑", -1: "↓", 0: "—"}
+
+# Hierarchical level of each node: agents -> HR/SV -> CO.
+LEVELS = {"hr": 1, "sv": 1, "co": 2}
+
+
+def edge_sign(source, target):
+    if target == "co":
+        return 1
+    weights = HR_WEIGHTS if target == "hr" else SV_WEIGHTS
+    return int(weights[NODE_INDEX[source]])
+
+
+def build_graph(directions, graph_version, selected=None):
+    """``directions`` maps every node and "co" to -1/0/+1."""
+    nodes = []
+    for key, direction in directions.items():
+        nodes.append(
+            Node(
+                key,
+                title=node_label(key),
+                label=f"{node_label(key)}\n{ARROWS[direction]}",
+                shape="box",
+                color={
+                    "background": COLORS[direction],
+                    "border": SELECTED_BORDER if key == selected else "#333333",
+                },
+                borderWidth=3 if key == selected else 1,
+                level=LEVELS.get(key, 0),
+                font={"size": 16, "multi": True},
+            )
+        )
+    # The component has no key argument and is identified by its arguments,
+    # so carrying graph_version in the data gives each version a fresh
+    # instance whose last click is cleared.
+    next(node for node in nodes if node.id == "co").graph_version = graph_version
+
+    edges = [
+        Edge(source, target, label="+" if edge_sign(source, target) > 0 else "−", color="#555555")
+        for source, targets in DOWNSTREAM.items()
+        for target in targets
+    ]
+    config = Config(
+        height=520,
+        width=1100,
+        directed=True,
+        physics=False,
+        hierarchical=True,
+        sortMethod="directed",
+        levelSeparation=180,
+        nodeSpacing=170,
+    )
+    return nodes, edges, config
+
+
+def render_graph(directions, graph_version, selected=None):
+    """Draw the chart; returns the id of a node the student clicked, if any."""
+    return agraph(*build_graph(directions, graph_version, selected))
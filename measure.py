@@ -0,0 +1,57 @@
+"""Per-rerun delta accounting for the chart's measurement mode.
+
+``DeltaMeter`` wraps the session's ForwardMsg queue and counts how many
+element deltas, and how many serialized bytes, each run sends to the
+browser. A full-app run and a keyed fragment rerun are recorded as
+separate entries so the two rendering strategies can be compared.
+"""
+from collections import deque
+from dataclasses import dataclass
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+@dataclass
+class RunStats:
+    scope: str
+    elements: int = 0
+    bytes: int = 0
+
+
+class DeltaMeter:
+    def __init__(self, history=20):
+        self.runs = deque(maxlen=history)
+        self.paused = False
+        # ScriptRunContext.reset() replaces these lists on every run, so their
+        # identity tells one run from the next.
+        self._marker = None
+
+    def observe(self, scope):
+        """Mark that ``scope`` ("app" or a region key) is rendering in the current run."""
+        ctx = get_script_run_ctx()
+        if ctx is None:
+            return
+        if getattr(ctx._enqueue, "delta_meter", None) is not self:
+            ctx._enqueue = self._wrap(ctx._enqueue)
+        marker = ctx.fragment_ids_this_run or ctx.cursors
+        if marker is not self._marker:
+            self._marker = marker
+            self.runs.append(RunStats(scope))
+        elif self.runs[-1].scope != "app" and scope not in self.runs[-1].scope.split(", "):
+            self.runs[-1].scope += f", {scope}"
+
+    def _wrap(self, enqueue):
+        def counting_enqueue(msg):
+            if not self.paused and self.runs and msg.WhichOneof("type") == "delta":
+                self.runs[-1].elements += 1
+                self.runs[-1].bytes += msg.ByteSize()
+            enqueue(msg)
+
+        counting_enqueue.delta_meter = self
+        return counting_enqueue
+
+    def rows(self):
+        return [
+            {"Rerun": run.scope, "Elements": run.elements, "Delta bytes": run.bytes}
+            for run in reversed(self.runs)
+        ]
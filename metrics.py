@@ -0,0 +1,213 @@
+"""Opt-in rerun metrics in Prometheus text format.
+
+Set ``CARDIAC_METRICS_PORT`` to serve ``/metrics`` over HTTP on localhost,
+or ``CARDIAC_METRICS_FILE`` to have the text rewritten every
+``WRITE_INTERVAL`` seconds (for node_exporter's textfile collector). The
+exported series are:
+
+- ``cardiac_section_seconds``: histogram of each named section of the
+  script (CSS injection, box layout, chart regions, ``compute_state``,
+  the dialog);
+- ``cardiac_reruns_total{phase, kind}``: reruns by round phase, where
+  kind is "app" for a full script run and "fragment" for a keyed region
+  rerun;
+- ``cardiac_active_sessions``: sessions that reran within
+  ``ACTIVE_SECONDS``.
+
+With neither variable set every hook is a no-op: ``timed`` returns the
+function unchanged, ``section`` returns a shared null context, and
+``rerun`` returns on its first line.
+"""
+import contextlib
+import functools
+import http.server
+import os
+import threading
+import time
+from collections import Counter
+
+PORT = os.environ.get("CARDIAC_METRICS_PORT")
+FILE = os.environ.get("CARDIAC_METRICS_FILE")
+ENABLED = bool(PORT or FILE)
+
+WRITE_INTERVAL = 15.0
+ACTIVE_SECONDS = 300.0
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sections = {}
+        self._reruns = Counter()
+        # session id -> (last rerun time, marker of that run)
+        self._sessions = {}
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._sections.get(name)
+            if histogram is None:
+                histogram = self._sections[name] = Histogram()
+            histogram.observe(seconds)
+
+    def rerun(self, session_id, marker, phase, kind):
+        """Count one rerun; later calls with the same run's marker are ignored."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._sessions.get(session_id)
+            if last is not None and last[1] is marker:
+                return
+            self._sessions[session_id] = (now, marker)
+            self._reruns[(phase, kind)] += 1
+
+    def active_sessions(self):
+        cutoff = time.monotonic() - ACTIVE_SECONDS
+        with self._lock:
+            for session_id in [s for s, (seen, _) in self._sessions.items() if seen < cutoff]:
+                del self._sessions[session_id]
+            return len(self._sessions)
+
+    def render(self):
+        active = self.active_sessions()
+        lines = [
+            "# HELP cardiac_section_seconds Time spent in each named section of a rerun.",
+            "# TYPE cardiac_section_seconds histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self._sections.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h.buckets):
+                    cumulative += count
+                    lines.append(f'cardiac_section_seconds_bucket{{section="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'cardiac_section_seconds_bucket{{section="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'cardiac_section_seconds_sum{{section="{name}"}} {h.sum:.6f}')
+                lines.append(f'cardiac_section_seconds_count{{section="{name}"}} {h.count}')
+            lines += [
+                "# HELP cardiac_reruns_total Script reruns by round phase and kind (app or fragment).",
+                "# TYPE cardiac_reruns_total counter",
+            ]
+            for (phase, kind), count in sorted(self._reruns.items()):
+                lines.append(f'cardiac_reruns_total{{phase="{phase}",kind="{kind}"}} {count}')
+        lines += [
+            f"# HELP cardiac_active_sessions Sessions that reran in the last {ACTIVE_SECONDS:.0f} seconds.",
+            "# TYPE cardiac_active_sessions gauge",
+            f"cardiac_active_sessions {active}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ---------------------------
+# Hooks
+# ---------------------------
+class Section:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        REGISTRY.observe(self.name, time.perf_counter() - self.start)
+
+
+NULL_SECTION = contextlib.nullcontext()
+
+
+def section(name):
+    """Context manager timing one section of the script."""
+    return Section(name) if ENABLED else NULL_SECTION
+
+
+def timed(name):
+    """Decorator timing every call of a function as section ``name``."""
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def timed_fn(*args, **kwargs):
+            with Section(name):
+                return fn(*args, **kwargs)
+        return timed_fn
+    return wrap
+
+
+def rerun(phase):
+    """Count the current run once, however many regions call this during it."""
+    if not ENABLED:
+        return
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    fragments = ctx.fragment_ids_this_run
+    # As in measure.DeltaMeter, these lists are replaced on every run.
+    REGISTRY.rerun(ctx.session_id, fragments or ctx.cursors, phase, "fragment" if fragments else "app")
+
+
+# ---------------------------
+# Export
+# ---------------------------
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def write_file(path):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(REGISTRY.render())
+    # Scrapers never see a half-written file.
+    os.replace(tmp, path)
+
+
+def _write_forever(path):
+    while True:
+        write_file(path)
+        time.sleep(WRITE_INTERVAL)
+
+
+def start_exporters():
+    """Start the configured exporters on daemon threads; returns the HTTP server, if any."""
+    server = None
+    if PORT:
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", int(PORT)), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if FILE:
+        os.makedirs(os.path.dirname(os.path.abspath(FILE)), exist_ok=True)
+        threading.Thread(target=_write_forever, args=(FILE,), name="metrics-file", daemon=True).start()
+    return server
@@ -0,0 +1,104 @@
+"""Cardiac output model, independent of Streamlit session state.
+
+The model scores effect vectors in the column order of ``EFFECT_KEYS``.
+Every function accepts a single vector or a 2-D batch of them and
+returns NumPy arrays, so thousands of states cost one vectorized call.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# ---------------------------
+# Inputs
+# ---------------------------
+EFFECT_KEYS = (
+    "chrono_pos_effect",
+    "chrono_neg_effect",
+    "ino_pos_effect",
+    "ino_neg_effect",
+    "venous_return_effect",
+    "afterload_effect",
+    "hr_direct_effect",
+    "sv_direct_effect",
+)
+N_EFFECTS = len(EFFECT_KEYS)
+
+# Node names used by the UI, aligned with the columns of EFFECT_KEYS.
+NODE_KEYS = ("chrono_pos", "chrono_neg", "ino_pos", "ino_neg", "venous", "afterload", "hr", "sv")
+NODE_INDEX = {node: i for i, node in enumerate(NODE_KEYS)}
+
+# Signed contribution of each effect column to the HR and SV drive.
+HR_WEIGHTS = np.array([1, -1, 0, 0, 0, 0, 1, 0], dtype=np.int8)
+SV_WEIGHTS = np.array([0, 0, 1, -1, 1, -1, 0, 1], dtype=np.int8)
+# Bump whenever ``evaluate`` changes how it scores a state, so cached
+# outcome tables built by the old model are not reused.
+MODEL_VERSION = 1
+
+
+@dataclass(frozen=True)
+class ModelParams:
+    hr_baseline: float = 70.0
+    sv_baseline: float = 70.0
+    hr_step: float = 0.12
+    sv_step: float = 0.12
+    hr_min: float = 30.0
+    hr_max: float = 180.0
+    sv_min: float = 30.0
+    sv_max: float = 140.0
+
+    @property
+    def co_baseline(self):
+        return self.hr_baseline * self.sv_baseline / 1000.0
+
+
+DEFAULT_PARAMS = ModelParams()
+
+
+# ---------------------------
+# Evaluation
+# ---------------------------
+def drives(effects):
+    """Return the net (HR, SV) drive for each effect vector."""
+    effects = np.asarray(effects)
+    return effects @ HR_WEIGHTS, effects @ SV_WEIGHTS
+
+
+def evaluate_raw(effects, params=DEFAULT_PARAMS):
+    """HR and SV before clamping, for callers that need to detect saturation."""
+    hr_drive, sv_drive = drives(effects)
+    hr = params.hr_baseline * (1 + params.hr_step * hr_drive)
+    sv = params.sv_baseline * (1 + params.sv_step * sv_drive)
+    return hr, sv
+
+
+def evaluate(effects, params=DEFAULT_PARAMS):
+    """Score one effect vector or an (n, 8) batch; returns ``(hr, sv, co)`` arrays."""
+    hr, sv = evaluate_raw(effects, params)
+    hr = np.clip(hr, params.hr_min, params.hr_max)
+    sv = np.clip(sv, params.sv_min, params.sv_max)
+    co = hr * sv / 1000.0
+    return hr, sv, co
+
+
+# ---------------------------
+# Directions
+# ---------------------------
+DIRECTION_LABELS = {1: "Increase", -1: "Decrease", 0: "No change"}
+
+
+def expected_direction(before, after, eps=1e-6):
+    if abs(after - before) < eps:
+        return "No change"
+    return "Increase" if after > before else "Decrease"
+
+
+def direction_vs_baseline(value, baseline, eps=1e-6):
+    if abs(value - baseline) < eps:
+        return 0
+    return 1 if value > baseline else -1
+
+
+def directions(before, after, eps=1e-6):
+    """Vectorized sign of ``after - before``: -1, 0 or +1 per element."""
+    delta = np.asarray(after) - np.asarray(before)
+    return np.where(np.abs(delta) < eps, 0, np.sign(delta)).astype(np.int8)
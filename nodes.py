@@ -0,0 +1,135 @@
+"""Node registry for the flow chart.
+
+Each clickable box is described once here; ``app.py`` lays the chart out
+from these records instead of repeating the HTML and button code per box.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from model import NODE_KEYS
+
+INCREASE_LABELS = ("⬆️ Increase", "⬇️ Decrease")
+AGENT_LABELS = ("⬆️ Add more", "⬇️ Add less")
+
+
+@dataclass(frozen=True)
+class Node:
+    key: str
+    title: str
+    desc: str = ""
+    box_class: str = "header-box-yellow"
+    labels: Tuple[str, str] = INCREASE_LABELS
+    # Agent sub-boxes stack their buttons; standalone boxes put them side by side.
+    stacked: bool = False
+    correlation: Optional[str] = None
+
+    def button_key(self, direction):
+        return f"{self.key}_{'inc' if direction > 0 else 'dec'}"
+
+
+@dataclass(frozen=True)
+class Group:
+    key: str
+    title: str
+    desc: str
+    box_class: str
+    nodes: Tuple[Node, ...]
+
+
+def _agent(key, title):
+    return Node(key, title, box_class="inner-agent-box", labels=AGENT_LABELS, stacked=True)
+
+
+NODES = {
+    node.key: node
+    for node in (
+        _agent("chrono_pos", "Positive agents"),
+        _agent("chrono_neg", "Negative agents"),
+        Node(
+            "venous",
+            "Venous return",
+            "(volume of blood returning to heart alters stretch of heart wall or preload)",
+            correlation="is directly<br/>correlated with",
+        ),
+        _agent("ino_pos", "Positive agents"),
+        _agent("ino_neg", "Negative agents"),
+        Node(
+            "afterload",
+            "Afterload",
+            "(increased resistance in arteries)",
+            correlation="is inversely<br/>correlated with",
+        ),
+        Node("hr", "Heart rate", "(beats per minute)", box_class="downstream-box"),
+        Node("sv", "Stroke volume", "(blood pumped per beat)", box_class="downstream-box-yellow"),
+    )
+}
+assert set(NODES) == set(NODE_KEYS)
+
+# Top row of the chart, left to right.
+AGENT_ROW = (
+    Group(
+        "chrono",
+        "Chronotropic agents",
+        "(alter SA node and AV node activity)",
+        "container-box",
+        (NODES["chrono_pos"], NODES["chrono_neg"]),
+    ),
+    NODES["venous"],
+    Group(
+        "ino",
+        "Inotropic agents",
+        "(substances that alter contractility of myocardium)",
+        "container-box-pink",
+        (NODES["ino_pos"], NODES["ino_neg"]),
+    ),
+    NODES["afterload"],
+)
+
+# Downstream row: heart rate and stroke volume with their column weights.
+DOWNSTREAM_ROW = ((NODES["hr"], 1), (NODES["sv"], 3))
+
+
+def node_label(key):
+    """Human-readable name of a node outside the chart, e.g. in reports."""
+    for item in AGENT_ROW:
+        if isinstance(item, Group) and NODES.get(key) in item.nodes:
+            return f"{item.title} ({NODES[key].title.lower()})"
+    return NODES[key].title if key in NODES else "Cardiac output"
+
+
+# ---------------------------
+# Dependency graph
+# ---------------------------
+# Nodes that read each node's value; CO is the only sink.
+DOWNSTREAM = {
+    "chrono_pos": ("hr",),
+    "chrono_neg": ("hr",),
+    "ino_pos": ("sv",),
+    "ino_neg": ("sv",),
+    "venous": ("sv",),
+    "afterload": ("sv",),
+    "hr": ("co",),
+    "sv": ("co",),
+    "co": (),
+}
+
+# Chart region (fragment key) that renders each node. Agents inside a
+# group share the group's region; every other node is its own region.
+NODE_REGION = {}
+for _item in AGENT_ROW + tuple(node for node, _ in DOWNSTREAM_ROW):
+    for _node in getattr(_item, "nodes", (_item,)):
+        NODE_REGION[_node.key] = _item.key
+NODE_REGION["co"] = "co"
+REGIONS = tuple(dict.fromkeys(NODE_REGION.values()))
+
+
+def affected_regions(node):
+    """Regions that must re-render when ``node`` changes, in chart order."""
+    seen, stack = set(), [node]
+    while stack:
+        current = stack.pop()
+        if current not in seen:
+            seen.add(current)
+            stack.extend(DOWNSTREAM[current])
+    regions = {NODE_REGION[n] for n in seen}
+    return [region for region in REGIONS if region in regions]
@@ -0,0 +1,161 @@
+"""Precomputed outcomes for every intervention state.
+
+Each of the eight effects takes the value -1, 0 or +1, so there are only
+3^8 = 6561 states. A state is indexed by reading its effects as base-3
+digits (``effect + 1``), least significant digit first. For every
+(state, node, direction) transition the table stores the CO, HR and SV
+direction as -1/0/+1, so grading a prediction is a single array lookup.
+"""
+import functools
+import hashlib
+import os
+from dataclasses import astuple
+
+import numpy as np
+
+from model import (
+    DEFAULT_PARAMS,
+    HR_WEIGHTS,
+    MODEL_VERSION,
+    N_EFFECTS,
+    NODE_INDEX,
+    SV_WEIGHTS,
+    directions,
+    evaluate,
+)
+from paths import CACHE_DIR
+
+N_STATES = 3 ** N_EFFECTS
+PLACE_VALUES = 3 ** np.arange(N_EFFECTS, dtype=np.int32)
+
+# Last axis of the table.
+OUT_CO, OUT_HR, OUT_SV = 0, 1, 2
+
+# Tables kept in memory at once, one per parameter set (each about 315 kB).
+TABLE_CACHE_SIZE = 8
+
+
+# ---------------------------
+# State indexing
+# ---------------------------
+def state_index(effects):
+    """Index of one effect vector, or an array of indices for an (n, 8) batch."""
+    return (np.asarray(effects, dtype=np.int32) + 1) @ PLACE_VALUES
+
+
+def state_effects(index):
+    """Inverse of ``state_index``: effect vector(s) for one index or an array of them."""
+    index = np.asarray(index, dtype=np.int32)
+    digits = (index[..., None] // PLACE_VALUES) % 3
+    return (digits - 1).astype(np.int8)
+
+
+def all_states():
+    """Every effect vector, shape (6561, 8), ordered by state index."""
+    return state_effects(np.arange(N_STATES))
+
+
+def direction_slot(direction):
+    return 0 if direction < 0 else 1
+
+
+# ---------------------------
+# Table
+# ---------------------------
+def build_directions(params=DEFAULT_PARAMS):
+    """Enumerate every transition and return the (6561, 8, 2, 3) int8 direction table."""
+    states = all_states()
+    hr0, sv0, co0 = evaluate(states, params)
+
+    table = np.empty((N_STATES, N_EFFECTS, 2, 3), dtype=np.int8)
+    for node in range(N_EFFECTS):
+        for slot, direction in enumerate((-1, 1)):
+            after = states.copy()
+            after[:, node] = direction
+            hr1, sv1, co1 = evaluate(after, params)
+            table[:, node, slot, OUT_CO] = directions(co0, co1)
+            table[:, node, slot, OUT_HR] = directions(hr0, hr1)
+            table[:, node, slot, OUT_SV] = directions(sv0, sv1)
+    return table
+
+
+def baseline_directions(params=DEFAULT_PARAMS):
+    """(6561, 3) int8 CO/HR/SV direction of every state relative to baseline."""
+    hr, sv, co = evaluate(all_states(), params)
+    out = np.empty((N_STATES, 3), dtype=np.int8)
+    out[:, OUT_CO] = directions(params.co_baseline, co)
+    out[:, OUT_HR] = directions(params.hr_baseline, hr)
+    out[:, OUT_SV] = directions(params.sv_baseline, sv)
+    return out
+
+
+def model_key(params=DEFAULT_PARAMS):
+    """Everything a cached table depends on: the model version, its weights and ``params``."""
+    return MODEL_VERSION, HR_WEIGHTS.tolist(), SV_WEIGHTS.tolist(), astuple(params)
+
+
+class OutcomeTable:
+    def __init__(self, table, params=DEFAULT_PARAMS):
+        self.table = table
+        self.params = params
+
+    @classmethod
+    def build(cls, params=DEFAULT_PARAMS):
+        return cls(build_directions(params), params)
+
+    @classmethod
+    def load_or_build(cls, params=DEFAULT_PARAMS, cache_dir=CACHE_DIR):
+        """Load the table cached for ``params``, building and saving it on a miss.
+
+        The file name hashes ``model_key``, so a table built by an older
+        model or with other weights is never loaded.
+        """
+        fingerprint = hashlib.sha1(repr(model_key(params)).encode()).hexdigest()[:12]
+        path = os.path.join(cache_dir, f"outcomes-{fingerprint}.npy")
+        try:
+            table = np.load(path)
+            if table.shape == (N_STATES, N_EFFECTS, 2, 3):
+                return cls(table, params)
+        except (OSError, ValueError):
+            pass
+        outcome = cls.build(params)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, outcome.table)
+        except OSError:
+            # A read-only checkout still works; the table is rebuilt per process.
+            pass
+        return outcome
+
+    @functools.cached_property
+    def baselines(self):
+        """``baseline_directions`` for this table's params, computed on first use."""
+        return baseline_directions(self.params)
+
+    def lookup(self, state, node, direction):
+        """(CO, HR, SV) directions for setting ``node`` to ``direction`` in ``state``."""
+        return self.table[state, NODE_INDEX[node], direction_slot(direction)]
+
+    def co_direction(self, state, node, direction):
+        return int(self.table[state, NODE_INDEX[node], direction_slot(direction), OUT_CO])
+
+    def hr_direction(self, state, node, direction):
+        return int(self.table[state, NODE_INDEX[node], direction_slot(direction), OUT_HR])
+
+    def sv_direction(self, state, node, direction):
+        return int(self.table[state, NODE_INDEX[node], direction_slot(direction), OUT_SV])
+
+    def lookup_many(self, states, nodes, direction_values):
+        """Vectorized lookup; ``nodes`` are column indices, directions are -1/+1 arrays."""
+        slots = (np.asarray(direction_values) > 0).astype(np.intp)
+        return self.table[np.asarray(states), np.asarray(nodes), slots]
+
+
+@functools.lru_cache(maxsize=TABLE_CACHE_SIZE)
+def get_outcome_table(params=DEFAULT_PARAMS):
+    """Process-wide outcome table for ``params``, built or loaded on first use.
+
+    The most recently used ``TABLE_CACHE_SIZE`` tables stay in memory, so
+    sessions switching between patient profiles share them.
+    """
+    return OutcomeTable.load_or_build(params)
@@ -0,0 +1,123 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from broadcast import DEFAULT_PROMPT
+from class_stats import WINDOWS
+import export
+from export import MEDIA_TYPES, TABLES
+from model import DIRECTION_LABELS, NODE_KEYS
+from nodes import node_label
+from resources import broadcast_channel, class_stats
+
+st.set_page_config(
+    page_title="Instructor dashboard",
+    page_icon="📊",
+    layout="wide",
+)
+
+st.markdown("## 📊 Class misconception dashboard")
+st.caption("Error rates by node and by direction, with the most common wrong prediction for each.")
+
+# ---------------------------
+# Live question
+# ---------------------------
+st.markdown("#### 📣 Live question")
+channel = broadcast_channel()
+with st.form("broadcast"):
+    c1, c2 = st.columns([2, 1])
+    node = c1.selectbox("Node", NODE_KEYS, format_func=node_label)
+    direction = c2.radio("Change", (1, -1), format_func=DIRECTION_LABELS.get, horizontal=True)
+    prompt = st.text_input("Prompt", DEFAULT_PROMPT)
+    if st.form_submit_button("Push to every student", type="primary"):
+        channel.publish(node, direction, prompt)
+
+# Answers are counted as they are submitted; refreshing only sums them.
+@st.fragment(run_every=2)
+def live_answers():
+    live, answers = channel.results()
+    if live is None:
+        st.caption(f"No live question. Subscribed student sessions: {channel.subscribers}.")
+        return
+    total = sum(answers.values())
+    correct = sum(count for (_, ok), count in answers.items() if ok)
+    st.write(
+        f"**{node_label(live.node)}: {DIRECTION_LABELS[live.direction]}**, "
+        f"pushed {time.time() - live.started:.0f} s ago"
+    )
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Subscribed sessions", channel.subscribers)
+    c2.metric("Answers", f"{total:,}")
+    c3.metric("Correct", f"{correct / total:.0%}" if total else "—")
+    labels = list(DIRECTION_LABELS.values())
+    counts = {label: sum(count for (prediction, _), count in answers.items() if prediction == label) for label in labels}
+    st.bar_chart(pd.DataFrame({"Answers": counts}), horizontal=True)
+    st.button("End question", on_click=channel.end)
+
+live_answers()
+
+# ---------------------------
+# Misconceptions
+# ---------------------------
+window = st.radio("Window", WINDOWS, horizontal=True)
+
+COLUMNS = {
+    "attempts": "Attempts",
+    "errors": "Errors",
+    "error_rate": "Error rate",
+    "most_common_wrong": "Most common wrong prediction",
+}
+
+def table(rows, index):
+    df = pd.DataFrame(rows)
+    df["node"] = df["node"].map(node_label, na_action="ignore")
+    df["direction"] = df["direction"].map(lambda d: DIRECTION_LABELS[d], na_action="ignore")
+    df = df.rename(columns={"node": "Node", "direction": "Change", **COLUMNS})
+    return df.set_index(index).sort_values("Error rate", ascending=False)
+
+# Counters are updated by the attempt writer; refreshing only reads them.
+@st.fragment(run_every=5)
+def live_view():
+    stats = class_stats()
+    if not stats.seeded:
+        st.info("Loading attempt history…")
+    rows = stats.snapshot(window)
+    if not rows:
+        st.info("No predictions have been submitted in this window yet.")
+        return
+
+    attempts = sum(r["attempts"] for r in rows)
+    errors = sum(r["errors"] for r in rows)
+    c1, c2 = st.columns(2)
+    c1.metric("Attempts", f"{attempts:,}")
+    c2.metric("Error rate", f"{errors / attempts:.0%}")
+
+    percent = {"Error rate": st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1)}
+    st.markdown("#### By node")
+    st.dataframe(table(stats.snapshot(window, "node"), "Node").drop(columns="Change"), column_config=percent)
+    st.markdown("#### By direction")
+    st.dataframe(table(stats.snapshot(window, "direction"), "Change").drop(columns="Node"), column_config=percent)
+    st.markdown("#### By node and direction")
+    st.dataframe(table(rows, ["Node", "Change"]), column_config=percent)
+
+live_view()
+
+# ---------------------------
+# Export
+# ---------------------------
+st.markdown("#### ⬇️ Export attempts")
+EXPORT_ROWS = {"attempts": "Every attempt", "student": "Per student", "node": "Per node and direction"}
+c1, c2 = st.columns(2)
+fmt = c1.radio("Format", tuple(MEDIA_TYPES), format_func=str.upper, horizontal=True)
+by = c2.radio("Rows", tuple(TABLES), format_func=EXPORT_ROWS.get, horizontal=True)
+# The file is streamed by the export endpoint, never assembled here.
+if export.MOUNTED_WITH_APP:
+    base = st.get_option("server.baseUrlPath").strip("/")
+    st.link_button("Download", f"{'/' + base if base else ''}/export/attempts?format={fmt}&by={by}")
+else:
+    st.caption(
+        "Downloads stream from the export endpoint, which `streamlit run` does not serve. "
+        f"Run the app with `uvicorn serve:app`, or fetch `/export/attempts?format={fmt}&by={by}` "
+        "from `grading_api.py`."
+    )
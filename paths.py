@@ -0,0 +1,8 @@
+"""Local directories for generated and persisted data."""
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Attempt logs, scenario banks and other data worth keeping across deploys.
+DATA_DIR = os.environ.get("CARDIAC_DATA_DIR", os.path.join(ROOT, "data"))
+# Derived files that can be rebuilt at any time.
+CACHE_DIR = os.path.join(ROOT, ".cache")
@@ -0,0 +1,140 @@
+"""Adaptive practice: pick the next challenge from a student's error history.
+
+Each practice item (by default one (node, direction) pair, but any
+hashable key works, e.g. a multi-step scenario row) is scheduled with a
+small spaced-repetition rule. The clock counts answers, not seconds:
+
+- a correct answer pushes the item back by its interval, which starts at
+  ``FIRST_INTERVAL`` answers and grows by the item's ease each time it is
+  answered correctly again;
+- a wrong answer makes the item due again almost at once and lowers its
+  ease, so items a student keeps missing keep coming back.
+
+Unseen items start due at their (shuffled) rank, so new items are mixed
+in with reviews instead of all coming first.
+
+``Scheduler`` keeps the items in a heap ordered by due time, then by
+lapses. Answering an item pushes a new heap entry and bumps the item's
+version; older entries are discarded lazily when they reach the top, so
+``record`` and ``next`` are O(log n) in the number of items. The heap is
+rebuilt once stale entries outnumber live ones.
+"""
+import heapq
+import itertools
+import random
+
+from model import NODE_KEYS
+
+FIRST_INTERVAL = 3
+START_EASE = 2.0
+MIN_EASE = 1.3
+MAX_EASE = 3.0
+EASE_STEP = 0.15
+
+# Every node button, both ways.
+NODE_ITEMS = tuple((node, direction) for node in NODE_KEYS for direction in (1, -1))
+
+
+class ItemStats:
+    __slots__ = ("seen", "lapses", "streak", "interval", "ease", "due", "version")
+
+    def __init__(self, due):
+        self.seen = 0
+        self.lapses = 0
+        self.streak = 0
+        self.interval = 0
+        self.ease = START_EASE
+        self.due = due
+        self.version = 0
+
+
+class Scheduler:
+    def __init__(self, items=NODE_ITEMS, seed=None):
+        self.clock = 0
+        self._stats = {}
+        self._heap = []
+        self._seq = itertools.count()
+        order = list(items)
+        random.Random(seed).shuffle(order)
+        for rank, key in enumerate(order):
+            self._stats[key] = ItemStats(rank)
+            self._push(key)
+
+    def __len__(self):
+        return len(self._stats)
+
+    def stats(self, key):
+        return self._stats[key]
+
+    # ---------------------------
+    # Heap
+    # ---------------------------
+    def _push(self, key):
+        item = self._stats[key]
+        heapq.heappush(self._heap, (item.due, -item.lapses, next(self._seq), item.version, key))
+
+    def _top(self):
+        """The live entry with the earliest due time, dropping stale ones on the way."""
+        heap = self._heap
+        while heap and heap[0][3] != self._stats[heap[0][4]].version:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if entry[3] == self._stats[entry[4]].version]
+        heapq.heapify(self._heap)
+
+    # ---------------------------
+    # Scheduling
+    # ---------------------------
+    def add(self, key):
+        """Schedule a new item, due now."""
+        if key not in self._stats:
+            self._stats[key] = ItemStats(self.clock)
+            self._push(key)
+
+    def next(self, avoid=None):
+        """The most overdue item, other than ``avoid`` (e.g. the one just asked) when possible."""
+        top = self._top()
+        if top is None:
+            return None
+        if top[4] != avoid:
+            return top[4]
+        heapq.heappop(self._heap)
+        second = self._top()
+        heapq.heappush(self._heap, top)
+        return second[4] if second else top[4]
+
+    def record(self, key, correct):
+        """Reschedule ``key`` after an answer; unknown keys are added first."""
+        self.add(key)
+        item = self._stats[key]
+        self.clock += 1
+        item.seen += 1
+        if correct:
+            item.streak += 1
+            item.interval = FIRST_INTERVAL if item.streak == 1 else round(item.interval * item.ease)
+            item.ease = min(MAX_EASE, item.ease + EASE_STEP)
+        else:
+            item.lapses += 1
+            item.streak = 0
+            item.interval = 1
+            item.ease = max(MIN_EASE, item.ease - 2 * EASE_STEP)
+        item.due = self.clock + item.interval
+        item.version += 1
+        self._push(key)
+        if len(self._heap) > 2 * len(self._stats) + 64:
+            self._compact()
+
+    def weakest(self, n=3):
+        """Up to ``n`` missed items with the highest error rate, as (key, stats)."""
+        missed = ((key, item) for key, item in self._stats.items() if item.lapses)
+        return heapq.nsmallest(n, missed, key=lambda pair: (-pair[1].lapses / pair[1].seen, -pair[1].lapses))
+
+
+def from_attempts(records, seed=None):
+    """A node scheduler replaying (node, direction, prediction, answer, ts) attempts."""
+    scheduler = Scheduler(seed=seed)
+    for node, direction, prediction, answer, _ in records:
+        scheduler.record((node, direction), prediction == answer)
+    return scheduler
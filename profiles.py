@@ -0,0 +1,41 @@
+"""Patient profiles: named model parameters loaded from ``profiles.json``.
+
+Each profile sets the baselines, step coefficients and clamp limits of
+``ModelParams``; fields it leaves out keep their defaults. The first
+profile in the file is the default for new sessions.
+"""
+import json
+import os
+from dataclasses import fields
+from typing import NamedTuple
+
+from model import ModelParams
+from paths import ROOT
+
+PROFILES_PATH = os.path.join(ROOT, "profiles.json")
+PARAM_FIELDS = {field.name for field in fields(ModelParams)}
+
+
+class Profile(NamedTuple):
+    key: str
+    label: str
+    description: str
+    params: ModelParams
+
+
+def load_profiles(path=PROFILES_PATH):
+    """Profiles by key, in file order."""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    profiles = {}
+    for key, entry in raw.items():
+        unknown = set(entry.get("params", {})) - PARAM_FIELDS
+        if unknown:
+            raise ValueError(f"profile {key!r}: unknown parameters {sorted(unknown)}")
+        params = ModelParams(**{name: float(value) for name, value in entry.get("params", {}).items()})
+        if not (params.hr_min <= params.hr_baseline <= params.hr_max and params.sv_min <= params.sv_baseline <= params.sv_max):
+            raise ValueError(f"profile {key!r}: baselines must lie within the clamp limits")
+        profiles[key] = Profile(key, entry.get("label", key), entry.get("description", ""), params)
+    if not profiles:
+        raise ValueError(f"{path} defines no profiles")
+    return profiles
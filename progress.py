@@ -0,0 +1,319 @@
+"""Durable student progress: compact binary snapshots keyed by student id.
+
+A student who enters an id (or opens the app with ``?student=…``) has
+their round, toggles, cumulative history and attempt history saved as one
+small binary snapshot after every phase transition. A browser refresh or
+a server restart then resumes exactly where they were.
+
+``ProgressStore.save`` never touches disk: it replaces the student's
+pending snapshot in memory and wakes a writer thread. The writer waits
+``delay`` seconds for the burst of clicks to settle, then commits every
+pending snapshot in one transaction, so rapid clicks cost one fsync
+rather than one each. ``load`` sees pending snapshots before they reach
+the database.
+
+Snapshot layout (little-endian, version 1)::
+
+    header   version, state, previous_state, phase, selected_node,
+             pending_direction, prediction, last_feedback, last_correct,
+             flags, challenge tier                                 13 bytes
+    profile  u8 length + UTF-8 key
+    history  u16 steps, u16 cursor, then per step: u16 state, i8 node, i8 value
+    attempts u32 count, then the session's packed ATTEMPT records
+"""
+import atexit
+import os
+import sqlite3
+import struct
+import threading
+import time
+
+from dag import CardiacDag, History
+from model import DIRECTION_LABELS, NODE_KEYS
+from outcomes import N_STATES
+from paths import DATA_DIR
+from scenarios import TIERS
+from session import PHASES, pack, unpack
+
+PROGRESS_DB = os.path.join(DATA_DIR, "progress.db")
+VERSION = 1
+# Attempts kept per student; older ones stay in the attempt log only.
+MAX_ATTEMPTS = 1000
+
+HEADER = struct.Struct("<BHHBbbbbbBB")
+HISTORY = struct.Struct("<HH")
+STEP = struct.Struct("<Hbb")
+COUNT = struct.Struct("<I")
+# node, direction, predicted CO direction, actual CO direction, unix time
+ATTEMPT = struct.Struct("<BbbbI")
+
+NONE = -128
+FLAGS = ("scenario", "cumulative", "simulate", "explain", "practicing")
+LABEL_DIRECTIONS = {label: direction for direction, label in DIRECTION_LABELS.items()}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    student_id TEXT PRIMARY KEY,
+    snapshot BLOB NOT NULL,
+    updated REAL NOT NULL
+);
+-- Snapshots restore could not read, kept for recovery.
+CREATE TABLE IF NOT EXISTS unreadable (
+    student_id TEXT NOT NULL,
+    snapshot BLOB NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+# ---------------------------
+# Snapshots
+# ---------------------------
+def _code(value):
+    return NONE if value is None else value
+
+
+def _value(code):
+    return None if code == NONE else code
+
+
+def _item(items, code):
+    """``items[code]``, raising IndexError for a negative code as for one past the end."""
+    if not 0 <= code < len(items):
+        raise IndexError(code)
+    return items[code]
+
+
+def _check(valid):
+    if not valid:
+        raise ValueError("corrupt snapshot")
+
+
+def record_attempt(session, node, direction, prediction, answer):
+    """Append one graded attempt to the session's packed attempt history."""
+    session.attempts += ATTEMPT.pack(
+        NODE_KEYS.index(node), direction, LABEL_DIRECTIONS[prediction], LABEL_DIRECTIONS[answer], int(time.time())
+    )
+    excess = len(session.attempts) - MAX_ATTEMPTS * ATTEMPT.size
+    if excess > 0:
+        del session.attempts[:excess]
+
+
+def attempts(session):
+    """The session's attempts as (node, direction, prediction, answer, ts) tuples."""
+    return [
+        (NODE_KEYS[node], direction, DIRECTION_LABELS[predicted], DIRECTION_LABELS[actual], ts)
+        for node, direction, predicted, actual, ts in ATTEMPT.iter_unpack(session.attempts)
+    ]
+
+
+def score(session):
+    """(correct, total) over the session's attempt history."""
+    records = list(ATTEMPT.iter_unpack(session.attempts))
+    return sum(predicted == actual for _, _, predicted, actual, _ in records), len(records)
+
+
+def dump(session):
+    """The session's progress as a compact binary snapshot."""
+    s = session
+    flags = sum(1 << bit for bit, name in enumerate(FLAGS) if getattr(s, name))
+    parts = [
+        HEADER.pack(
+            VERSION,
+            s.state,
+            s.previous_state,
+            PHASES.index(s.phase),
+            NODE_KEYS.index(s.selected_node) if s.selected_node else NONE,
+            _code(s.pending_direction),
+            _code(LABEL_DIRECTIONS.get(s.prediction)),
+            _code(LABEL_DIRECTIONS.get(s.last_feedback)),
+            _code(None if s.last_correct is None else int(s.last_correct)),
+            flags,
+            TIERS.index(s.challenge_tier) if s.challenge_tier in TIERS else 0,
+        )
+    ]
+    profile = (s.profile or "").encode()
+    parts.append(bytes((len(profile),)) + profile)
+    steps = s.history.steps if s.history is not None else ()
+    parts.append(HISTORY.pack(len(steps), s.history.cursor if steps else 0))
+    for step in steps:
+        node, value = step.change or (None, 0)
+        parts.append(STEP.pack(pack(step.effects), NODE_KEYS.index(node) if node else NONE, value))
+    parts.append(COUNT.pack(len(s.attempts) // ATTEMPT.size))
+    parts.append(bytes(s.attempts))
+    return b"".join(parts)
+
+
+def restore(session, snapshot, profiles):
+    """Apply ``snapshot`` to ``session``; False if it is unreadable.
+
+    A profile since removed from ``profiles`` falls back to the first one.
+    """
+    if not snapshot or snapshot[0] != VERSION:
+        return False
+    try:
+        (_, state, previous, phase, node, pending, prediction, feedback, correct, flags, tier) = HEADER.unpack_from(snapshot)
+        _check(state < N_STATES and previous < N_STATES)
+        _check(pending in (NONE, -1, 1) and correct in (NONE, 0, 1))
+        offset = HEADER.size
+        length = snapshot[offset]
+        profile = snapshot[offset + 1:offset + 1 + length].decode()
+        offset += 1 + length
+        if profile not in profiles:
+            profile = next(iter(profiles), None)
+            if profile is None:
+                return False
+        count, cursor = HISTORY.unpack_from(snapshot, offset)
+        offset += HISTORY.size
+        history = None
+        if count:
+            params = profiles[profile].params
+            history = History(CardiacDag(params))
+            history.steps = []
+            for packed, step_node, value in STEP.iter_unpack(snapshot[offset:offset + count * STEP.size]):
+                _check(packed < N_STATES and value in (-1, 0, 1))
+                change = (_item(NODE_KEYS, step_node), value) if step_node != NONE else None
+                history.steps.append(CardiacDag(params, unpack(packed)).state._replace(change=change))
+            offset += count * STEP.size
+            _check(len(history.steps) == count and cursor < count)
+            history.goto(cursor)
+        (n_attempts,) = COUNT.unpack_from(snapshot, offset)
+        offset += COUNT.size
+        attempts = snapshot[offset:offset + n_attempts * ATTEMPT.size]
+        _check(len(attempts) == n_attempts * ATTEMPT.size)
+        for attempt_node, direction, predicted, actual, _ in ATTEMPT.iter_unpack(attempts):
+            _check(attempt_node < len(NODE_KEYS) and direction in (-1, 1))
+            _check(predicted in DIRECTION_LABELS and actual in DIRECTION_LABELS)
+        phase = _item(PHASES, phase)
+        node = _item(NODE_KEYS, node) if node != NONE else None
+        prediction = DIRECTION_LABELS[prediction] if prediction != NONE else None
+        feedback = DIRECTION_LABELS[feedback] if feedback != NONE else None
+        tier = _item(TIERS, tier)
+    except (struct.error, IndexError, KeyError, ValueError):
+        # Truncated, or a field out of range: nothing has touched the session yet.
+        return False
+
+    s = session
+    s.profile = profile
+    s.state = state
+    s.previous_state = previous
+    s.phase = phase
+    s.selected_node = node
+    s.pending_direction = _value(pending)
+    s.prediction = prediction
+    s.last_feedback = feedback
+    s.last_correct = bool(correct) if correct != NONE else None
+    for bit, name in enumerate(FLAGS):
+        setattr(s, name, bool(flags >> bit & 1))
+    s.challenge_tier = tier
+    s.history = history
+    s.attempts = bytearray(attempts)
+    return True
+
+
+# ---------------------------
+# Store
+# ---------------------------
+def connect(path, **kwargs):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Every commit is durable; coalescing keeps commits rare.
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class ProgressStore:
+    def __init__(self, path=PROGRESS_DB, delay=0.5):
+        self.path = path
+        self.delay = delay
+        self.saves = 0
+        self.commits = 0
+        self.written = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        # The batch being committed, still visible to load() until it lands.
+        self._writing = {}
+        self._reader = connect(path, check_same_thread=False)
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def save(self, student_id, snapshot):
+        """Queue ``snapshot`` as the student's latest; replaces any not yet written."""
+        with self._lock:
+            self._pending[student_id] = snapshot
+            self.saves += 1
+            self._wake.set()
+
+    def load(self, student_id):
+        """The student's latest snapshot, or None."""
+        with self._lock:
+            snapshot = self._pending.get(student_id) or self._writing.get(student_id)
+            if snapshot is not None:
+                return snapshot
+            row = self._reader.execute("SELECT snapshot FROM progress WHERE student_id = ?", (student_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_aside(self, student_id, snapshot):
+        """Keep a snapshot that could not be restored before new saves replace it.
+
+        Written at once rather than queued: the student's next save
+        overwrites ``snapshot`` in the progress table.
+        """
+        with self._lock:
+            with self._reader:
+                self._reader.execute("INSERT INTO unreadable VALUES (?, ?, ?)", (student_id, snapshot, time.time()))
+
+    def flush(self, timeout=5.0):
+        """Wait until everything saved so far has been committed."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._pending and not self._writing:
+                    return True
+            time.sleep(0.005)
+        return False
+
+    def close(self, timeout=5.0):
+        """Commit what is pending and stop the writer."""
+        if not self._closed.is_set():
+            self._closed.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            with self._lock:
+                self._reader.close()
+
+    # ---------------------------
+    # Writer thread
+    # ---------------------------
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            while True:
+                self._wake.wait()
+                # Let a burst of clicks settle so it costs one commit.
+                self._closed.wait(self.delay)
+                with self._lock:
+                    batch, self._pending = self._pending, {}
+                    self._writing = batch
+                    self._wake.clear()
+                if batch:
+                    now = time.time()
+                    with conn:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO progress VALUES (?, ?, ?)",
+                            [(student_id, snapshot, now) for student_id, snapshot in batch.items()],
+                        )
+                    self.commits += 1
+                    self.written += len(batch)
+                with self._lock:
+                    self._writing = {}
+                    if self._closed.is_set() and not self._pending:
+                        break
+        finally:
+            conn.close()
@@ -0,0 +1,71 @@
+"""Process-wide resources shared by every session and page.
+
+Each factory is wrapped in ``st.cache_resource`` and lives in this module,
+rather than in a page script, so that ``app.py`` and the pages under
+``pages/`` get the same instance.
+"""
+import threading
+
+import streamlit as st
+
+import metrics
+from attempt_log import ATTEMPTS_DB, AttemptLogger
+from broadcast import Channel
+from class_stats import ClassStats
+from profiles import PROFILES_PATH, load_profiles
+from progress import PROGRESS_DB, ProgressStore
+from scenarios import SCENARIOS_PATH, load_bank
+from session_store import open_store
+
+
+@st.cache_resource
+def attempt_logger():
+    return AttemptLogger(ATTEMPTS_DB)
+
+
+@st.cache_resource
+def class_stats():
+    stats = ClassStats()
+    # Subscribe before seeding: batches that arrive meanwhile are held and
+    # replayed unless seed() already counted them.
+    attempt_logger().subscribe(stats.add)
+    # The one-off aggregate can take seconds on a large history; keep it off
+    # the first session's rerun.
+    threading.Thread(target=stats.seed, args=(ATTEMPTS_DB,), name="class-stats-seed", daemon=True).start()
+    return stats
+
+
+@st.cache_resource
+def patient_profiles():
+    """Patient profiles from profiles.json, by key."""
+    return load_profiles(PROFILES_PATH)
+
+
+@st.cache_resource
+def scenario_bank():
+    """The memory-mapped scenario bank, or None until ``scenarios.py`` has been run."""
+    return load_bank(SCENARIOS_PATH)
+
+
+@st.cache_resource
+def metrics_exporters():
+    """Start the metrics HTTP endpoint and/or file writer once per process."""
+    return metrics.start_exporters()
+
+
+@st.cache_resource
+def session_store():
+    """The CARDIAC_SESSION_STORE backend shared by this worker's sessions, or None."""
+    return open_store()
+
+
+@st.cache_resource
+def broadcast_channel():
+    """The instructor's live-question channel, shared by the app and the dashboard."""
+    return Channel()
+
+
+@st.cache_resource
+def progress_store():
+    """Durable per-student snapshots, written in coalesced batches."""
+    return ProgressStore(PROGRESS_DB)
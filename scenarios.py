@@ -0,0 +1,178 @@
+"""Scenario bank for the challenge mode.
+
+A scenario is a starting state with one or more interventions already in
+place plus one more intervention whose effect on CO the student predicts.
+The generator enumerates every such scenario, scores them in vectorized
+batches against the outcome table, keeps one scenario per equivalence
+class, and sorts the survivors by difficulty. The bank is a structured
+``.npy`` file, so the app memory-maps it and drawing a question is one
+index into it:
+
+    python scenarios.py --max-active 4 -o data/scenarios.npy
+"""
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+
+from model import DEFAULT_PARAMS, N_EFFECTS, drives, evaluate_raw
+from outcomes import OUT_CO, OUT_HR, OUT_SV, all_states, baseline_directions, get_outcome_table, state_index
+from paths import DATA_DIR
+
+SCENARIOS_PATH = os.path.join(DATA_DIR, "scenarios.npy")
+
+SCENARIO_DTYPE = np.dtype([
+    ("state", "<u2"),      # outcome-table index of the starting effects
+    ("node", "u1"),        # column of the intervention to predict
+    ("direction", "i1"),   # -1 or +1
+    ("co", "i1"),          # CO/HR/SV direction of that intervention
+    ("hr", "i1"),
+    ("sv", "i1"),
+    ("active", "u1"),      # interventions already in place
+    ("features", "u1"),    # FEATURE_* bits
+    ("score", "<f4"),
+])
+
+# Difficulty features.
+FEATURE_OPPOSING = 1   # HR and SV end up on opposite sides of baseline
+FEATURE_SATURATED = 2  # HR or SV sits at a clamp before or after the change
+FEATURE_NO_CHANGE = 4  # the correct answer is "No change"
+FEATURE_WEIGHTS = {FEATURE_OPPOSING: 2.0, FEATURE_SATURATED: 2.0, FEATURE_NO_CHANGE: 3.0}
+# Each intervention already in place adds this much.
+ACTIVE_WEIGHT = 0.5
+
+TIERS = ("Easy", "Medium", "Hard")
+
+
+# ---------------------------
+# Generation
+# ---------------------------
+def candidates(min_active=1, max_active=3):
+    """(state, node, direction) for every non-trivial question over the eligible states."""
+    states = all_states()
+    active = np.count_nonzero(states, axis=1)
+    eligible = np.flatnonzero((active >= min_active) & (active <= max_active))
+    state = np.repeat(eligible, N_EFFECTS * 2)
+    node = np.tile(np.repeat(np.arange(N_EFFECTS), 2), len(eligible))
+    direction = np.tile(np.array([-1, 1]), len(eligible) * N_EFFECTS)
+    # Setting a node to the value it already has changes nothing.
+    keep = states[state, node] != direction
+    return state[keep], node[keep], direction[keep]
+
+
+def saturated(states, params=DEFAULT_PARAMS):
+    """Per state, whether HR or SV is held at its clamp."""
+    hr, sv = evaluate_raw(states, params)
+    return (hr <= params.hr_min) | (hr >= params.hr_max) | (sv <= params.sv_min) | (sv >= params.sv_max)
+
+
+def score_batch(state, node, direction, params=DEFAULT_PARAMS):
+    """Score one batch of questions; returns a SCENARIO_DTYPE array."""
+    states = all_states()
+    after = states[state].copy()
+    after[np.arange(len(state)), node] = direction
+
+    outcome = get_outcome_table(params).lookup_many(state, node, direction)
+    baseline = baseline_directions(params)[state_index(after)]
+    features = np.where(baseline[:, OUT_HR] * baseline[:, OUT_SV] < 0, FEATURE_OPPOSING, 0)
+    features |= np.where(saturated(states[state], params) | saturated(after, params), FEATURE_SATURATED, 0)
+    features |= np.where(outcome[:, OUT_CO] == 0, FEATURE_NO_CHANGE, 0)
+
+    out = np.empty(len(state), dtype=SCENARIO_DTYPE)
+    out["state"] = state
+    out["node"] = node
+    out["direction"] = direction
+    out["co"] = outcome[:, OUT_CO]
+    out["hr"] = outcome[:, OUT_HR]
+    out["sv"] = outcome[:, OUT_SV]
+    out["active"] = np.count_nonzero(states[state], axis=1)
+    out["features"] = features
+    out["score"] = ACTIVE_WEIGHT * (out["active"] - 1)
+    for bit, weight in FEATURE_WEIGHTS.items():
+        out["score"] += weight * ((features & bit) != 0)
+    return out
+
+
+def prune(bank):
+    """Keep one scenario per equivalence class, preferring the fewest interventions.
+
+    Two scenarios are equivalent when they start from the same HR and SV
+    drive and make the same change to the same node, so every number the
+    model computes for them is identical.
+    """
+    effects = all_states()[bank["state"]]
+    hr_drive, sv_drive = drives(effects)
+    current = effects[np.arange(len(bank)), bank["node"]]
+    keys = np.stack([hr_drive, sv_drive, bank["node"], current, bank["direction"]], axis=1)
+    # Sort so each class's simplest member comes first, then keep firsts.
+    order = np.lexsort((bank["state"], bank["active"], *keys.T[::-1]))
+    _, first = np.unique(keys[order], axis=0, return_index=True)
+    return bank[order[first]]
+
+
+def generate(min_active=1, max_active=3, params=DEFAULT_PARAMS, batch_size=65_536):
+    state, node, direction = candidates(min_active, max_active)
+    bank = np.concatenate([
+        score_batch(state[i:i + batch_size], node[i:i + batch_size], direction[i:i + batch_size], params)
+        for i in range(0, len(state), batch_size)
+    ])
+    bank = prune(bank)
+    # Easiest first; ties broken by state for a reproducible file.
+    return bank[np.lexsort((bank["direction"], bank["node"], bank["state"], bank["score"]))]
+
+
+# ---------------------------
+# Bank
+# ---------------------------
+def load_bank(path=SCENARIOS_PATH):
+    """Memory-map a bank written by this module, or None if there isn't one."""
+    try:
+        bank = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    return bank if bank.dtype == SCENARIO_DTYPE else None
+
+
+def tier_range(bank, tier):
+    """[start, stop) rows of ``tier``: the bank is sorted, so tiers are equal thirds."""
+    i = TIERS.index(tier)
+    return len(bank) * i // len(TIERS), len(bank) * (i + 1) // len(TIERS)
+
+
+def draw(bank, tier):
+    """One random scenario from ``tier``: a single row read from the mapped file."""
+    return bank[random.randrange(*tier_range(bank, tier))]
+
+
+def summary(bank):
+    lines = [f"{len(bank)} scenarios"]
+    for tier in TIERS:
+        start, stop = tier_range(bank, tier)
+        rows = bank[start:stop]
+        lines.append(
+            f"  {tier:<6} {stop - start:>5}  score {rows['score'].min():.1f}-{rows['score'].max():.1f}"
+            f"  opposing {np.mean(rows['features'] & FEATURE_OPPOSING > 0):.0%}"
+            f"  saturated {np.mean(rows['features'] & FEATURE_SATURATED > 0):.0%}"
+            f"  no change {np.mean(rows['co'] == 0):.0%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default=SCENARIOS_PATH)
+    parser.add_argument("--min-active", type=int, default=1, help="fewest interventions already in place")
+    parser.add_argument("--max-active", type=int, default=3, help="most interventions already in place")
+    args = parser.parse_args(argv)
+    bank = generate(args.min_active, args.max_active)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    np.save(args.output, bank)
+    print(summary(bank))
+    print(f"wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} kB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""How much each node moves HR, SV and CO around the current state.
+
+Every node's effect is nudged one step down and one step up, and the 16
+perturbed vectors plus the current one are scored in a single batched
+``evaluate`` call. The step is marginal, so it can leave the -1..+1 range
+the buttons allow. ``evaluate_raw`` on the same batch shows where a clamp
+holds HR or SV and swallows the nudge. Results are cached per state index
+and parameter set.
+"""
+import functools
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from model import DEFAULT_PARAMS, HR_WEIGHTS, N_EFFECTS, NODE_KEYS, evaluate, evaluate_raw
+from nodes import node_label
+from outcomes import state_effects
+
+
+class Lever(NamedTuple):
+    node: str
+    # Percent change from the current value for a step down / up.
+    co_down: float
+    co_up: float
+    hr_down: float
+    hr_up: float
+    sv_down: float
+    sv_up: float
+    # "HR at its maximum" etc. when a clamp absorbs part of the nudge.
+    clamp: Optional[str]
+
+    @property
+    def swing(self):
+        return abs(self.co_up - self.co_down)
+
+    def zeroed(self):
+        """The steps ("down", "up") that leave CO unchanged."""
+        return [step for step, change in (("down", self.co_down), ("up", self.co_up)) if abs(change) < 1e-9]
+
+
+def perturbations(effects):
+    """(1 + 2 * 8, 8) batch: the current vector, then each node one step down and up."""
+    effects = np.asarray(effects, dtype=np.float64)
+    steps = np.concatenate([-np.eye(N_EFFECTS), np.eye(N_EFFECTS)])
+    return np.vstack([effects, effects + steps])
+
+
+def clamp_note(raw, low, high, name):
+    if raw < low:
+        return f"{name} held at its minimum"
+    if raw > high:
+        return f"{name} held at its maximum"
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def levers(state, params=DEFAULT_PARAMS):
+    """Levers for one state index, strongest effect on CO first."""
+    batch = perturbations(state_effects(state))
+    hr, sv, co = evaluate(batch, params)
+    raw_hr, raw_sv = evaluate_raw(batch, params)
+
+    def pct(values):
+        change = 100 * (values[1:] / values[0] - 1)
+        return change[:N_EFFECTS], change[N_EFFECTS:]
+
+    (co_down, co_up), (hr_down, hr_up), (sv_down, sv_up) = pct(co), pct(hr), pct(sv)
+    result = []
+    for i, node in enumerate(NODE_KEYS):
+        if HR_WEIGHTS[i]:
+            raws, low, high, name = raw_hr, params.hr_min, params.hr_max, "HR"
+        else:
+            raws, low, high, name = raw_sv, params.sv_min, params.sv_max, "SV"
+        clamp = None
+        for row in (0, 1 + i, 1 + N_EFFECTS + i):
+            clamp = clamp or clamp_note(raws[row], low, high, name)
+        result.append(Lever(node, co_down[i], co_up[i], hr_down[i], hr_up[i], sv_down[i], sv_up[i], clamp))
+    result.sort(key=lambda lever: lever.swing, reverse=True)
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=256)
+def tornado_chart(state, params=DEFAULT_PARAMS):
+    """Altair tornado of the CO change per lever for one state index."""
+    import altair as alt
+
+    ranked = levers(state, params)
+    labels = [node_label(lever.node) + (" ⚠" if lever.clamp else "") for lever in ranked]
+    rows = [
+        {"lever": label, "step": step, "co": co, "hr": hr, "sv": sv}
+        for label, lever in zip(labels, ranked)
+        for step, co, hr, sv in (
+            ("Step down", lever.co_down, lever.hr_down, lever.sv_down),
+            ("Step up", lever.co_up, lever.hr_up, lever.sv_up),
+        )
+    ]
+    return alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+        x=alt.X("co:Q", title="Change in CO (%)"),
+        y=alt.Y("lever:N", sort=labels, title=None),
+        color=alt.Color(
+            "step:N",
+            scale=alt.Scale(domain=["Step down", "Step up"], range=["#f19ca6", "#8fd19e"]),
+            legend=alt.Legend(title=None, orient="bottom"),
+        ),
+        tooltip=[
+            alt.Tooltip("lever:N", title="Lever"),
+            alt.Tooltip("step:N", title="Step"),
+            alt.Tooltip("co:Q", title="CO %", format="+.1f"),
+            alt.Tooltip("hr:Q", title="HR %", format="+.1f"),
+            alt.Tooltip("sv:Q", title="SV %", format="+.1f"),
+        ],
+    ).properties(height=32 * len(labels))
@@ -0,0 +1,60 @@
+"""ASGI entry point that serves the app with long-lived caching for its stylesheet.
+
+``streamlit run app.py`` serves ``static/`` without cache lifetimes, so
+browsers revalidate the stylesheet on each page load. Run the app as an
+ASGI application instead to have versioned static URLs (the
+``?v=<content hash>`` that ``styles.STYLESHEET_URL`` carries) served as
+immutable for a year:
+
+    uvicorn serve:app --port 8501
+
+An edited stylesheet gets a new hash and so a new URL; requests for
+unversioned static files keep Streamlit's default headers.
+
+It also serves the streaming attempt export (``export.ROUTES``) next to
+the app.
+"""
+import os
+
+import streamlit as st
+from starlette.middleware import Middleware
+
+import export
+from export import ROUTES as EXPORT_ROUTES
+from paths import ROOT
+
+STATIC_PREFIX = "/app/static/"
+IMMUTABLE = b"public, max-age=31536000, immutable"
+
+
+class ImmutableStaticMiddleware:
+    """Mark versioned ``app/static`` responses as cacheable forever."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # "in" rather than startswith, to allow a server.baseUrlPath prefix.
+        if (
+            scope["type"] != "http"
+            or STATIC_PREFIX not in scope["path"]
+            or b"v=" not in scope.get("query_string", b"")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_immutable(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"cache-control"]
+                message = {**message, "headers": [*headers, (b"cache-control", IMMUTABLE)]}
+            await send(message)
+
+        await self.app(scope, receive, send_immutable)
+
+
+export.MOUNTED_WITH_APP = True
+app = st.App(
+    os.path.join(ROOT, "app.py"),
+    routes=EXPORT_ROUTES,
+    middleware=[Middleware(ImmutableStaticMiddleware)],
+)
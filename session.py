@@ -0,0 +1,125 @@
+"""Compact per-session state.
+
+All of a session's own state lives in one slotted ``SessionState`` object
+stored under a single ``st.session_state`` key, instead of one key per
+field. The eight effects are packed into one int: the base-3 outcome
+table index, so grading reads the table with it directly. HR, SV and CO
+are derived lazily from that index through a process-wide cache, so a
+session stores no model values of its own. The undo history exists only
+while cumulative mode is on.
+"""
+import functools
+
+from model import DEFAULT_PARAMS, N_EFFECTS, NODE_INDEX, evaluate
+from outcomes import N_STATES, TABLE_CACHE_SIZE
+
+PLACE = tuple(3 ** i for i in range(N_EFFECTS))
+# Index of the all-zero effect vector.
+BASELINE_STATE = sum(PLACE)
+PHASES = ("select_box", "predict", "show_result")
+
+
+@functools.lru_cache(maxsize=N_STATES * TABLE_CACHE_SIZE)
+def state_values(state, params=DEFAULT_PARAMS):
+    """(hr, sv, co) for one state index and parameter set, shared by every session."""
+    hr, sv, co = evaluate(unpack(state), params)
+    return float(hr), float(sv), float(co)
+
+
+def unpack(state):
+    return tuple(state // place % 3 - 1 for place in PLACE)
+
+
+def pack(effects):
+    return sum((int(effect) + 1) * place for effect, place in zip(effects, PLACE))
+
+
+class SessionState:
+    __slots__ = (
+        "session_id",
+        "profile",
+        "state",
+        "previous_state",
+        "phase",
+        "selected_node",
+        "pending_direction",
+        "prediction",
+        "last_feedback",
+        "last_correct",
+        "graph_version",
+        "simulated_version",
+        "history",
+        "scenario",
+        "cumulative",
+        "simulate",
+        "explain",
+        "challenge_tier",
+        "saved",
+        "broadcast",
+        "broadcast_seen",
+        "student_id",
+        "attempts",
+        "snapshot",
+        "practicing",
+        "practice",
+        "stale_regions",
+    )
+
+    def __init__(self, session_id, challenge_tier=None, profile=None):
+        self.session_id = session_id
+        # Key into profiles.json; selects the model parameters.
+        self.profile = profile
+        self.state = BASELINE_STATE
+        # State before the last submitted intervention, for the simulation.
+        self.previous_state = BASELINE_STATE
+        self.phase = PHASES[0]
+        self.selected_node = None
+        self.pending_direction = None
+        self.prediction = None
+        self.last_feedback = None
+        self.last_correct = None
+        self.graph_version = 0
+        self.simulated_version = None
+        self.history = None
+        self.scenario = False
+        self.cumulative = False
+        self.simulate = False
+        self.explain = False
+        self.challenge_tier = challenge_tier
+        # Last round written to the session store, to skip unchanged saves.
+        self.saved = None
+        # Id of the instructor broadcast this round answers, and the last one seen.
+        self.broadcast = None
+        self.broadcast_seen = None
+        # Durable progress (progress.py): the student's id, their packed
+        # attempt history and the last snapshot queued for them.
+        self.student_id = None
+        self.attempts = bytearray()
+        self.snapshot = None
+        # Practice mode and its scheduler, rebuilt from the attempts when None.
+        self.practicing = False
+        self.practice = None
+        # Bit mask over nodes.REGIONS of the chart regions last drawn
+        # mid-round, i.e. with their buttons disabled.
+        self.stale_regions = 0
+
+    # ---------------------------
+    # Effects
+    # ---------------------------
+    @property
+    def effects(self):
+        return unpack(self.state)
+
+    def effect(self, node):
+        return self.state // PLACE[NODE_INDEX[node]] % 3 - 1
+
+    def set_effect(self, node, value):
+        place = PLACE[NODE_INDEX[node]]
+        self.state += (value - self.effect(node)) * place
+
+    def set_effects(self, effects):
+        self.state = pack(effects)
+
+    def values(self, params=DEFAULT_PARAMS):
+        """(hr, sv, co) of the current effects."""
+        return state_values(self.state, params)
@@ -0,0 +1,166 @@
+"""Session-state backends so any worker process can resume a session.
+
+A session's round (effects, phase, selected node, pending direction and
+the patient profile it is graded against) is saved under its session
+id, which the app keeps in the page URL as ``?sid=``. A browser that
+reconnects to a different worker, after a restart or behind a load
+balancer, brings the id along and the new worker loads the round from
+the store.
+
+Backends are chosen with ``CARDIAC_SESSION_STORE``:
+
+- unset or "none": no persistence; state lives in one process only;
+- "memory": an in-process dict, for a single worker and for testing;
+- "sqlite": a SQLite database in WAL mode shared by every worker on the
+  host (``data/sessions.db``), with an in-process read-through cache.
+  The cache is dropped whenever ``PRAGMA data_version`` shows another
+  process has written to the database, so it is never stale.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from paths import DATA_DIR
+
+SESSION_STORE = os.environ.get("CARDIAC_SESSION_STORE", "none")
+SESSIONS_DB = os.path.join(DATA_DIR, "sessions.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    state INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    selected_node TEXT,
+    pending_direction INTEGER,
+    updated REAL NOT NULL,
+    profile TEXT
+);
+"""
+
+
+class SessionRecord(NamedTuple):
+    state: int
+    phase: str
+    selected_node: Optional[str]
+    pending_direction: Optional[int]
+    # None for rows saved before profiles were stored: keep the default.
+    profile: Optional[str] = None
+
+    @classmethod
+    def of(cls, session):
+        return cls(session.state, session.phase, session.selected_node, session.pending_direction, session.profile)
+
+    def apply(self, session):
+        session.state = self.state
+        session.phase = self.phase
+        session.selected_node = self.selected_node
+        session.pending_direction = self.pending_direction
+        if self.profile is not None:
+            session.profile = self.profile
+
+
+class MemoryStore:
+    def __init__(self):
+        self._records = {}
+
+    def load(self, session_id) -> Optional[SessionRecord]:
+        return self._records.get(session_id)
+
+    def save(self, session_id, record: SessionRecord):
+        self._records[session_id] = record
+
+    def delete(self, session_id):
+        self._records.pop(session_id, None)
+
+    def close(self):
+        pass
+
+
+class SQLiteStore:
+    def __init__(self, path=SESSIONS_DB, cache_size=4096):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.cache_size = cache_size
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        # One connection shared by the session threads of this process.
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._cache = OrderedDict()
+        self._data_version = None
+
+    def _migrate(self):
+        # Stores written before profiles were saved lack the column.
+        if "profile" not in {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}:
+            try:
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN profile TEXT")
+            except sqlite3.OperationalError:
+                # Another worker added it first.
+                pass
+
+    def _validate_cache(self):
+        # data_version changes only when another connection commits.
+        (version,) = self._conn.execute("PRAGMA data_version").fetchone()
+        if version != self._data_version:
+            self._cache.clear()
+            self._data_version = version
+
+    def _remember(self, session_id, record):
+        self._cache[session_id] = record
+        self._cache.move_to_end(session_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def load(self, session_id) -> Optional[SessionRecord]:
+        with self._lock:
+            self._validate_cache()
+            if session_id in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(session_id)
+                return self._cache[session_id]
+            self.misses += 1
+            row = self._conn.execute(
+                "SELECT state, phase, selected_node, pending_direction, profile FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            record = SessionRecord(*row) if row else None
+            if record:
+                self._remember(session_id, record)
+            return record
+
+    def save(self, session_id, record: SessionRecord):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions"
+                " (session_id, state, phase, selected_node, pending_direction, profile, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (session_id, *record, time.time()),
+            )
+            self._remember(session_id, record)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._cache.pop(session_id, None)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_store(kind=SESSION_STORE, path=SESSIONS_DB):
+    """The configured backend, or None when sessions are not persisted."""
+    if kind == "memory":
+        return MemoryStore()
+    if kind == "sqlite":
+        return SQLiteStore(path)
+    if kind in ("", "none"):
+        return None
+    raise ValueError(f"unknown CARDIAC_SESSION_STORE {kind!r}")
@@ -0,0 +1,100 @@
+"""Beat-by-beat HR, SV and CO after an intervention.
+
+The arrow model moves SV a fixed ``sv_step`` per unit of drive. Here SV
+comes from a Frank–Starling curve instead: venous return sets preload,
+which raises SV with diminishing returns; inotropes scale the curve; and
+afterload divides what the ventricle can eject. HR keeps the arrow
+model's drive. After an intervention each variable relaxes from its old
+steady state to its new one as a first-order system per beat, HR within
+a few beats (autonomic) and SV over more (venous pooling). The solution
+is closed form, so a whole trajectory, or a batch of them, is a handful
+of NumPy operations with no per-beat Python loop.
+"""
+import functools
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+from model import DEFAULT_PARAMS, NODE_INDEX, drives
+
+
+@dataclass(frozen=True)
+class SimParams:
+    beats: int = 60
+    # Fractional change per unit of effect.
+    preload_gain: float = 0.3
+    contractility_gain: float = 0.2
+    afterload_gain: float = 0.2
+    # Curvature of the Frank–Starling curve: smaller flattens it sooner.
+    starling_k: float = 0.8
+    # Relaxation time constants, in beats.
+    hr_tau: float = 3.0
+    sv_tau: float = 8.0
+
+
+DEFAULT_SIM = SimParams()
+
+
+class Trajectory(NamedTuple):
+    t: np.ndarray   # seconds since the intervention, at each beat
+    hr: np.ndarray
+    sv: np.ndarray
+    co: np.ndarray
+
+
+# ---------------------------
+# Steady state
+# ---------------------------
+def starling(preload, k):
+    """Frank–Starling curve normalized so baseline preload (1.0) gives 1.0."""
+    return (1 - np.exp(-preload / k)) / (1 - np.exp(-1 / k))
+
+
+def steady_state(effects, params=DEFAULT_PARAMS, sim=DEFAULT_SIM):
+    """Steady HR and SV for one effect vector or an (n, 8) batch."""
+    effects = np.asarray(effects, dtype=np.float64)
+    col = {node: effects[..., i] for node, i in NODE_INDEX.items()}
+    hr_drive, _ = drives(effects)
+    hr = params.hr_baseline * (1 + params.hr_step * hr_drive)
+    preload = np.maximum(1 + sim.preload_gain * col["venous"], 0.05)
+    contractility = 1 + sim.contractility_gain * (col["ino_pos"] - col["ino_neg"] + col["sv"])
+    afterload = 1 + sim.afterload_gain * col["afterload"]
+    sv = params.sv_baseline * contractility * starling(preload, sim.starling_k) / afterload
+    return np.clip(hr, params.hr_min, params.hr_max), np.clip(sv, params.sv_min, params.sv_max)
+
+
+# ---------------------------
+# Trajectories
+# ---------------------------
+def simulate(before, after, params=DEFAULT_PARAMS, sim=DEFAULT_SIM):
+    """Trajectories for a batch of (before, after) effect vectors, shape (n, beats)."""
+    hr0, sv0 = steady_state(before, params, sim)
+    hr1, sv1 = steady_state(after, params, sim)
+    beat = np.arange(sim.beats)
+    hr = hr1[..., None] + (hr0 - hr1)[..., None] * np.exp(-beat / sim.hr_tau)
+    sv = sv1[..., None] + (sv0 - sv1)[..., None] * np.exp(-beat / sim.sv_tau)
+    # Each beat lasts 60 / HR seconds; time is the start of each beat.
+    t = np.cumsum(60.0 / hr, axis=-1) - 60.0 / hr[..., :1]
+    return Trajectory(t, hr, sv, hr * sv / 1000.0)
+
+
+@functools.lru_cache(maxsize=1024)
+def trajectory(before, after, params=DEFAULT_PARAMS, sim=DEFAULT_SIM):
+    """Memoized single trajectory; ``before`` and ``after`` are effect tuples.
+
+    The arrays are shared between callers and marked read-only.
+    """
+    out = Trajectory(*(a[0] for a in simulate([before], [after], params, sim)))
+    for a in out:
+        a.flags.writeable = False
+    return out
+
+
+def percent_of_baseline(traj, params=DEFAULT_PARAMS):
+    """HR, SV and CO as a percentage of the baseline values."""
+    return {
+        "HR": 100 * traj.hr / params.hr_baseline,
+        "SV": 100 * traj.sv / params.sv_baseline,
+        "CO": 100 * traj.co / params.co_baseline,
+    }
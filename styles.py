@@ -0,0 +1,80 @@
+"""Stylesheet and box markup shared by the Streamlit app and the static export.
+
+The stylesheet lives in ``static/app.css``. With
+``server.enableStaticServing`` on (``.streamlit/config.toml``), Streamlit
+serves it at ``app/static/app.css`` and the app links it once per run
+instead of sending the whole ``<style>`` block. The link carries a hash
+of the file's contents, so an edited stylesheet gets a new URL and the
+browser may cache each URL for good (see ``serve.py``).
+
+The chart's boxes are rendered from the templates below. A box's markup
+depends only on its node and the arrow it shows, so each combination is
+formatted once per process.
+"""
+import functools
+import hashlib
+import os
+
+from paths import ROOT
+
+CSS_PATH = os.path.join(ROOT, "static", "app.css")
+
+with open(CSS_PATH, encoding="utf-8") as f:
+    APP_CSS = f.read()
+
+CSS_VERSION = hashlib.sha256(APP_CSS.encode()).hexdigest()[:12]
+STYLESHEET_URL = f"app/static/app.css?v={CSS_VERSION}"
+STYLESHEET_LINK = f"<link rel='stylesheet' href='{STYLESHEET_URL}'>"
+INLINE_STYLESHEET = f"<style>{APP_CSS}</style>"
+
+# ---------------------------
+# Templates
+# ---------------------------
+AGENT_BOX = (
+    "<div class='inner-agent-box'><h5>{title}</h5>"
+    "<div class='amount-label'>Amount:</div>"
+    "<div class='arrow-display'{arrow_id}>{arrow}</div></div>"
+)
+GROUP_BOX = "<div class='{box_class}'><h4>{title}</h4><div class='desc'>{desc}</div></div>"
+NODE_BOX = (
+    "<div class='{box_class}'><h4>{title}</h4>"
+    "<div class='desc'>{desc}</div>"
+    "<div class='arrow-display'{arrow_id}>{arrow}</div></div>"
+)
+CORRELATION = "<div class='correlation-text'>{text}</div>"
+ARROW_DOWN = "<div class='arrow-down'>↓</div>"
+FLOW_ARROW = "<div class='flow-arrow'>{arrow}</div>"
+CO_TITLE = "Cardiac output"
+CO_DESC = "(blood pumped per minute)"
+
+
+def arrow_id(key, ids):
+    # The static export updates arrows from script, so it gives them ids.
+    return f" id='arrow-{key}'" if ids else ""
+
+
+@functools.lru_cache(maxsize=None)
+def agent_box(node, arrow, ids=False):
+    return AGENT_BOX.format(title=node.title, arrow=arrow, arrow_id=arrow_id(node.key, ids))
+
+
+@functools.lru_cache(maxsize=None)
+def group_box(group):
+    return GROUP_BOX.format(box_class=group.box_class, title=group.title, desc=group.desc)
+
+
+@functools.lru_cache(maxsize=None)
+def node_box(node, arrow, ids=False):
+    return NODE_BOX.format(
+        box_class=node.box_class, title=node.title, desc=node.desc, arrow=arrow, arrow_id=arrow_id(node.key, ids)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def correlation(node):
+    return CORRELATION.format(text=node.correlation)
+
+
+@functools.lru_cache(maxsize=None)
+def co_box(arrow, ids=False):
+    return NODE_BOX.format(box_class="co-box", title=CO_TITLE, desc=CO_DESC, arrow=arrow, arrow_id=arrow_id("co", ids))
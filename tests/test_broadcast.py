@@ -0,0 +1,30 @@
+from broadcast import Channel, active_session, rerun_session
+
+
+def test_gone_sessions_drop_out_of_the_subscriber_count():
+    channel = Channel()
+    live = {"a", "b", "c"}
+    for key in ("a", "b", "c"):
+        channel.subscribe(key, lambda key: True, lambda key: key in live)
+    channel.subscribe("plain", lambda key: True)
+    assert channel.subscribers == 4
+    live.discard("b")
+    # Counted without a publish in between.
+    assert channel.subscribers == 3
+
+
+def test_publish_drops_subscribers_whose_callback_fails():
+    channel = Channel()
+    woken = []
+    channel.subscribe("kept", woken.append)
+    channel.subscribe("gone", lambda key: False)
+    broadcast = channel.publish("afterload", 1)
+    assert woken == ["kept"] and channel.subscribers == 1
+    assert channel.record(broadcast.id, "Decrease", True)
+    assert not channel.record(broadcast.id + 1, "Decrease", True)
+    assert channel.results()[1] == {("Decrease", True): 1}
+
+
+def test_no_streamlit_sessions_outside_a_served_app():
+    assert active_session("missing") is None
+    assert rerun_session("missing") is False
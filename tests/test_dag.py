@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from dag import CardiacDag, History
+from model import DEFAULT_PARAMS, ModelParams, NODE_KEYS, evaluate
+
+PARAMS = (DEFAULT_PARAMS, ModelParams(hr_step=0.4, sv_step=0.4, hr_max=120.0, sv_min=45.0))
+
+
+def assert_matches_model(snapshot, params):
+    hr, sv, co = (float(v) for v in evaluate(snapshot.effects, params))
+    assert snapshot.hr == pytest.approx(hr)
+    assert snapshot.sv == pytest.approx(sv)
+    assert snapshot.co == pytest.approx(co)
+
+
+@pytest.mark.parametrize("params", PARAMS)
+def test_incremental_values_match_full_evaluation(params):
+    rng = random.Random(0)
+    dag = CardiacDag(params)
+    for _ in range(500):
+        node, value = rng.choice(NODE_KEYS), rng.choice((-1, 0, 1))
+        before = dag.state
+        touched = dag.set_effect(node, value)
+        assert dag.state.change == (node, value)
+        assert_matches_model(dag.state, params)
+        # Nothing outside the recomputed nodes changed.
+        for name in ("hr", "sv", "co"):
+            if name not in touched:
+                assert getattr(dag.state, name) == getattr(before, name)
+
+
+def test_undo_redo_and_goto_restore_each_step():
+    rng = random.Random(1)
+    history = History(CardiacDag())
+    seen = [history.dag.state]
+    for _ in range(30):
+        history.apply(rng.choice(NODE_KEYS), rng.choice((-1, 1)))
+        seen.append(history.dag.state)
+    assert history.steps == seen and history.cursor == 30
+    assert not history.can_redo()
+
+    while history.can_undo():
+        history.undo()
+        assert history.dag.state == seen[history.cursor]
+    assert history.cursor == 0 and not any(history.dag.effects)
+    while history.can_redo():
+        history.redo()
+        assert history.dag.state == seen[history.cursor]
+    for step in rng.sample(range(len(seen)), 10):
+        assert history.goto(step) == seen[step]
+        assert_matches_model(history.dag.state, DEFAULT_PARAMS)
+
+
+def test_apply_after_undo_discards_redo_steps():
+    history = History(CardiacDag())
+    history.apply("afterload", 1)
+    history.apply("venous", -1)
+    history.undo()
+    history.apply("chrono_pos", 1)
+    assert len(history.steps) == 3 and history.cursor == 2
+    assert not history.can_redo()
+    assert [step.change for step in history.steps[1:]] == [("afterload", 1), ("chrono_pos", 1)]
+
+
+def test_reset_keeps_params_and_returns_to_baseline():
+    params = PARAMS[1]
+    history = History(CardiacDag(params, (1,) * len(NODE_KEYS)))
+    history.apply("afterload", -1)
+    history.reset()
+    assert history.dag.params == params
+    assert history.steps == [history.dag.state] and history.cursor == 0
+    assert not any(history.dag.effects)
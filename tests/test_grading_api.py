@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import pytest
+
+from grading_api import NDJSON, RecordError, app, grade_chunk, parse_record
+from model import DEFAULT_PARAMS, DIRECTION_LABELS
+from outcomes import baseline_directions, get_outcome_table
+
+GOOD = {"state": 0, "node": "afterload", "direction": 1, "prediction": "Decrease"}
+# One well-formed record, then records with unhashable or mistyped fields.
+MIXED = [
+    GOOD,
+    {**GOOD, "direction": [1]},
+    {**GOOD, "prediction": {"label": "Decrease"}},
+    {**GOOD, "node": ["afterload"]},
+    {**GOOD, "direction": True},
+    dict(GOOD, id="last"),
+]
+
+
+def post(path, body, content_type="application/json"):
+    """(status, body bytes) of one POST to the app, driven over ASGI."""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "method": "POST", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [(b"content-type", content_type.encode())], "http_version": "1.1", "scheme": "http",
+        "server": ("test", 80), "client": ("test", 1234), "root_path": "",
+    }
+    asyncio.run(app(scope, receive, send))
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    return status, b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+
+
+@pytest.mark.parametrize("record", MIXED[1:5])
+def test_mistyped_fields_are_record_errors(record):
+    with pytest.raises(RecordError):
+        parse_record(record)
+
+
+def test_mixed_chunk_grades_valid_records():
+    text, correct, errors = grade_chunk(MIXED)
+    lines = [json.loads(line) for line in text.splitlines()]
+    assert [line["index"] for line in lines] == list(range(len(MIXED)))
+    assert [("error" in line) for line in lines] == [False, True, True, True, True, False]
+    assert lines[-1]["id"] == "last"
+    assert errors == 4 and correct == 2
+
+
+def test_bulk_json_reports_per_record_errors():
+    status, body = post("/grade/bulk", json.dumps({"records": MIXED}).encode())
+    assert status == 200
+    result = json.loads(body)
+    assert result["summary"] == {"records": 6, "correct": 2, "errors": 4}
+    assert "error" in result["results"][1]
+
+
+def test_bulk_ndjson_streams_every_line_and_summary():
+    body = "\n".join(json.dumps(record) for record in MIXED).encode()
+    status, text = post("/grade/bulk", body, NDJSON)
+    assert status == 200
+    lines = [json.loads(line) for line in text.splitlines()]
+    assert len(lines) == len(MIXED) + 1
+    assert lines[-1] == {"summary": {"records": 6, "correct": 2, "errors": 4}}
+
+
+def test_evaluate_reuses_the_cached_baseline_directions():
+    expected = baseline_directions(DEFAULT_PARAMS)
+    for state in (0, 3280, 6560):
+        status, body = post("/evaluate", json.dumps({"state": state}).encode())
+        assert status == 200
+        co, hr, sv = (DIRECTION_LABELS[d] for d in expected[state].tolist())
+        assert json.loads(body)["directions"] == {"co": co, "hr": hr, "sv": sv}
+    # Computed once per outcome table, not per request.
+    table = get_outcome_table(DEFAULT_PARAMS)
+    assert table.baselines is table.baselines
@@ -0,0 +1,156 @@
+"""Exhaustive model invariants over all 3^8 = 6561 effect states.
+
+Every state and every state x node x direction transition is checked for
+the default parameters, settings that push HR and SV into their clamps,
+and every patient profile in ``profiles.json``.
+"""
+import functools
+import os
+
+import numpy as np
+import pytest
+
+from model import (
+    DEFAULT_PARAMS,
+    DIRECTION_LABELS,
+    HR_WEIGHTS,
+    N_EFFECTS,
+    SV_WEIGHTS,
+    ModelParams,
+    direction_vs_baseline,
+    directions,
+    evaluate,
+    evaluate_raw,
+    expected_direction,
+)
+import outcomes
+from outcomes import (
+    N_STATES,
+    OUT_CO,
+    OUT_HR,
+    OUT_SV,
+    OutcomeTable,
+    all_states,
+    baseline_directions,
+    build_directions,
+    state_effects,
+    state_index,
+)
+from profiles import load_profiles
+from session import BASELINE_STATE, pack, state_values, unpack
+
+PARAM_SETS = {
+    "default": DEFAULT_PARAMS,
+    "shifted baseline": ModelParams(hr_baseline=60.0, sv_baseline=85.0),
+    # Large steps reach every clamp within the 3^8 states.
+    "clamped": ModelParams(hr_step=0.4, sv_step=0.4, hr_max=120.0, sv_min=45.0),
+    **{f"profile {key}": profile.params for key, profile in load_profiles().items()},
+}
+TRANSITIONS = [(node, slot, direction) for node in range(N_EFFECTS) for slot, direction in enumerate((-1, 1))]
+
+params_sets = pytest.mark.parametrize("params", PARAM_SETS.values(), ids=PARAM_SETS.keys())
+
+
+@functools.lru_cache(maxsize=None)
+def table(params):
+    return build_directions(params)
+
+
+def clamped(raw_before, raw_after, low, high):
+    """Whether a value is held at one clamp both before and after a change."""
+    return ((raw_before <= low) & (raw_after <= low)) | ((raw_before >= high) & (raw_after >= high))
+
+
+# ---------------------------
+# Indexing
+# ---------------------------
+def test_state_index_round_trips():
+    indices = np.arange(N_STATES)
+    assert (state_index(state_effects(indices)) == indices).all()
+
+
+def test_session_packing_matches_table_indexing():
+    states = all_states()
+    assert [pack(effects) for effects in states.tolist()] == list(range(N_STATES))
+    assert (np.array([unpack(i) for i in range(N_STATES)]) == states).all()
+    assert not states[BASELINE_STATE].any()
+
+
+# ---------------------------
+# States
+# ---------------------------
+@params_sets
+def test_values_stay_in_clamps_and_co_is_hr_times_sv(params):
+    hr, sv, co = evaluate(all_states(), params)
+    assert ((hr >= params.hr_min) & (hr <= params.hr_max)).all()
+    assert ((sv >= params.sv_min) & (sv <= params.sv_max)).all()
+    assert np.allclose(co, hr * sv / 1000.0)
+    base = BASELINE_STATE
+    assert np.allclose((hr[base], sv[base], co[base]), (params.hr_baseline, params.sv_baseline, params.co_baseline))
+
+
+@params_sets
+def test_scalar_helpers_match_vectorized_model(params):
+    hr, sv, co = evaluate(all_states(), params)
+    # The app's per-state values (compute_state).
+    values = np.array([state_values(i, params) for i in range(N_STATES)])
+    assert np.allclose(values, np.column_stack((hr, sv, co)))
+    scalar = np.array([
+        (direction_vs_baseline(c, params.co_baseline), direction_vs_baseline(h, params.hr_baseline),
+         direction_vs_baseline(s, params.sv_baseline))
+        for h, s, c in zip(hr.tolist(), sv.tolist(), co.tolist())
+    ])
+    assert (scalar == baseline_directions(params)).all()
+
+
+# ---------------------------
+# Transitions
+# ---------------------------
+@params_sets
+@pytest.mark.parametrize("node, slot, direction", TRANSITIONS)
+def test_transition_directions(params, node, slot, direction):
+    states = all_states()
+    after = states.copy()
+    after[:, node] = direction
+    delta = direction - states[:, node]
+    out = table(params)[:, node, slot]
+    co_dir, hr_dir, sv_dir = out[:, OUT_CO], out[:, OUT_HR], out[:, OUT_SV]
+
+    # HR and SV move only the way the node's weight says, and stay flat
+    # only when held at a clamp (e.g. raising afterload never raises SV).
+    hr_raw0, sv_raw0 = evaluate_raw(states, params)
+    hr_raw1, sv_raw1 = evaluate_raw(after, params)
+    for weight, got, raw0, raw1, low, high in (
+        (HR_WEIGHTS[node], hr_dir, hr_raw0, hr_raw1, params.hr_min, params.hr_max),
+        (SV_WEIGHTS[node], sv_dir, sv_raw0, sv_raw1, params.sv_min, params.sv_max),
+    ):
+        expected = np.sign(weight * delta)
+        assert not ((got != 0) & (got != expected)).any()
+        assert not ((got == 0) & (expected != 0) & ~clamped(raw0, raw1, low, high)).any()
+
+    hr0, sv0, co0 = evaluate(states, params)
+    hr1, sv1, co1 = evaluate(after, params)
+    assert (co_dir == directions(hr0 * sv0, hr1 * sv1)).all()
+    agree = (hr_dir == sv_dir) | (hr_dir == 0) | (sv_dir == 0)
+    assert not (agree & (co_dir != np.sign(hr_dir.astype(np.int16) + sv_dir))).any()
+    # Setting an effect to the value it already has changes nothing.
+    assert not ((delta == 0) & out.any(axis=1)).any()
+
+    labels = [expected_direction(b, a) for b, a in zip(co0.tolist(), co1.tolist())]
+    assert labels == [DIRECTION_LABELS[int(d)] for d in co_dir]
+
+
+@params_sets
+def test_cached_table_matches_fresh_build(params):
+    assert (OutcomeTable.load_or_build(params).table == table(params)).all()
+
+
+def test_cache_is_keyed_by_model_version(tmp_path, monkeypatch):
+    OutcomeTable.load_or_build(DEFAULT_PARAMS, str(tmp_path))
+    # A stale table under the current key would be served as is.
+    (path,) = tmp_path.iterdir()
+    np.save(path, np.zeros((N_STATES, N_EFFECTS, 2, 3), dtype=np.int8))
+    monkeypatch.setattr(outcomes, "MODEL_VERSION", outcomes.MODEL_VERSION + 1)
+    rebuilt = OutcomeTable.load_or_build(DEFAULT_PARAMS, str(tmp_path))
+    assert (rebuilt.table == table(DEFAULT_PARAMS)).all()
+    assert len(os.listdir(tmp_path)) == 2
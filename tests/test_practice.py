@@ -0,0 +1,81 @@
+import random
+
+from practice import FIRST_INTERVAL, MAX_EASE, MIN_EASE, NODE_ITEMS, Scheduler, from_attempts
+
+
+def test_new_items_are_mixed_in_with_reviews():
+    scheduler = Scheduler(seed=0)
+    asked, last = [], None
+    for _ in range(2 * len(NODE_ITEMS)):
+        last = scheduler.next(avoid=last)
+        asked.append(last)
+        scheduler.record(last, True)
+    # Reviews start before every item has been seen, and none is left out.
+    assert len(set(asked[:len(NODE_ITEMS)])) < len(NODE_ITEMS)
+    assert set(asked) == set(NODE_ITEMS)
+
+
+def test_next_avoids_the_item_just_asked():
+    scheduler = Scheduler(seed=1)
+    last = None
+    for _ in range(200):
+        item = scheduler.next(avoid=last)
+        assert item != last
+        scheduler.record(item, False)
+        last = item
+    # With a single item there is nothing else to ask.
+    single = Scheduler([("hr", 1)])
+    assert single.next(avoid=("hr", 1)) == ("hr", 1)
+
+
+def test_intervals_grow_when_right_and_reset_when_wrong():
+    scheduler = Scheduler(seed=2)
+    item = NODE_ITEMS[0]
+    intervals = []
+    for _ in range(4):
+        scheduler.record(item, True)
+        intervals.append(scheduler.stats(item).interval)
+    assert intervals[0] == FIRST_INTERVAL
+    assert intervals == sorted(intervals) and len(set(intervals)) == 4
+    scheduler.record(item, False)
+    stats = scheduler.stats(item)
+    assert (stats.interval, stats.streak, stats.lapses) == (1, 0, 1)
+    assert stats.due == scheduler.clock + 1
+    assert MIN_EASE <= stats.ease <= MAX_EASE
+
+
+def test_heap_stays_consistent_and_bounded():
+    rng = random.Random(3)
+    scheduler = Scheduler(seed=3)
+    last = None
+    for _ in range(5_000):
+        last = scheduler.next(avoid=last)
+        scheduler.record(last, rng.random() < 0.7)
+        assert len(scheduler._heap) <= 2 * len(scheduler) + 64
+    # The top of the heap is always the live item due first.
+    top = scheduler._top()
+    due = min((scheduler.stats(key).due, -scheduler.stats(key).lapses) for key in NODE_ITEMS)
+    assert (top[0], top[1]) == due
+    assert top[3] == scheduler.stats(top[4]).version
+
+
+def test_missed_items_come_back_more_often():
+    rng = random.Random(4)
+    weak = set(rng.sample(NODE_ITEMS, 3))
+    scheduler = Scheduler(seed=4)
+    asked, last = 0, None
+    for _ in range(300):
+        last = scheduler.next(avoid=last)
+        asked += last in weak
+        scheduler.record(last, last not in weak)
+    assert asked / 300 > 2 * len(weak) / len(NODE_ITEMS)
+    assert {key for key, _ in scheduler.weakest(3)} == weak
+
+
+def test_unknown_items_are_added_and_replayed_history_matches():
+    scheduler = Scheduler(seed=5)
+    scheduler.record(("scenario", 7), False)
+    assert len(scheduler) == len(NODE_ITEMS) + 1
+    records = [("afterload", 1, "Increase", "Decrease", 0), ("afterload", 1, "Decrease", "Decrease", 0)]
+    replayed = from_attempts(records, seed=5).stats(("afterload", 1))
+    assert (replayed.seen, replayed.lapses, replayed.streak) == (2, 1, 1)
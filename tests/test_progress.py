@@ -0,0 +1,166 @@
+import random
+import sqlite3
+
+import pytest
+
+import progress
+from dag import CardiacDag, History
+from model import DIRECTION_LABELS, NODE_KEYS
+from outcomes import N_STATES
+from profiles import load_profiles
+from scenarios import TIERS
+from session import PHASES, SessionState
+
+PROFILES = load_profiles()
+LABELS = list(DIRECTION_LABELS.values())
+FIELDS = (
+    "profile", "state", "previous_state", "phase", "selected_node", "pending_direction", "prediction",
+    "last_feedback", "last_correct", "challenge_tier", "attempts", *progress.FLAGS,
+)
+
+
+def random_session(seed):
+    rng = random.Random(seed)
+    s = SessionState("sid", rng.choice(TIERS), rng.choice(list(PROFILES)))
+    s.state, s.previous_state = rng.randrange(6561), rng.randrange(6561)
+    s.phase = rng.choice(PHASES)
+    if s.phase != "select_box":
+        s.selected_node = rng.choice(NODE_KEYS)
+        s.pending_direction = rng.choice((-1, 1, None))
+    if s.phase == "show_result":
+        s.prediction, s.last_feedback = rng.choice(LABELS), rng.choice(LABELS)
+        s.last_correct = s.prediction == s.last_feedback
+    for name in progress.FLAGS:
+        setattr(s, name, rng.random() < 0.5)
+    if s.cumulative:
+        s.history = History(CardiacDag(PROFILES[s.profile].params))
+        for _ in range(rng.randrange(6)):
+            s.history.apply(rng.choice(NODE_KEYS), rng.choice((-1, 1)))
+        if s.history.can_undo() and rng.random() < 0.5:
+            s.history.undo()
+    for _ in range(rng.randrange(20)):
+        progress.record_attempt(s, rng.choice(NODE_KEYS), rng.choice((-1, 1)), rng.choice(LABELS), rng.choice(LABELS))
+    return s
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_snapshot_round_trip(seed):
+    s = random_session(seed)
+    restored = SessionState("other")
+    assert progress.restore(restored, progress.dump(s), PROFILES)
+    for name in FIELDS:
+        assert getattr(restored, name) == getattr(s, name), name
+    if s.history is None:
+        assert restored.history is None
+    else:
+        assert restored.history.steps == s.history.steps
+        assert restored.history.cursor == s.history.cursor
+        assert restored.history.dag.state == s.history.dag.state
+    # Dumping the restored session gives back the same bytes.
+    assert progress.dump(restored) == progress.dump(s)
+
+
+def test_attempt_history_is_capped():
+    s = SessionState("sid")
+    for i in range(progress.MAX_ATTEMPTS + 5):
+        progress.record_attempt(s, NODE_KEYS[i % len(NODE_KEYS)], 1, "Increase", "Decrease" if i % 2 else "Increase")
+    records = progress.attempts(s)
+    assert len(records) == progress.MAX_ATTEMPTS
+    # The oldest attempts were dropped.
+    assert records[0][0] == NODE_KEYS[5 % len(NODE_KEYS)]
+    assert progress.score(s) == (progress.MAX_ATTEMPTS // 2, progress.MAX_ATTEMPTS)
+
+
+def test_removed_profile_falls_back_to_the_first():
+    s = random_session(0)
+    s.profile = "athlete"
+    remaining = {key: profile for key, profile in PROFILES.items() if key != "athlete"}
+    restored = SessionState("x")
+    assert progress.restore(restored, progress.dump(s), remaining)
+    assert restored.profile == next(iter(remaining))
+    assert progress.attempts(restored) == progress.attempts(s)
+
+
+def test_restore_rejects_unknown_version_and_no_profiles():
+    s = random_session(0)
+    snapshot = progress.dump(s)
+    assert not progress.restore(SessionState("x"), snapshot, {})
+    assert not progress.restore(SessionState("x"), bytes((progress.VERSION + 1,)) + snapshot[1:], PROFILES)
+    assert not progress.restore(SessionState("x"), b"", PROFILES)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_restore_rejects_truncated_snapshots(seed):
+    snapshot = progress.dump(random_session(seed))
+    before = progress.dump(SessionState("x"))
+    for n in range(1, len(snapshot)):
+        restored = SessionState("x")
+        assert not progress.restore(restored, snapshot[:n], PROFILES), n
+        # A failed restore leaves the session as it was.
+        assert progress.dump(restored) == before
+
+
+@pytest.mark.parametrize("offset, value", [
+    (1, 60000),  # state
+    (3, 6561),  # previous state
+    (5, 9),  # phase
+    (6, 120),  # selected node
+    (7, 5),  # pending direction
+    (10, 2),  # last correct
+    (12, 200),  # challenge tier
+])
+def test_restore_rejects_out_of_range_fields(offset, value):
+    s = random_session(1)
+    s.last_correct = True
+    snapshot = bytearray(progress.dump(s))
+    size = 2 if offset in (1, 3) else 1
+    snapshot[offset:offset + size] = value.to_bytes(size, "little", signed=value < 0)
+    restored = SessionState("x")
+    assert not progress.restore(restored, bytes(snapshot), PROFILES)
+    assert progress.dump(restored) == progress.dump(SessionState("x"))
+
+
+def test_restore_never_raises_on_corrupt_snapshots():
+    rng = random.Random(6)
+    snapshot = bytearray(progress.dump(random_session(6)))
+    for _ in range(500):
+        corrupt = bytearray(snapshot)
+        corrupt[rng.randrange(1, len(corrupt))] = rng.randrange(256)
+        restored = SessionState("x")
+        if progress.restore(restored, bytes(corrupt), PROFILES):
+            # Whatever restores is usable: it dumps and grades without errors.
+            progress.dump(restored)
+            progress.attempts(restored)
+            assert 0 <= restored.state < N_STATES and 0 <= restored.previous_state < N_STATES
+
+
+def test_store_coalesces_and_persists(tmp_path):
+    path = str(tmp_path / "progress.db")
+    store = progress.ProgressStore(path, delay=0.05)
+    for i in range(20):
+        store.save("ana", bytes((i,)))
+    # Pending snapshots are visible before they are written.
+    assert store.load("ana") == bytes((19,))
+    assert store.flush()
+    store.close()
+    assert store.saves == 20 and store.commits == 1
+    reopened = progress.ProgressStore(path)
+    try:
+        assert reopened.load("ana") == bytes((19,))
+        assert reopened.load("bo") is None
+    finally:
+        reopened.close()
+
+
+def test_set_aside_keeps_unreadable_snapshots(tmp_path):
+    path = str(tmp_path / "progress.db")
+    store = progress.ProgressStore(path, delay=0.01)
+    try:
+        store.set_aside("ana", b"\xffcorrupt")
+        store.save("ana", b"new")
+        assert store.flush()
+    finally:
+        store.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT student_id, snapshot FROM unreadable").fetchall() == [("ana", b"\xffcorrupt")]
+    assert conn.execute("SELECT snapshot FROM progress").fetchall() == [(b"new",)]
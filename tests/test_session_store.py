@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from session import BASELINE_STATE, SessionState
+from session_store import MemoryStore, SessionRecord, SQLiteStore, open_store
+
+RECORDS = (
+    SessionRecord(BASELINE_STATE, "select_box", None, None),
+    SessionRecord(1234, "predict", "afterload", 1, "athlete"),
+    SessionRecord(6560, "show_result", "chrono_neg", -1, "heart_failure"),
+)
+
+
+@pytest.fixture(params=("memory", "sqlite"))
+def store(request, tmp_path):
+    store = MemoryStore() if request.param == "memory" else SQLiteStore(str(tmp_path / "sessions.db"))
+    yield store
+    store.close()
+
+
+def test_record_round_trips_through_a_session():
+    s = SessionState("a")
+    for record in RECORDS:
+        record.apply(s)
+        assert SessionRecord.of(s) == record
+
+
+@pytest.mark.parametrize("record", RECORDS)
+def test_store_round_trip(store, record):
+    assert store.load("sid") is None
+    store.save("sid", record)
+    assert store.load("sid") == record
+    store.delete("sid")
+    assert store.load("sid") is None
+
+
+def test_sqlite_workers_see_each_others_writes(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteStore(path), SQLiteStore(path)
+    try:
+        first.save("sid", RECORDS[1])
+        assert second.load("sid") == RECORDS[1]
+        # A cached record is dropped once another worker writes.
+        second.load("sid")
+        first.save("sid", RECORDS[2])
+        assert second.load("sid") == RECORDS[2]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_sqlite_store_survives_reopening(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteStore(path)
+    store.save("sid", RECORDS[2])
+    store.close()
+    reopened = SQLiteStore(path)
+    try:
+        assert reopened.load("sid") == RECORDS[2]
+        assert reopened.misses == 1
+    finally:
+        reopened.close()
+    assert sqlite3.connect(path).execute("SELECT count(*) FROM sessions").fetchone() == (1,)
+
+
+def test_sqlite_store_migrates_rows_without_a_profile(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE sessions (session_id TEXT PRIMARY KEY, state INTEGER NOT NULL, phase TEXT NOT NULL,"
+        " selected_node TEXT, pending_direction INTEGER, updated REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO sessions VALUES ('old', 1234, 'predict', 'afterload', 1, 0)")
+    conn.commit()
+    conn.close()
+    store = SQLiteStore(path)
+    try:
+        record = store.load("old")
+        assert record == SessionRecord(1234, "predict", "afterload", 1)
+        # An old row keeps the session's default profile.
+        s = SessionState("old", profile="athlete")
+        record.apply(s)
+        assert s.profile == "athlete"
+        store.save("new", RECORDS[1])
+        assert store.load("new") == RECORDS[1]
+    finally:
+        store.close()
+
+
+def test_open_store_kinds():
+    assert open_store("none") is None
+    assert isinstance(open_store("memory"), MemoryStore)
+    with pytest.raises(ValueError):
+        open_store("redis")